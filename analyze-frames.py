@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Frame Analysis for 360° Product Viewer
+Compares neighbouring light frames of a rotation block by block and finds frames that
+repeat the previous one (a paused turntable, duplicated renders). create-image-manifest.py
+then points them at the frame they repeat, so it is downloaded and decoded once.
+
+With --deltas, frames that keep most of the previous keyframe unchanged are also stored
+as a delta: a WebP with only the changed blocks (the rest transparent), which the viewer
+draws over the keyframe.
+
+Usage:
+    python analyze-frames.py                    # ./3D-Images
+    python analyze-frames.py CLT695425          # one client folder
+    python analyze-frames.py --all --deltas     # every client folder, with deltas
+    python analyze-frames.py --tolerance 1.0    # stricter near-duplicate test
+
+Run create-image-manifest.py afterwards (server.py picks up the analysis by itself).
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    print("=" * 60)
+    print("ERROR: NumPy and Pillow (PIL) are required")
+    print("=" * 60)
+    print("\nPlease install them with:")
+    print("  pip install numpy Pillow")
+    print("=" * 60)
+    sys.exit(1)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SOURCE_DIR = "3D-Images"
+ANALYSIS_VERSION = 1
+BLOCK_SIZE = 16  # Near-duplicate test: every 16x16 block must match
+TOLERANCE = 2.0  # Largest mean absolute difference (0-255) of a block that still counts as unchanged
+DELTAS_DIR = "deltas"  # Inside 3D-Images/light/
+DELTA_BLOCK_SIZE = 32  # Blocks copied from the keyframe or sent in the delta
+DELTA_MIN_STATIC = 0.5  # Share of unchanged blocks below which a frame becomes a keyframe (and no delta is encoded)
+DELTA_MAX_RATIO = 0.8  # A delta must be smaller than this share of the frame, or the frame is kept
+KEYFRAME_INTERVAL = 8  # Frames in a row that may reference one keyframe
+DELTA_QUALITY = 85  # Same as the WebP light frames
+DELTA_METHOD = 6
+
+
+def load_script(filename):
+    """Import a sibling script (its dashed name cannot be imported directly)"""
+    spec = importlib.util.spec_from_file_location(filename[:-3].replace('-', '_'), SCRIPT_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+manifest = load_script('create-image-manifest.py')
+
+
+def load_frame(path):
+    """Decode a frame into an RGB uint8 array"""
+    with Image.open(path) as img:
+        return np.asarray(img.convert('RGB'))
+
+
+def block_errors(a, b, block):
+    """Mean absolute difference (0-255) of every block x block tile of two same-size frames"""
+    diff = np.abs(a.astype(np.int16) - b.astype(np.int16)).mean(axis=2, dtype=np.float32)
+    height, width = diff.shape
+    rows, cols = -(-height // block), -(-width // block)
+    sums = np.zeros((rows * block, cols * block), np.float32)
+    counts = np.zeros_like(sums)
+    sums[:height, :width] = diff
+    counts[:height, :width] = 1
+    # Partial blocks at the right and bottom edges average over their real pixels only
+    return (sums.reshape(rows, block, cols, block).sum(axis=(1, 3))
+            / counts.reshape(rows, block, cols, block).sum(axis=(1, 3)))
+
+
+def write_delta(frame, static, output):
+    """Write the changed blocks of a frame as an RGBA WebP (unchanged blocks transparent).
+
+    Returns (bytes, hash) of the file.
+    """
+    height, width = frame.shape[:2]
+    alpha = np.repeat(np.repeat(~static, DELTA_BLOCK_SIZE, axis=0), DELTA_BLOCK_SIZE, axis=1)
+    rgba = np.dstack([frame, (alpha[:height, :width] * 255).astype(np.uint8)])
+    output.parent.mkdir(exist_ok=True)
+    temp = output.with_name(output.name + '.tmp')
+    # exact=False lets the encoder discard the color of transparent pixels
+    Image.fromarray(rgba, 'RGBA').save(temp, 'WEBP', quality=DELTA_QUALITY, method=DELTA_METHOD, exact=False)
+    os.replace(temp, output)
+    return output.stat().st_size, manifest.file_hash(output)
+
+
+def smallest_size(info):
+    """Bytes of the smallest encoding of a frame the viewer may receive"""
+    return min(info.get("formats", {}).values(), default=info["bytes"])
+
+
+def analysis_signature(tolerance, deltas):
+    """Changing any of these settings invalidates a previous analysis"""
+    return (f"v{ANALYSIS_VERSION}-b{BLOCK_SIZE}-t{tolerance}"
+            + (f"-d{DELTA_BLOCK_SIZE}-s{DELTA_MIN_STATIC}-k{KEYFRAME_INTERVAL}-q{DELTA_QUALITY}" if deltas else ""))
+
+
+def analyze_folder(client_folder=None, tolerance=TOLERANCE, deltas=False, force=False):
+    """Find duplicate frames (and deltas) of one 3D-Images folder and write the analysis"""
+    base_path = Path(client_folder) if client_folder else SCRIPT_DIR
+    images_path = base_path / SOURCE_DIR
+    light_path = images_path / "light"
+    if not images_path.is_dir():
+        print(f"Warning: {images_path} does not exist, skipping...")
+        return None
+
+    # The frames exactly as the manifest lists them, without a previous analysis applied
+    frames = manifest.create_manifest(images_path, "", collapse=False, placeholders=False)
+    paths, infos = frames["light"], frames["lightFrames"]
+    bases = [manifest.get_base_name(path.rsplit('/', 1)[-1]) for path in paths]
+    hashes = {base: info["hash"] for base, info in zip(bases, infos)}
+    signature = analysis_signature(tolerance, deltas)
+
+    analysis_path = light_path / manifest.ANALYSIS_FILE
+    previous = manifest.load_manifest(analysis_path) or {}
+    if not force and previous.get("signature") == signature and previous.get("hashes") == hashes:
+        print(f"- {images_path}: up to date ({len(previous.get('duplicates', {}))} duplicate(s), "
+              f"{len(previous.get('deltas', {}))} delta(s))")
+        return previous
+
+    print(f"{images_path}: {len(paths)} frames")
+    duplicates = {}
+    delta_entries = {}
+    original_bytes = sum(smallest_size(info) for info in infos)
+    saved_bytes = 0
+    canonical = None  # (base, pixels) of the last frame that is not a duplicate
+    key = None  # (base, pixels, position) of the keyframe deltas refer to
+
+    for position, (base, path, info) in enumerate(zip(bases, paths, infos)):
+        try:
+            pixels = load_frame(manifest.resolve_frame_file(base_path / path))
+        except OSError as e:
+            print(f"✗ {base}: {e}")
+            canonical = key = None
+            continue
+
+        if canonical is not None and canonical[1].shape == pixels.shape:
+            worst = float(block_errors(pixels, canonical[1], BLOCK_SIZE).max())
+            if worst <= tolerance:
+                duplicates[base] = canonical[0]
+                saved_bytes += smallest_size(info)
+                print(f"✓ {base}: duplicate of {canonical[0]} (worst block differs by {worst:.2f})")
+                continue
+        canonical = (base, pixels)
+
+        if deltas and key is not None and key[1].shape == pixels.shape and position - key[2] <= KEYFRAME_INTERVAL:
+            static = block_errors(pixels, key[1], DELTA_BLOCK_SIZE) <= tolerance
+            if static.mean() >= DELTA_MIN_STATIC:
+                output = light_path / DELTAS_DIR / f"{base}.webp"
+                size, delta_hash = write_delta(pixels, static, output)
+                if size < smallest_size(info) * DELTA_MAX_RATIO:
+                    delta_entries[base] = {"key": key[0], "file": f"{DELTAS_DIR}/{base}.webp",
+                                           "hash": delta_hash, "bytes": size}
+                    saved_bytes += smallest_size(info) - size
+                    print(f"✓ {base}: delta on {key[0]}, {static.mean() * 100:.0f}% unchanged, "
+                          f"{smallest_size(info) / 1024:.1f}KB → {size / 1024:.1f}KB")
+                    continue
+                output.unlink()
+        key = (base, pixels, position)
+
+    # Deltas of frames that are now keyframes or gone
+    delta_path = light_path / DELTAS_DIR
+    if delta_path.is_dir():
+        kept = {Path(entry["file"]).name for entry in delta_entries.values()}
+        for stale in delta_path.glob('*.webp'):
+            if stale.name not in kept:
+                stale.unlink()
+
+    analysis = {
+        "signature": signature,
+        # Frame hashes at analysis time; the manifest ignores entries of frames changed since
+        "hashes": hashes,
+        "duplicates": duplicates,
+        "deltas": delta_entries,
+    }
+    temp = analysis_path.with_name(analysis_path.name + '.tmp')
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(analysis, f, indent=2, ensure_ascii=False)
+    os.replace(temp, analysis_path)
+
+    rotation_bytes = original_bytes - saved_bytes
+    print(f"  {len(duplicates)} duplicate(s), {len(delta_entries)} delta(s)")
+    print(f"  Per rotation: {original_bytes / 1e6:.2f} MB → {rotation_bytes / 1e6:.2f} MB "
+          f"(-{saved_bytes / original_bytes * 100 if original_bytes else 0:.1f}%)")
+    return analysis
+
+
+def find_client_folders(root_path):
+    """All folders next to this script with a 3D-Images/light folder"""
+    return sorted(item for item in root_path.iterdir()
+                  if item.is_dir() and not item.name.startswith('.') and (item / SOURCE_DIR / "light").is_dir())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find duplicate light frames and encode deltas')
+    parser.add_argument('folder', nargs='?', default=None, help='Client folder (default: ./3D-Images)')
+    parser.add_argument('--all', action='store_true', help='Analyze every client folder')
+    parser.add_argument('--deltas', action='store_true',
+                        help='Also store frames as changed blocks over a keyframe where it saves bytes')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help=f'Largest block difference (0-255) treated as unchanged (default: {TOLERANCE})')
+    parser.add_argument('--force', action='store_true', help='Analyze folders that are up to date')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Analyzing Rotation Frames for 360° Viewer")
+    print("=" * 60)
+    print()
+
+    start = time.perf_counter()
+    folders = find_client_folders(SCRIPT_DIR) if args.all else [args.folder]
+    for folder in folders:
+        analyze_folder(folder, tolerance=args.tolerance, deltas=args.deltas, force=args.force)
+
+    print("\n" + "=" * 60)
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+    print("Run create-image-manifest.py to apply the analysis to image-manifest.json")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
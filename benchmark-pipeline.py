@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the 360° Image Viewer asset pipeline and server
+Synthesizes client folders of turntable frames, then times create-light-images.py
+(resize throughput), create-image-manifest.py (cold and warm manifest builds) and
+server.py (simulated viewer sessions, see benchmark-server.py). Results are written as
+JSON and compared against a stored baseline; a regression past the threshold fails.
+
+Usage:
+    python benchmark-pipeline.py --save-baseline          # record benchmark-baseline.json
+    python benchmark-pipeline.py                          # compare against it (exit 1 on regression)
+    python benchmark-pipeline.py --clients 4 --frames 72 --width 10000 --height 5558
+    python benchmark-pipeline.py --output results.json --threshold 0.1
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import math
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import PIL
+    from PIL import Image, ImageDraw
+except ImportError:
+    print("=" * 60)
+    print("ERROR: Pillow (PIL) is required to synthesize frames")
+    print("=" * 60)
+    print("\nPlease install it with:")
+    print("  pip install Pillow")
+    print("=" * 60)
+    sys.exit(1)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BASELINE_FILE = "benchmark-baseline.json"
+RESULTS_VERSION = 1
+DATA_MARKER = ".benchmark-data.json"  # Configuration of the frames synthesized in a --workdir
+DEFAULT_CLIENTS = 2
+DEFAULT_FRAMES = 24
+DEFAULT_WIDTH = 4000
+DEFAULT_HEIGHT = 2250
+DEFAULT_VISITORS = 10
+DEFAULT_THRESHOLD = 0.2  # Relative change that counts as a regression
+LATENCY_SLACK_MS = 2.0  # Latency changes below this are noise, whatever the relative change
+FRAME_QUALITY = 92  # JPEG quality of the synthesized full-res frames
+NOISE_TILE = 256  # Edge of the deterministic noise texture tiled over the backdrop
+VIEWER_FILES = ["index.html", "settings.json", "img"]  # Served with the scripts index.html references
+
+
+def load_script(filename):
+    """Import a sibling script (its dashed name cannot be imported directly)"""
+    spec = importlib.util.spec_from_file_location(filename[:-3].replace('-', '_'), SCRIPT_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+manifest = load_script('create-image-manifest.py')
+load_test = load_script('benchmark-server.py')
+
+
+def noise_texture(rng, size):
+    """Grayscale noise that is the same for a given seed (Image.effect_noise is not)"""
+    return Image.frombytes('L', (size, size), bytes(rng.randrange(256) for _ in range(size * size)))
+
+
+def synthesize_frame(path, index, frames, width, height, seed):
+    """Write one turntable frame: a textured backdrop and a windowed block rotated by index/frames.
+
+    The backdrop is identical across the frames of a client, so frame sizes and
+    frame-to-frame similarity resemble a real render (runs in a worker process).
+    """
+    rng = random.Random(seed)
+    # Smooth noise (upscaled) plus grain (tiled) over a vertical gradient
+    smooth = noise_texture(rng, NOISE_TILE // 8).resize((width, height), Image.Resampling.BICUBIC)
+    grain_tile = noise_texture(rng, NOISE_TILE)
+    grain = Image.new('L', (width, height))
+    for y in range(0, height, NOISE_TILE):
+        for x in range(0, width, NOISE_TILE):
+            grain.paste(grain_tile, (x, y))
+    gradient = Image.linear_gradient('L').resize((width, height))
+    channels = [Image.blend(gradient, smooth, 0.3 + 0.1 * c) for c in range(3)]
+    img = Image.blend(Image.merge('RGB', channels), Image.merge('RGB', [grain] * 3), 0.12)
+
+    # A box of footprint (w, d) turning about the image centre, drawn as its visible side faces
+    draw = ImageDraw.Draw(img)
+    angle = 2 * math.pi * index / frames
+    cx, ground, top = width / 2, height * 0.85, height * 0.25
+    half_w, half_d = width * 0.18, width * 0.1
+    corners = [(-half_w, -half_d), (half_w, -half_d), (half_w, half_d), (-half_w, half_d)]
+    cos_a, sin_a = math.cos(angle), math.sin(angle)
+    projected = [(cx + x * cos_a - z * sin_a, x * sin_a + z * cos_a) for x, z in corners]
+    colors = [tuple(rng.randrange(60, 220) for _ in range(3)) for _ in corners]
+    for i in range(4):
+        (x0, z0), (x1, z1) = projected[i], projected[(i + 1) % 4]
+        if (z0 + z1) / 2 >= 0:
+            continue  # Faces turned away from the camera (the box is centred on the axis)
+        x0, x1 = sorted((x0, x1))
+        shade = 0.6 + 0.4 * (x1 - x0) / (2 * half_w)
+        face = tuple(int(v * shade) for v in colors[i])
+        draw.polygon([(x0, ground), (x1, ground), (x1, top), (x0, top)], fill=face)
+        # A grid of windows gives the faces render-like detail
+        rows, cols = 12, 8
+        for row in range(rows):
+            for col in range(cols):
+                u0, u1 = (col + 0.2) / cols, (col + 0.8) / cols
+                v0, v1 = top + (ground - top) * (row + 0.25) / rows, top + (ground - top) * (row + 0.75) / rows
+                lit = rng.random() < 0.3
+                draw.rectangle([x0 + (x1 - x0) * u0, v0, x0 + (x1 - x0) * u1, v1],
+                               fill=(240, 220, 150) if lit else tuple(v // 3 for v in face))
+    img.save(path, 'JPEG', quality=FRAME_QUALITY)
+    return path.stat().st_size
+
+
+def synthesize(root, clients, frames, width, height, jobs):
+    """Create clients x frames full-res frames under root (reused if already there).
+
+    Returns the client folder names.
+    """
+    names = [f"BENCH{i + 1:03d}" for i in range(clients)]
+    settings = {"clients": clients, "frames": frames, "width": width, "height": height}
+    marker = root / DATA_MARKER
+    if marker.exists() and manifest.load_manifest(marker) == settings:
+        print(f"- Reusing {clients} x {frames} synthesized frames in {root}")
+        return names
+
+    for name in names:
+        shutil.rmtree(root / name, ignore_errors=True)
+        (root / name / "3D-Images").mkdir(parents=True)
+    start = time.perf_counter()
+    total_bytes = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(synthesize_frame, root / name / "3D-Images" / f"{index + 1}.jpg",
+                               index, frames, width, height, client)
+                   for client, name in enumerate(names) for index in range(frames)]
+        for future in futures:
+            total_bytes += future.result()
+    marker.write_text(json.dumps(settings), encoding='utf-8')
+    print(f"✓ Synthesized {clients} x {frames} frames at {width}x{height} "
+          f"({total_bytes / 1e6:.1f}MB) in {time.perf_counter() - start:.1f}s")
+    return names
+
+
+def bench_resize(root, names, formats, jobs):
+    """Time create-light-images.py on every client folder (a subprocess: its pool needs an importable module)"""
+    command = [sys.executable, str(SCRIPT_DIR / 'create-light-images.py'), *(str(root / name) for name in names),
+               '--force']
+    if formats:
+        command += ['--formats', formats]
+    if jobs:
+        command += ['--jobs', str(jobs)]
+    start = time.perf_counter()
+    completed = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0 or 'ERROR' in completed.stdout:
+        print(completed.stdout)
+        raise RuntimeError("create-light-images.py failed")
+    return elapsed
+
+
+def bench_manifests(root, names):
+    """Build every client's manifest from scratch, then again with the frame index warm.
+
+    Returns (cold seconds, warm seconds).
+    """
+    timings = []
+    for warm in (False, True):
+        start = time.perf_counter()
+        for name in names:
+            images_path = root / name / "3D-Images"
+            if not warm:
+                (images_path / manifest.INDEX_FILE).unlink(missing_ok=True)
+            with contextlib.redirect_stdout(io.StringIO()):
+                built = manifest.create_manifest(images_path, f"{name}/")
+                manifest.write_manifest(built, root / name / "image-manifest.json", root, f"{name}/",
+                                        pack=False, quiet=True)
+        timings.append(time.perf_counter() - start)
+    return tuple(timings)
+
+
+def copy_viewer_files(root):
+    """Copy the page, the scripts and styles it references, settings and icons next to the client folders"""
+    index_html = (SCRIPT_DIR / "index.html").read_text(encoding="utf-8")
+    refs = re.findall(r'<(?:script[^>]+src|link[^>]+href)="([^"]+)"', index_html)
+    for ref in VIEWER_FILES + refs:
+        source, target = SCRIPT_DIR / ref, root / ref
+        if source.is_dir():
+            shutil.copytree(source, target, dirs_exist_ok=True)
+        elif source.is_file():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, target)
+
+
+def bench_http(root, names, visitors, connections, workers):
+    """Replay viewer sessions (visitors spread over the clients) against server.py serving root"""
+    copy_viewer_files(root)
+    cwd = os.getcwd()
+    httpd = load_test.start_local_server(workers, root)
+    try:
+        host, port = httpd.server_address[:2]
+        sessions = [load_test.build_session(names[i % len(names)], root) for i in range(visitors)]
+        results, elapsed = load_test.run_load(host, port, sessions, connections)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        os.chdir(cwd)
+    return load_test.summarize(results, elapsed, visitors)
+
+
+def higher_is_better(name):
+    return name.endswith('_per_second')
+
+
+def compare(metrics, baseline, threshold):
+    """(name, baseline, current, relative change, regressed) for every metric of both runs"""
+    rows = []
+    for name, current in metrics.items():
+        if name not in baseline:
+            continue
+        previous = baseline[name]
+        change = (current - previous) / previous if previous else 0.0
+        if higher_is_better(name):
+            regressed = current < previous * (1 - threshold)
+        else:
+            slack = LATENCY_SLACK_MS if name.endswith('_ms') else 0
+            regressed = current > previous * (1 + threshold) + slack
+        rows.append((name, previous, current, change, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the asset pipeline and server on synthesized clients')
+    parser.add_argument('--clients', type=int, default=DEFAULT_CLIENTS,
+                        help=f'Client folders to synthesize (default: {DEFAULT_CLIENTS})')
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES,
+                        help=f'Frames per rotation (default: {DEFAULT_FRAMES})')
+    parser.add_argument('--width', type=int, default=DEFAULT_WIDTH, help=f'Frame width (default: {DEFAULT_WIDTH})')
+    parser.add_argument('--height', type=int, default=DEFAULT_HEIGHT,
+                        help=f'Frame height (default: {DEFAULT_HEIGHT})')
+    parser.add_argument('--formats', default=None,
+                        help='Light formats passed to create-light-images.py (default: its own)')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--visitors', type=int, default=DEFAULT_VISITORS,
+                        help=f'Concurrent simulated viewer sessions (default: {DEFAULT_VISITORS})')
+    parser.add_argument('--connections', type=int, default=load_test.CONNECTIONS_PER_VISITOR,
+                        help=f'Connections per visitor (default: {load_test.CONNECTIONS_PER_VISITOR})')
+    parser.add_argument('--workers', type=int, default=32, help='Worker threads of the server (default: 32)')
+    parser.add_argument('--workdir', default=None,
+                        help='Keep synthesized clients here and reuse them next time (default: a temporary folder)')
+    parser.add_argument('--output', default=None, help='Also write the results JSON to this file')
+    parser.add_argument('--baseline', default=str(SCRIPT_DIR / BASELINE_FILE),
+                        help=f'Baseline to compare against (default: {BASELINE_FILE})')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Relative change that fails the run (default: {DEFAULT_THRESHOLD})')
+    args = parser.parse_args()
+
+    config = {
+        "clients": args.clients, "frames": args.frames, "width": args.width, "height": args.height,
+        "formats": args.formats, "jobs": args.jobs or os.cpu_count() or 1, "visitors": args.visitors,
+        "connections": args.connections, "workers": args.workers,
+    }
+
+    print("=" * 60)
+    print("360° Viewer Pipeline Benchmark")
+    print("=" * 60)
+    print(f"\nClients: {args.clients} x {args.frames} frames at {args.width}x{args.height}")
+    print(f"Sessions: {args.visitors} visitors x {args.connections} connections, {args.workers} server workers\n")
+
+    root = Path(args.workdir).resolve() if args.workdir else Path(tempfile.mkdtemp(prefix='viewer-bench-'))
+    root.mkdir(parents=True, exist_ok=True)
+    try:
+        names = synthesize(root, args.clients, args.frames, args.width, args.height, config["jobs"])
+        frame_count = args.clients * args.frames
+
+        resize_seconds = bench_resize(root, names, args.formats, args.jobs)
+        print(f"✓ Light images: {frame_count} frames in {resize_seconds:.2f}s")
+        cold, warm = bench_manifests(root, names)
+        print(f"✓ Manifests: {cold * 1000:.1f}ms cold, {warm * 1000:.1f}ms warm")
+        summary = bench_http(root, names, args.visitors, args.connections, args.workers)
+        print(f"✓ HTTP: {summary['requests']} requests in {summary['seconds']:.2f}s "
+              f"({summary['requests_per_second']} req/s, {summary['megabytes_per_second']} MB/s)")
+    finally:
+        if not args.workdir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    metrics = {
+        "resize.frames_per_second": round(frame_count / resize_seconds, 3),
+        "resize.megapixels_per_second": round(frame_count * args.width * args.height / 1e6 / resize_seconds, 2),
+        "manifest.cold_ms": round(cold * 1000, 2),
+        "manifest.warm_ms": round(warm * 1000, 2),
+        "http.requests_per_second": summary["requests_per_second"],
+        "http.megabytes_per_second": summary["megabytes_per_second"],
+        "http.errors": summary["errors"],
+    }
+    for asset_class, stats in summary["latency_ms"].items():
+        metrics[f"http.{asset_class}.p50_ms"] = stats["p50"]
+        metrics[f"http.{asset_class}.p95_ms"] = stats["p95"]
+    results = {
+        "version": RESULTS_VERSION,
+        "recorded": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "config": config,
+        "environment": {
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "metrics": metrics,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+
+    print("\n" + "=" * 60)
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+        for name, value in metrics.items():
+            print(f"{name:<36}{value:>12}")
+        print(f"\nBaseline saved to {args.baseline}")
+        print("=" * 60)
+        return 0
+
+    baseline = manifest.load_manifest(Path(args.baseline))
+    if baseline is None:
+        print(json.dumps(results, indent=2))
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        print("=" * 60)
+        return 0
+    if baseline.get("version") != RESULTS_VERSION or baseline.get("config") != config:
+        print(f"✗ The baseline was recorded with a different configuration: {baseline.get('config')}")
+        print("  Rerun with the same options or record a new baseline with --save-baseline")
+        print("=" * 60)
+        return 2
+
+    rows = compare(metrics, baseline["metrics"], args.threshold)
+    print(f"{'metric':<36}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, previous, current, change, regressed in rows:
+        print(f"{name:<36}{previous:>12}{current:>12}{change * 100:>+9.1f}%{'  ✗' if regressed else ''}")
+    regressions = [row[0] for row in rows if row[4]]
+    print()
+    if regressions:
+        print(f"✗ {len(regressions)} metric(s) regressed by more than {args.threshold * 100:.0f}%: "
+              f"{', '.join(regressions)}")
+    else:
+        print(f"✓ No regression beyond {args.threshold * 100:.0f}% against {args.baseline}")
+    print("=" * 60)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Load-test benchmark for the 360° Image Viewer server
+Replays full viewer sessions (page, scripts, manifest, light + full frames, GLB)
+against a client folder and reports latency percentiles and throughput
+
+Usage:
+    python benchmark-server.py                       # starts server.py in-process
+    python benchmark-server.py --visitors 20 --client CLT695425
+    python benchmark-server.py --url http://localhost:8080 --no-full
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_CLIENT = "CLT695425"
+CONNECTIONS_PER_VISITOR = 6  # Browsers open ~6 parallel connections per host
+
+
+def load_script(filename):
+    """Import a sibling script (its dashed name cannot be imported directly)"""
+    spec = importlib.util.spec_from_file_location(filename[:-3].replace('-', '_'), SCRIPT_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Frames are requested in the order of the manifest script's spiral_order, as viewer.js does
+spiral_order = load_script('create-image-manifest.py').spiral_order
+
+
+def build_session(client, root=SCRIPT_DIR):
+    """Build the ordered list of (asset_class, path) a viewer session requests"""
+    session = [("page", f"/index.html?clientID={client}")]
+
+    index_html = (root / "index.html").read_text(encoding="utf-8")
+    for ref in re.findall(r'<(?:script[^>]+src|link[^>]+href)="([^"]+)"', index_html):
+        asset_class = "script" if ref.endswith(".js") else "static"
+        session.append((asset_class, "/" + ref))
+    session.append(("json", "/settings.json"))
+    session.append(("manifest", f"/{client}/image-manifest.json"))
+
+    manifest_path = root / client / "image-manifest.json"
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    light = manifest.get("light", [])
+    full = manifest.get("full", [])
+    # Priority 1 + 2 of progressivePreload(): spiral around frame 0, then the rest
+    for index in spiral_order(0, len(light)):
+        session.append(("light", "/" + light[index]))
+    # The 3D overlay loads its model while the frames stream in
+    for glb in sorted((root / client / "3D").glob("*.glb")):
+        session.append(("glb", f"/{client}/3D/{glb.name}"))
+    # Priority 3: full-res frames
+    for index in spiral_order(0, len(full)):
+        session.append(("full", "/" + full[index]))
+    return session
+
+
+class Results:
+    """Thread-safe collector of per-request samples"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.bytes = 0
+        self.errors = 0
+        self.statuses = defaultdict(int)
+
+    def add(self, asset_class, latency, size, status):
+        with self.lock:
+            self.latencies[asset_class].append(latency)
+            self.bytes += size
+            self.statuses[status] += 1
+            if status >= 400:
+                self.errors += 1
+
+
+def run_visitor(host, port, session, connections, results):
+    """Replay one session over a small pool of keep-alive connections"""
+    queue = list(session)
+    queue_lock = threading.Lock()
+
+    def worker():
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        try:
+            while True:
+                with queue_lock:
+                    if not queue:
+                        return
+                    asset_class, path = queue.pop(0)
+                start = time.perf_counter()
+                try:
+                    conn.request("GET", quote(path, safe="/?=&"))
+                    response = conn.getresponse()
+                    size = len(response.read())
+                    status = response.status
+                except (OSError, http.client.HTTPException):
+                    conn.close()
+                    conn = http.client.HTTPConnection(host, port, timeout=30)
+                    size, status = 0, 599
+                results.add(asset_class, time.perf_counter() - start, size, status)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(connections)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def start_local_server(workers, root=SCRIPT_DIR):
+    """Start server.py's threaded server on an ephemeral port in this process, serving root"""
+    import os
+    import sys
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import server
+
+    os.chdir(root)
+    httpd = server.ThreadPoolHTTPServer(("127.0.0.1", 0), server.MyHTTPRequestHandler,
+                                        max_workers=workers, log_latency=False)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    return httpd
+
+
+def run_load(host, port, sessions, connections):
+    """Replay one session per visitor at once; returns (Results, elapsed seconds)"""
+    results = Results()
+    started = time.perf_counter()
+    visitors = [threading.Thread(target=run_visitor, args=(host, port, session, connections, results))
+                for session in sessions]
+    for v in visitors:
+        v.start()
+    for v in visitors:
+        v.join()
+    return results, time.perf_counter() - started
+
+
+def summarize(results, elapsed, visitors):
+    """Machine-readable summary of a load test"""
+    total_requests = sum(len(v) for v in results.latencies.values())
+    return {
+        "visitors": visitors,
+        "requests": total_requests,
+        "errors": results.errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(total_requests / elapsed, 1) if elapsed else 0,
+        "megabytes": round(results.bytes / 1e6, 2),
+        "megabytes_per_second": round(results.bytes / 1e6 / elapsed, 2) if elapsed else 0,
+        "latency_ms": {
+            asset_class: {
+                "count": len(values),
+                "p50": round(percentile(values, 50) * 1000, 1),
+                "p95": round(percentile(values, 95) * 1000, 1),
+                "p99": round(percentile(values, 99) * 1000, 1),
+            }
+            for asset_class, values in sorted(results.latencies.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the 360° viewer server")
+    parser.add_argument("--url", help="Server to test (default: start server.py in-process)")
+    parser.add_argument("--client", default=DEFAULT_CLIENT, help=f"Client folder (default: {DEFAULT_CLIENT})")
+    parser.add_argument("--visitors", type=int, default=10, help="Concurrent visitors (default: 10)")
+    parser.add_argument("--connections", type=int, default=CONNECTIONS_PER_VISITOR,
+                        help=f"Connections per visitor (default: {CONNECTIONS_PER_VISITOR})")
+    parser.add_argument("--workers", type=int, default=32, help="Worker threads for the in-process server")
+    parser.add_argument("--no-full", action="store_true", help="Skip full-res frames")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    session = build_session(args.client)
+    if args.no_full:
+        session = [item for item in session if item[0] != "full"]
+
+    httpd = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        httpd = start_local_server(args.workers)
+        host, port = httpd.server_address[:2]
+
+    if not args.json:
+        print("=" * 60)
+        print("360° Viewer Server Load Test")
+        print("=" * 60)
+        print(f"\nTarget: http://{host}:{port}/")
+        print(f"Client folder: {args.client}/")
+        print(f"Requests per session: {len(session)}")
+        print(f"Visitors: {args.visitors} x {args.connections} connections")
+        print("\nRunning...\n")
+
+    results, elapsed = run_load(host, port, [session] * args.visitors, args.connections)
+
+    if httpd is not None:
+        httpd.shutdown()
+        httpd.server_close()
+
+    summary = summarize(results, elapsed, args.visitors)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"{'class':<10}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for asset_class, stats in summary["latency_ms"].items():
+        print(f"{asset_class:<10}{stats['count']:>8}{stats['p50']:>10}{stats['p95']:>10}{stats['p99']:>10}")
+    print("\n" + "=" * 60)
+    print(f"Requests: {summary['requests']} in {elapsed:.2f}s ({summary['requests_per_second']} req/s)")
+    print(f"Transferred: {summary['megabytes']} MB ({summary['megabytes_per_second']} MB/s)")
+    if results.errors:
+        print(f"Errors: {results.errors}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
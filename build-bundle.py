@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Build minified, content-hashed bundles of the viewer's scripts and stylesheet
+Reads index.html and concatenates each run of local <script src> tags (in page order)
+into one bundle, strips debug logging (console.log/console.debug) and comments and
+whitespace with a tokenizer that understands strings, template literals and regular
+expressions, and minifies the stylesheets. The bundles are written as name.<hash>.js /
+name.<hash>.css with a rewritten index.html to a separate folder; sources are never modified.
+
+Usage:
+    python build-bundle.py               # writes ./dist
+    python build-bundle.py --out public  # another output folder
+    python build-bundle.py --keep-logs   # keep console.log/console.debug calls
+
+Open the built page through server.py at /dist/?clientID=CLT695425. server.py caches
+the hashed names as immutable; precompress-assets.py can precompress them.
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PAGE = "index.html"
+OUTPUT_DIR = "dist"
+HASH_LENGTH = 10  # Hex characters of the content hash in bundle names
+DEBUG_CALLS = {'log', 'debug'}  # console.<name>(...) calls removed; warn/error are kept
+BUNDLE_NAME_RE = re.compile(r'^(?:head|app(?:-\d+)?|style(?:-\d+)?)\.[0-9a-f]{%d}\.(?:js|css)(?:\.gz|\.br)?$' % HASH_LENGTH)
+
+# Longest first, so that e.g. ">>>=" is one token
+PUNCTUATORS = sorted([
+    '>>>=', '...', '===', '!==', '**=', '<<=', '>>=', '>>>', '&&=', '||=', '??=',
+    '=>', '==', '!=', '<=', '>=', '&&', '||', '??', '?.', '++', '--', '+=', '-=', '*=',
+    '/=', '%=', '&=', '|=', '^=', '<<', '>>', '**',
+], key=len, reverse=True)
+# A "/" after these words starts a regular expression, not a division
+REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw',
+                  'case', 'do', 'else', 'yield', 'await'}
+# A line break after these characters can never end a statement (no ASI), so it can go
+NO_ASI_AFTER = set('{;,([:=')
+NO_ASI_BEFORE = set('});],.:')
+IDENTIFIER_RE = re.compile(r'[A-Za-z_$\u0080-\U0010ffff][\w$\u0080-\U0010ffff]*')
+NUMBER_RE = re.compile(r'0[xXbBoO][\da-fA-F_]+n?|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d[\d_]*)?n?')
+SPACE_RE = re.compile(r'\s+')
+KEEP_COMMENT_RE = re.compile(r'^/\*!|@license|@preserve')
+
+CSS_TOKEN_RE = re.compile(r'/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|\s+|[^"\'/\s]+|/', re.DOTALL)
+CSS_URL_RE = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+SCRIPT_TAG_RE = re.compile(r'<script\s+src="([^"]+)"\s*>\s*</script>')
+STYLESHEET_TAG_RE = re.compile(r'<link\s+rel="stylesheet"\s+href="([^"]+)"\s*/?>')
+GAP_RE = re.compile(r'^(?:\s|<!--.*?-->)*$', re.DOTALL)
+
+
+class ParseError(ValueError):
+    pass
+
+
+def tokenize(source, name, start=0, nested=False):
+    """Split JavaScript into (kind, text) tokens.
+
+    Kinds: space, comment, string, template, regex, number, word, punct.
+    With ``nested`` the scan stops at the "}" closing a template
+    substitution and returns (tokens, index of that "}").
+    """
+    tokens = []
+    depth = 0
+    i = start
+    length = len(source)
+
+    def fail(message, at):
+        line = source.count('\n', 0, at) + 1
+        raise ParseError(f"{name}:{line}: {message}")
+
+    def previous():
+        for kind, text in reversed(tokens):
+            if kind not in ('space', 'comment'):
+                return kind, text
+        return None, None
+
+    while i < length:
+        char = source[i]
+        if char.isspace():
+            match = SPACE_RE.match(source, i)
+            tokens.append(('space', match.group()))
+            i = match.end()
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            end = length if end < 0 else end
+            tokens.append(('comment', source[i:end]))
+            i = end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            if end < 0:
+                fail("unterminated comment", i)
+            tokens.append(('comment', source[i:end + 2]))
+            i = end + 2
+        elif char in '"\'':
+            j = i + 1
+            while j < length and source[j] != char:
+                if source[j] == '\\':
+                    j += 1
+                elif source[j] == '\n':
+                    fail("unterminated string", i)
+                j += 1
+            if j >= length:
+                fail("unterminated string", i)
+            tokens.append(('string', source[i:j + 1]))
+            i = j + 1
+        elif char == '`':
+            j = i + 1
+            while True:
+                if j >= length:
+                    fail("unterminated template literal", i)
+                if source[j] == '\\':
+                    j += 2
+                elif source[j] == '`':
+                    break
+                elif source.startswith('${', j):
+                    # Substitutions are code: skip to their closing brace
+                    _, j = tokenize(source, name, j + 2, nested=True)
+                    j += 1
+                else:
+                    j += 1
+            tokens.append(('template', source[i:j + 1]))
+            i = j + 1
+        elif char == '/' and is_regex_start(*previous()):
+            j = i + 1
+            in_class = False
+            while True:
+                if j >= length or source[j] == '\n':
+                    fail("unterminated regular expression", i)
+                if source[j] == '\\':
+                    j += 1
+                elif source[j] == '[':
+                    in_class = True
+                elif source[j] == ']':
+                    in_class = False
+                elif source[j] == '/' and not in_class:
+                    break
+                j += 1
+            flags = IDENTIFIER_RE.match(source, j + 1)
+            end = flags.end() if flags else j + 1
+            tokens.append(('regex', source[i:end]))
+            i = end
+        elif char.isdigit() or (char == '.' and source[i + 1:i + 2].isdigit()):
+            match = NUMBER_RE.match(source, i)
+            tokens.append(('number', match.group()))
+            i = match.end()
+        elif IDENTIFIER_RE.match(source, i):
+            match = IDENTIFIER_RE.match(source, i)
+            tokens.append(('word', match.group()))
+            i = match.end()
+        else:
+            text = next((p for p in PUNCTUATORS if source.startswith(p, i)), char)
+            if text in '{([':
+                depth += 1
+            elif text in '})]':
+                if nested and text == '}' and depth == 0:
+                    return tokens, i
+                depth -= 1
+            tokens.append(('punct', text))
+            i += len(text)
+
+    if nested:
+        fail("unterminated template substitution", start)
+    return tokens
+
+
+def is_regex_start(kind, text):
+    """Whether a "/" after the previous significant token starts a regular expression"""
+    if kind is None:
+        return True
+    if kind == 'punct':
+        return text not in (')', ']', '}', '++', '--')
+    if kind == 'word':
+        return text in REGEX_KEYWORDS
+    return False
+
+
+def significant(tokens):
+    """Indices of the tokens that are not whitespace or comments"""
+    return [i for i, (kind, _) in enumerate(tokens) if kind not in ('space', 'comment')]
+
+
+def strip_debug_calls(tokens):
+    """Remove console.log/console.debug calls; returns (tokens, number removed).
+
+    A call that is a whole statement is dropped with its semicolon; anywhere
+    else (``x && console.log(y)``, an arrow body, ``if (a) console.log(b)``) it
+    becomes ``void 0`` so the surrounding code keeps its shape.
+    """
+    result = list(tokens)
+    removed = 0
+    index = significant(result)
+    position = 0
+    while position + 3 < len(index):
+        i = index[position]
+        words = [result[index[position + k]] for k in range(4)]
+        before = result[index[position - 1]][1] if position > 0 else None
+        if not (words[0] == ('word', 'console') and words[1] == ('punct', '.')
+                and words[2][0] == 'word' and words[2][1] in DEBUG_CALLS and words[3] == ('punct', '(')
+                and before not in ('.', '?.')):
+            position += 1
+            continue
+        # Matching ")" of the call
+        depth = 0
+        close = None
+        for k in range(position + 3, len(index)):
+            text = result[index[k]][1] if result[index[k]][0] == 'punct' else None
+            if text in ('(', '[', '{'):
+                depth += 1
+            elif text in (')', ']', '}'):
+                depth -= 1
+                if depth == 0:
+                    close = k
+                    break
+        if close is None:
+            position += 1
+            continue
+        after = result[index[close + 1]] if close + 1 < len(index) else None
+        statement = before in (None, ';', '{', '}') and (after is None or after[1] in (';', '}')
+                                                          or '\n' in ''.join(text for _, text in result[index[close]:index[close + 1]]))
+        end = index[close]
+        if statement and after == ('punct', ';'):
+            end = index[close + 1]
+        replacement = [] if statement else [('word', 'void'), ('space', ' '), ('number', '0')]
+        result[i:end + 1] = replacement
+        removed += 1
+        index = significant(result)
+        position = max(0, position - 1)
+    return result, removed
+
+
+def needs_space(prev, token):
+    """Whether two tokens would run together (or form another token) without a space"""
+    (prev_kind, prev_text), (kind, text) = prev, token
+    if prev_kind in ('word', 'number') and kind in ('word', 'number'):
+        return True
+    if prev_kind == 'number' and text.startswith('.') and re.fullmatch(r'\d[\d_]*', prev_text):
+        return True
+    if prev_text[-1] == '/' and text[0] in '/*':
+        return True
+    if prev_kind == 'punct' and kind == 'punct':
+        joined = prev_text + text[0]
+        return any(p.startswith(joined) for p in PUNCTUATORS)
+    return False
+
+
+def emit(tokens):
+    """Join tokens with the least whitespace that keeps the code's meaning"""
+    out = []
+    prev = None
+    pending = None  # '\n' or ' ' removed between prev and the next token
+    for kind, text in tokens:
+        if kind == 'space' or (kind == 'comment' and not KEEP_COMMENT_RE.search(text)):
+            if '\n' in text or text.startswith('//'):
+                pending = '\n'
+            elif pending is None:
+                pending = ' '
+            continue
+        if kind == 'comment':
+            # Licence comments stay, on their own line
+            out.append(('\n' if out else '') + text + '\n')
+            prev, pending = None, None
+            continue
+        if prev is not None:
+            if pending == '\n' and prev[1][-1] not in NO_ASI_AFTER and text[0] not in NO_ASI_BEFORE:
+                out.append('\n')
+            elif needs_space(prev, (kind, text)):
+                out.append(' ')
+        out.append(text)
+        prev, pending = (kind, text), None
+    return ''.join(out)
+
+
+def minify_js(source, name, keep_logs=False):
+    """Minified source and the number of debug calls removed"""
+    tokens = tokenize(source, name)
+    removed = 0
+    if not keep_logs:
+        tokens, removed = strip_debug_calls(tokens)
+    minified = emit(tokens)
+    # Every token must survive unchanged; anything else is a bug here, not in the source
+    expected = [tokens[i] for i in significant(tokens)]
+    output = tokenize(minified, name)
+    if [output[i] for i in significant(output)] != expected:
+        raise ParseError(f"{name}: minified code does not tokenize like the source")
+    return minified, removed
+
+
+def minify_css(source, rebase):
+    """Minified stylesheet with relative url()s passed through rebase"""
+    out = []
+    for token in CSS_TOKEN_RE.findall(source):
+        if token.startswith('/*'):
+            continue
+        if token.isspace():
+            if out and out[-1] != ' ':
+                out.append(' ')
+            continue
+        out.append(token)
+    css = ''.join(out)
+    css = re.sub(r' ?([{};,>]) ?', r'\1', css)
+    css = re.sub(r': ', ':', css)
+    css = css.replace(';}', '}').strip()
+    return CSS_URL_RE.sub(lambda m: f'url({m.group(1)}{rebase(m.group(2))}{m.group(1)})', css)
+
+
+def is_local(url):
+    return not re.match(r'^(?:[a-z]+:|//|/|#)', url, re.IGNORECASE)
+
+
+def content_name(stem, data, ext):
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}.{ext}"
+
+
+def check_with_node(path):
+    """Syntax-check a bundle with node if it is installed; returns an error message or None"""
+    node = shutil.which('node')
+    if node is None:
+        return None
+    result = subprocess.run([node, '--check', str(path)], capture_output=True, text=True)
+    return result.stderr.strip() or 'node --check failed' if result.returncode else None
+
+
+def build(root, out_dir, keep_logs=False):
+    """Write the bundles and index.html to out_dir; returns the number of errors"""
+    page = (root / PAGE).read_text(encoding='utf-8')
+    out_dir.mkdir(parents=True, exist_ok=True)
+    prefix = os.path.relpath(out_dir, root).replace(os.sep, '/')
+    base_href = os.path.relpath(root, out_dir).replace(os.sep, '/') + '/'
+    written = set()
+    errors = 0
+
+    def write(name, data):
+        temp = out_dir / (name + '.tmp')
+        temp.write_bytes(data)
+        os.replace(temp, out_dir / name)
+        written.add(name)
+
+    # Runs of local scripts with nothing but whitespace or comments between them
+    runs = []
+    for match in SCRIPT_TAG_RE.finditer(page):
+        if not is_local(match.group(1)):
+            continue
+        if runs and runs[-1][-1].end() <= match.start() and GAP_RE.match(page[runs[-1][-1].end():match.start()]):
+            runs[-1].append(match)
+        else:
+            runs.append([match])
+
+    replacements = []  # (start, end, new text)
+    body_start = page.find('<body')
+    app_runs = 0
+    for run in runs:
+        if run[0].start() < body_start:
+            stem = 'head'
+        else:
+            app_runs += 1
+            stem = 'app' if app_runs == 1 else f'app-{app_runs}'
+        parts = []
+        source_bytes = removed = 0
+        try:
+            for match in run:
+                source = (root / match.group(1)).read_text(encoding='utf-8')
+                source_bytes += len(source.encode('utf-8'))
+                minified, count = minify_js(source, match.group(1), keep_logs)
+                removed += count
+                parts.append(minified)
+        except (OSError, ParseError) as e:
+            print(f"✗ {stem}: {e}")
+            errors += 1
+            continue
+        # ";" between files keeps one file's last statement from running into the next
+        data = ';\n'.join(parts).encode('utf-8') + b'\n'
+        name = content_name(stem, data, 'js')
+        write(name, data)
+        problem = check_with_node(out_dir / name)
+        if problem:
+            print(f"✗ {name}: {problem}")
+            errors += 1
+            continue
+        print(f"✓ {name}: {len(run)} script(s), {source_bytes / 1024:.1f}KB → {len(data) / 1024:.1f}KB "
+              f"({len(gzip.compress(data)) / 1024:.1f}KB gzipped), {removed} debug call(s) removed")
+        replacements.append((run[0].start(), run[0].end(), f'<script src="{prefix}/{name}"></script>'))
+        for match in run[1:]:
+            # Drop the tag with the indentation and line break before it
+            start = page.rfind('\n', 0, match.start())
+            replacements.append((start if start >= run[0].end() else match.start(), match.end(), ''))
+
+    for index, match in enumerate(m for m in STYLESHEET_TAG_RE.finditer(page) if is_local(m.group(1))):
+        href = match.group(1)
+        source_dir = (root / href).parent
+
+        def rebase(url):
+            if not is_local(url) or url.startswith('data:'):
+                return url
+            return os.path.relpath(source_dir / url, out_dir).replace(os.sep, '/')
+
+        try:
+            source = (root / href).read_text(encoding='utf-8')
+        except OSError as e:
+            print(f"✗ {href}: {e}")
+            errors += 1
+            continue
+        data = minify_css(source, rebase).encode('utf-8')
+        name = content_name('style' if index == 0 else f'style-{index + 1}', data, 'css')
+        write(name, data)
+        print(f"✓ {name}: {len(source.encode('utf-8')) / 1024:.1f}KB → {len(data) / 1024:.1f}KB "
+              f"({len(gzip.compress(data)) / 1024:.1f}KB gzipped)")
+        replacements.append((match.start(), match.end(), f'<link rel="stylesheet" href="{prefix}/{name}">'))
+
+    if errors:
+        return errors
+
+    for start, end, text in sorted(replacements, reverse=True):
+        page = page[:start] + text + page[end:]
+    # Every other relative URL (images, settings, client folders) still points at the sources
+    page = re.sub(r'<head>', f'<head>\n    <base href="{base_href}">', page, count=1)
+    write(PAGE, page.encode('utf-8'))
+    print(f"✓ {PAGE}: {len(replacements)} tag(s) rewritten")
+
+    # Bundles of earlier builds
+    for item in out_dir.iterdir():
+        if BUNDLE_NAME_RE.match(item.name) and re.sub(r'\.(?:gz|br)$', '', item.name) not in written:
+            item.unlink()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build minified, content-hashed script and style bundles')
+    parser.add_argument('--out', default=OUTPUT_DIR, help=f'Output folder (default: {OUTPUT_DIR})')
+    parser.add_argument('--keep-logs', action='store_true', help='Keep console.log/console.debug calls')
+    args = parser.parse_args()
+
+    out_dir = (SCRIPT_DIR / args.out).resolve()
+    if out_dir == SCRIPT_DIR:
+        print("The output folder must not be the source folder")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("Building Bundles for 360° Viewer")
+    print("=" * 60)
+    print()
+
+    start = time.perf_counter()
+    errors = build(SCRIPT_DIR, out_dir, keep_logs=args.keep_logs)
+
+    print("\n" + "=" * 60)
+    if errors:
+        print(f"FAILED: {errors} error(s), nothing written to {PAGE}")
+        print("=" * 60)
+        sys.exit(1)
+    print(f"Done in {time.perf_counter() - start:.1f}s → {out_dir}")
+    print(f"Open /{os.path.relpath(out_dir, SCRIPT_DIR).replace(os.sep, '/')}/?clientID=... through server.py")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Object-ID Hit Maps for 360° Product Viewer
+Rasterizes the unit meshes of a client's 3D model from the camera of every frame and
+writes one object-ID map per frame, so viewer3d.js finds the object under the cursor
+with a pixel lookup instead of raycasting every mesh on each pointer move
+
+Usage:
+    python create-hit-maps.py                 # every client folder
+    python create-hit-maps.py CLT695425       # one client folder
+    python create-hit-maps.py --width 1280    # finer maps
+    python create-hit-maps.py --force         # rebuild maps that are up to date
+
+Maps are written to 3D-Images/hitmaps/<frame>.png with an index.json describing them.
+Each pixel stores an object ID (red = low byte, green = high byte, 0 = no object);
+IDs are listed in index.json as [node index, primitive index, node name].
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import math
+import os
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    print("=" * 60)
+    print("ERROR: NumPy is not installed")
+    print("=" * 60)
+    print("\nPlease install NumPy:")
+    print("  pip install numpy")
+    print("\nThen run this script again.")
+    sys.exit(1)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+MODELS_DIR = "3D"
+HIT_MAPS_DIR = "hitmaps"  # Inside 3D-Images/
+HIT_MAP_INDEX = "index.json"
+HIT_MAP_WIDTH = 960  # Map width in pixels; the height follows the camera aspect ratio
+HIT_MAP_VERSION = "hitmaps/1"  # Change it to rebuild every map
+MAX_OBJECTS = 65535  # IDs are stored in two 8-bit channels
+
+
+def load_script(filename):
+    """Import a sibling script (its dashed name cannot be imported directly)"""
+    spec = importlib.util.spec_from_file_location(filename[:-3].replace('-', '_'), SCRIPT_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+glb = load_script('optimize-glb.py')
+manifest = load_script('create-image-manifest.py')
+
+
+# ============================================
+# SCENE
+# ============================================
+
+def to_numpy(matrix):
+    """Column-major 4x4 list (glTF order) as a row-major NumPy matrix"""
+    return np.array(matrix, dtype=np.float64).reshape(4, 4).T
+
+
+def load_scene(model_path):
+    """Return (objects, triangles, triangle IDs, cameras) of a GLB in world space.
+
+    objects are [node index, primitive index, node name] with ID = position + 1;
+    cameras are (world matrix, yfov, aspect ratio, znear) in glTF cameras order,
+    the order viewer3d.js switches through them.
+    """
+    gltf, binary = glb.read_glb(model_path)
+    glb.check_supported(gltf)
+    matrices = glb.world_matrices(gltf)
+    nodes = gltf.get('nodes', [])
+    decoded = {}
+
+    def accessor(index):
+        if index not in decoded:
+            decoded[index] = glb.decode_accessor(gltf, binary, gltf['accessors'][index])
+        return decoded[index]
+
+    objects = []
+    triangles = []
+    ids = []
+    for node_index in sorted(matrices):
+        node = nodes[node_index]
+        if 'mesh' not in node:
+            continue
+        matrix = to_numpy(matrices[node_index])
+        for primitive_index, primitive in enumerate(gltf['meshes'][node['mesh']]['primitives']):
+            if primitive.get('mode', 4) != 4 or 'POSITION' not in primitive['attributes']:
+                continue  # Only triangle lists are pickable
+            positions = np.array(accessor(primitive['attributes']['POSITION']).floats()).reshape(-1, 3)
+            world = positions @ matrix[:3, :3].T + matrix[:3, 3]
+            if 'indices' in primitive:
+                indices = np.array(accessor(primitive['indices']).values, dtype=np.int64)
+            else:
+                indices = np.arange(len(world))
+            indices = indices[:len(indices) // 3 * 3].reshape(-1, 3)
+            objects.append([node_index, primitive_index, node.get('name', '')])
+            triangles.append(world[indices])
+            ids.append(np.full(len(indices), len(objects), dtype=np.uint16))
+    if len(objects) > MAX_OBJECTS:
+        raise ValueError(f"{len(objects)} objects, at most {MAX_OBJECTS} fit in a hit map")
+
+    cameras = []
+    for camera_index, camera in enumerate(gltf.get('cameras', [])):
+        owner = next((i for i in sorted(matrices) if nodes[i].get('camera') == camera_index), None)
+        matrix = to_numpy(matrices[owner]) if owner is not None else np.identity(4)
+        perspective = camera.get('perspective')
+        if camera.get('type') != 'perspective' or not perspective:
+            cameras.append(None)  # Orthographic cameras are not rendered by the viewer's frames
+            continue
+        cameras.append((matrix, perspective['yfov'], perspective.get('aspectRatio'),
+                        perspective.get('znear', 0.1)))
+
+    if triangles:
+        triangles = np.concatenate(triangles)
+        ids = np.concatenate(ids)
+    else:
+        triangles = np.zeros((0, 3, 3))
+        ids = np.zeros(0, dtype=np.uint16)
+    return objects, triangles, ids, cameras
+
+
+def camera_for_frame(frame_index, camera_count):
+    """Camera shown with a frame, the same mapping as viewer3d.js syncWithImageIndex()"""
+    if camera_count == 90:
+        return frame_index
+    # Math.round() rounds halves up
+    return int(math.floor(frame_index / 89 * (camera_count - 1) + 0.5))
+
+
+def frame_names(images_path):
+    """Frame base names in viewer order (full-size and light frames, as in the manifest)"""
+    names = {manifest.get_base_name(name) for name in manifest.scan_images(images_path)}
+    names |= {manifest.get_base_name(name) for name in manifest.scan_images(images_path / 'light')}
+    return sorted(names, key=manifest.natural_sort_key)
+
+
+# ============================================
+# RASTERIZATION
+# ============================================
+
+def rasterize(triangles, ids, camera, width, height):
+    """Object ID of the nearest surface at every pixel center (0 = background)"""
+    matrix, yfov, _, znear = camera
+    view = np.linalg.inv(matrix)
+    points = triangles.reshape(-1, 3) @ view[:3, :3].T + view[:3, 3]
+    points = points.reshape(-1, 3, 3)
+    depth = -points[..., 2]  # Cameras look down -Z
+
+    # The frames' cameras sit outside the model, so triangles reaching behind the
+    # near plane are dropped instead of clipped
+    keep = (depth > znear).all(axis=1)
+    points, depth, ids = points[keep], depth[keep], ids[keep]
+
+    focal = 1 / math.tan(yfov / 2)
+    aspect = width / height
+    screen_x = (points[..., 0] / depth * focal / aspect + 1) * 0.5 * width
+    screen_y = (1 - points[..., 1] / depth * focal) * 0.5 * height
+    inverse_depth = 1 / depth  # Interpolates linearly in screen space
+
+    # Bounding boxes of the pixel centers each triangle may cover
+    x_min = np.maximum(np.ceil(screen_x.min(axis=1) - 0.5), 0).astype(np.int64)
+    x_max = np.minimum(np.floor(screen_x.max(axis=1) - 0.5), width - 1).astype(np.int64)
+    y_min = np.maximum(np.ceil(screen_y.min(axis=1) - 0.5), 0).astype(np.int64)
+    y_max = np.minimum(np.floor(screen_y.max(axis=1) - 0.5), height - 1).astype(np.int64)
+
+    id_map = np.zeros((height, width), dtype=np.uint16)
+    depth_map = np.zeros((height, width))  # Inverse depth, 0 = infinitely far
+    for t in np.flatnonzero((x_min <= x_max) & (y_min <= y_max)):
+        (ax, bx, cx), (ay, by, cy) = screen_x[t], screen_y[t]
+        area = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+        if abs(area) < 1e-12:
+            continue
+        xs = np.arange(x_min[t], x_max[t] + 1) + 0.5
+        ys = np.arange(y_min[t], y_max[t] + 1)[:, None] + 0.5
+        # Barycentric weights from edge functions; both windings are drawn
+        w0 = ((cx - bx) * (ys - by) - (cy - by) * (xs - bx)) / area
+        w1 = ((ax - cx) * (ys - cy) - (ay - cy) * (xs - cx)) / area
+        w2 = 1 - w0 - w1
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+        if not inside.any():
+            continue
+        z = w0 * inverse_depth[t, 0] + w1 * inverse_depth[t, 1] + w2 * inverse_depth[t, 2]
+        region = (slice(y_min[t], y_max[t] + 1), slice(x_min[t], x_max[t] + 1))
+        nearer = inside & (z > depth_map[region])
+        depth_map[region][nearer] = z[nearer]
+        id_map[region][nearer] = ids[t]
+    return id_map
+
+
+def encode_png(id_map):
+    """8-bit RGB PNG of an ID map (red = low byte, green = high byte), without color chunks
+    so browsers decode the exact values"""
+    height, width = id_map.shape
+    rgb = np.zeros((height, width, 3), dtype=np.uint8)
+    rgb[..., 0] = id_map & 0xFF
+    rgb[..., 1] = id_map >> 8
+    # Filter type 0 on every row; the flat ID regions compress well as they are
+    rows = np.concatenate([np.zeros((height, 1), dtype=np.uint8), rgb.reshape(height, -1)], axis=1)
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows.tobytes(), 9))
+            + chunk(b'IEND', b''))
+
+
+def write_atomic(path, data):
+    """Write bytes through a temporary file so the server never sends a partial map"""
+    temp = path.with_name(path.name + '.tmp')
+    temp.write_bytes(data)
+    os.replace(temp, path)
+
+
+def render_hit_map(triangles, ids, camera, width, height, output):
+    """Rasterize and write one frame's map, returns (coverage fraction, bytes)"""
+    id_map = rasterize(triangles, ids, camera, width, height)
+    data = encode_png(id_map)
+    write_atomic(output, data)
+    return float(np.count_nonzero(id_map)) / id_map.size, len(data)
+
+
+# ============================================
+# FOLDERS
+# ============================================
+
+def hit_map_version(model_path, frames, width):
+    """Identity of a set of maps: model content, frame list and settings"""
+    digest = hashlib.sha256(HIT_MAP_VERSION.encode())
+    digest.update(manifest.file_hash(model_path).encode())
+    digest.update(json.dumps([frames, width]).encode())
+    return digest.hexdigest()[:manifest.HASH_LENGTH]
+
+
+def find_model(folder):
+    """The GLB viewer3d.js loads from a client folder (the first one in 3D/)"""
+    models = sorted((folder / MODELS_DIR).glob('*.glb'))
+    return models[0] if models else None
+
+
+def create_hit_maps(folder, width=HIT_MAP_WIDTH, force=False, jobs=None):
+    """Write the hit maps of one client folder. Returns (maps written, skipped, errors)."""
+    images_path = folder / '3D-Images'
+    output_path = images_path / HIT_MAPS_DIR
+    model = find_model(folder)
+    if model is None or not images_path.is_dir():
+        print(f"Warning: {folder} has no 3D model or 3D-Images folder, skipping...")
+        return 0, 0, 0
+
+    frames = frame_names(images_path)
+    version = hit_map_version(model, frames, width)
+    index_path = output_path / HIT_MAP_INDEX
+    if not force and index_path.exists():
+        try:
+            current = json.loads(index_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            current = {}
+        if current.get('version') == version and all(
+                (output_path / f"{frame}.png").exists() for frame in current.get('frames', [])):
+            print(f"- {folder}: up to date ({len(current['frames'])} maps)")
+            return 0, len(current['frames']), 0
+
+    try:
+        objects, triangles, ids, cameras = load_scene(model)
+    except (OSError, ValueError, KeyError, IndexError) as e:
+        print(f"✗ {model}: {e}")
+        return 0, 0, 1
+    if not cameras:
+        print(f"✗ {model}: no cameras to render from")
+        return 0, 0, 1
+
+    aspect = next((camera[2] for camera in cameras if camera and camera[2]), 16 / 9)
+    height = max(1, round(width / aspect))
+    print(f"{folder}: {len(objects)} objects, {len(triangles)} triangles, "
+          f"{len(cameras)} cameras, {len(frames)} frames at {width}x{height}")
+
+    output_path.mkdir(exist_ok=True)
+    written = []
+    errors = 0
+    total_bytes = 0
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {}
+        for frame_index, frame in enumerate(frames):
+            camera = cameras[min(camera_for_frame(frame_index, len(cameras)), len(cameras) - 1)]
+            if camera is None:
+                continue
+            future = executor.submit(render_hit_map, triangles, ids, camera, width, height,
+                                     output_path / f"{frame}.png")
+            futures[future] = frame
+        for future in as_completed(futures):
+            frame = futures[future]
+            try:
+                coverage, size = future.result()
+            except OSError as e:
+                print(f"✗ {frame}: {e}")
+                errors += 1
+                continue
+            written.append(frame)
+            total_bytes += size
+            print(f"✓ {frame}.png: {coverage * 100:.1f}% covered, {size / 1024:.1f}KB")
+
+    written.sort(key=manifest.natural_sort_key)
+    index = {
+        'version': version,
+        'model': f"{MODELS_DIR}/{model.name}",
+        'width': width,
+        'height': height,
+        'objects': objects,
+        'frames': written,
+    }
+    write_atomic(index_path, json.dumps(index, indent=2, ensure_ascii=False).encode('utf-8'))
+    print(f"  {len(written)} map(s), {total_bytes / 1024:.0f}KB → {index_path}")
+    return len(written), 0, errors
+
+
+def find_client_folders(root_path):
+    """All folders next to this script with both a 3D model and frames"""
+    return sorted(item for item in root_path.iterdir()
+                  if item.is_dir() and not item.name.startswith('.')
+                  and (item / '3D-Images').is_dir() and any((item / MODELS_DIR).glob('*.glb')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rasterize object-ID hit maps for the 360° viewer')
+    parser.add_argument('folders', nargs='*', help='Client folders (default: all client folders)')
+    parser.add_argument('--width', type=int, default=HIT_MAP_WIDTH,
+                        help=f'Map width in pixels (default: {HIT_MAP_WIDTH})')
+    parser.add_argument('--force', action='store_true', help='Rebuild maps that are up to date')
+    parser.add_argument('--jobs', type=int, default=None, help='Parallel workers (default: CPU count)')
+    args = parser.parse_args()
+
+    folders = [Path(folder) for folder in args.folders] or find_client_folders(SCRIPT_DIR)
+
+    print("=" * 60)
+    print("Creating Object-ID Hit Maps for 360° Viewer")
+    print("=" * 60)
+    print()
+
+    start = time.perf_counter()
+    written = skipped = errors = 0
+    for folder in folders:
+        counts = create_hit_maps(folder, width=args.width, force=args.force, jobs=args.jobs)
+        written, skipped, errors = written + counts[0], skipped + counts[1], errors + counts[2]
+
+    print("\n" + "=" * 60)
+    print(f"Wrote {written} map(s), {skipped} up to date, {errors} error(s) "
+          f"in {time.perf_counter() - start:.1f}s")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
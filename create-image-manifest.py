@@ -2,13 +2,50 @@
 """
 Generate image-manifest.json for 360° Image Viewer
 Scans 3D-Images folders and creates a manifest file for faster image loading
+
+Usage:
+    python create-image-manifest.py              # all manifests, rehashing only changed frames
+    python create-image-manifest.py --watch      # keep manifests up to date as frames are dropped in
+    python create-image-manifest.py --pack       # also pack light frames into one file
 """
 
 import os
 import json
 import re
+import time
+import struct
+import argparse
+import base64
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+
+try:
+    import numpy as np
+    from PIL import Image
+    PLACEHOLDERS_AVAILABLE = True
+except ImportError:
+    # Manifests are still complete without NumPy/Pillow, just without placeholders
+    PLACEHOLDERS_AVAILABLE = False
+
+PACK_NAME = "frames.pack"  # Light frames of a client concatenated into one file
+INDEX_FILE = ".manifest-index.json"  # Per-folder cache of frame sizes, mtimes, hashes and dimensions
+HASH_LENGTH = 16  # Hex characters of the content hash used in versioned URLs
+WATCH_INTERVAL = 0.4  # Seconds between polls in --watch mode
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.avif', '.JPG', '.JPEG', '.PNG', '.WEBP', '.AVIF'}
+IMAGE_TYPES = {'.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png', '.webp': 'image/webp', '.avif': 'image/avif'}
+# Encoding listed and packed for a frame stored in several formats: a real file any static host
+# serves and every current browser decodes (the format-neutral URL needs server.py)
+PACK_FORMATS = ['.webp', '.jpg', '.jpeg', '.png', '.avif']
+ANALYSIS_FILE = ".frame-analysis.json"  # Duplicates and deltas found by analyze-frames.py, in light/
+LIGHT_INDEX_FILE = ".light-index.json"  # Written by create-light-images.py, in light/
+PLACEHOLDER_SIZE = 8  # Long side of the embedded placeholder grid, in pixels
+PLACEHOLDER_SCALE = 4  # Sample pixels averaged per grid pixel (per axis)
+PLACEHOLDER_VERSION = 1  # Bump when the placeholder encoding changes (cached in the frame index)
+PLACEHOLDER_JOBS = 8  # Decoder threads; Pillow releases the GIL while decoding
+PLACEHOLDER_FORMATS = ['.jpg', '.jpeg', '.png', '.webp', '.avif']  # Cheapest to decode first (baseline JPEG decodes at 1/8 scale)
+COLOR_BITS = 3  # Bits per channel of the histogram the dominant color is picked from
 
 def natural_sort_key(text: str) -> List:
     """Generate a key for natural sorting (handles numbers correctly)"""
@@ -16,188 +53,629 @@ def natural_sort_key(text: str) -> List:
         return int(text_part) if text_part.isdigit() else text_part.lower()
     return [convert(c) for c in re.split(r'(\d+)', text)]
 
+def scan_images(directory: Path) -> Dict[str, os.stat_result]:
+    """Image files in a directory with their stat results, in one scandir pass"""
+    images = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1] in IMAGE_EXTENSIONS and entry.is_file():
+                    images[entry.name] = entry.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return images
+
 def get_image_files(directory: Path) -> List[str]:
     """Get all image files from a directory, sorted naturally"""
-    image_extensions = {'.jpg', '.jpeg', '.png', '.webp', '.JPG', '.JPEG', '.PNG', '.WEBP'}
-    images = []
-    
-    if not directory.exists():
-        return images
-    
-    for file in directory.iterdir():
-        if file.is_file() and file.suffix in image_extensions:
-            images.append(file.name)
-    
     # Sort naturally (handles numbers correctly)
-    images.sort(key=natural_sort_key)
-    return images
+    return sorted(scan_images(directory), key=natural_sort_key)
 
 def get_base_name(filename: str) -> str:
     """Get base name without extension"""
     return Path(filename).stem
 
-def create_manifest_for_client(client_folder: Path) -> Dict:
-    """Create manifest for a specific client folder"""
-    images_path = client_folder / "3D-Images"
+def resolve_frame_file(path: Path) -> Path:
+    """File behind a manifest path; format-neutral paths resolve to the PACK_FORMATS variant"""
+    if path.suffix.lower() in IMAGE_TYPES:
+        return path
+    for ext in PACK_FORMATS:
+        candidate = path.with_name(path.name + ext)
+        if candidate.exists():
+            return candidate
+    return path
+
+def file_hash(path: Path) -> str:
+    """Truncated SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+def read_image_size(path: Path) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a JPEG/PNG/WebP/AVIF header without decoding the image"""
+    with open(path, 'rb') as f:
+        head = f.read(32)
+        if head.startswith(b'\x89PNG\r\n\x1a\n'):
+            return struct.unpack('>II', head[16:24])
+        if head[4:8] == b'ftyp' and b'avif' in head[8:32]:
+            # Image spatial extents property of the primary item, near the start of the meta box
+            data = head + f.read(4096)
+            position = data.find(b'ispe')
+            if position < 0 or len(data) < position + 16:
+                return None
+            return struct.unpack('>II', data[position + 8:position + 16])
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            chunk = head[12:16]
+            f.seek(20)
+            data = f.read(10)
+            if chunk == b'VP8 ':
+                width, height = struct.unpack('<HH', data[6:10])
+                return width & 0x3fff, height & 0x3fff
+            if chunk == b'VP8L':
+                bits = struct.unpack('<I', data[1:5])[0]
+                return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+            if chunk == b'VP8X':
+                return (int.from_bytes(data[4:7], 'little') + 1, int.from_bytes(data[7:10], 'little') + 1)
+            return None
+        if head[:2] == b'\xff\xd8':
+            # Walk JPEG markers until a start-of-frame segment
+            f.seek(2)
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xff:
+                    return None
+                while marker[1] == 0xff:
+                    marker = marker[1:] + f.read(1)
+                code = marker[1]
+                if code in (0xd8, 0x01) or 0xd0 <= code <= 0xd7:
+                    continue
+                length = struct.unpack('>H', f.read(2))[0]
+                if 0xc0 <= code <= 0xcf and code not in (0xc4, 0xc8, 0xcc):
+                    height, width = struct.unpack('>xHH', f.read(5))
+                    return width, height
+                f.seek(length - 2, 1)
+    return None
+
+class FrameIndex:
+    """Per-folder cache of (size, mtime, hash, dimensions) for frame files.
+
+    Only files whose size or mtime changed since the last run are read and
+    hashed again, so regenerating a manifest costs one scandir per folder.
+    """
+
+    def __init__(self, images_path: Path):
+        self.path = images_path / INDEX_FILE
+        self.hashed = 0
+        self._seen = set()
+        self._dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def describe(self, file_path: Path, rel_name: str, stat_result: os.stat_result) -> Dict:
+        """Return {hash, bytes, width, height} for a frame, hashing only if it changed"""
+        self._seen.add(rel_name)
+        entry = self.entries.get(rel_name)
+        if entry and entry['size'] == stat_result.st_size and entry['mtime'] == stat_result.st_mtime_ns:
+            return entry['info']
+
+        try:
+            size = read_image_size(file_path)
+        except (OSError, struct.error):
+            size = None
+        info = {"hash": file_hash(file_path), "bytes": stat_result.st_size}
+        if size:
+            info["width"], info["height"] = size
+        self.entries[rel_name] = {'size': stat_result.st_size, 'mtime': stat_result.st_mtime_ns, 'info': info}
+        self.hashed += 1
+        self._dirty = True
+        return info
+
+    def preview(self, rel_name: str) -> Optional[Dict]:
+        """Cached placeholder of a file described in this run, or None"""
+        entry = self.entries.get(rel_name) or {}
+        preview = entry.get('preview')
+        return preview if preview and preview.get('v') == PLACEHOLDER_VERSION else None
+
+    def set_preview(self, rel_name: str, preview: Dict):
+        # Dropped with the entry as soon as the file changes (see describe)
+        self.entries[rel_name]['preview'] = dict(preview, v=PLACEHOLDER_VERSION)
+        self._dirty = True
+
+    def prune(self) -> bool:
+        """Forget files not described since the last prune; returns True if the index changed"""
+        stale = set(self.entries) - self._seen
+        for name in stale:
+            del self.entries[name]
+        changed = self._dirty or bool(stale)
+        self._seen = set()
+        self._dirty = False
+        return changed
+
+    def save(self):
+        """Write the index if it changed, forgetting files that no longer exist"""
+        if self.prune():
+            try:
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f, separators=(',', ':'), sort_keys=True)
+            except OSError:
+                # Read-only folders just rehash next time
+                pass
+
+def apply_frame_analysis(light_path: Path, prefix: str, light_paths: List[str], light_frames: List[Dict]):
+    """Collapse near-duplicate light frames and attach keyframe deltas (analyze-frames.py).
+
+    Only pairs whose frames still have the hashes recorded by the analysis
+    are used, so a re-rendered frame is never replaced by a stale one.
+    """
+    try:
+        with open(light_path / ANALYSIS_FILE, 'r', encoding='utf-8') as f:
+            analysis = json.load(f)
+    except (OSError, ValueError):
+        return
+    hashes = analysis.get("hashes", {})
+    positions = {get_base_name(path.rsplit('/', 1)[-1]): i for i, path in enumerate(light_paths)}
+
+    def current(base):
+        i = positions.get(base)
+        return i is not None and hashes.get(base) == light_frames[i]["hash"]
+
+    for base, delta in analysis.get("deltas", {}).items():
+        delta_file = light_path / delta["file"]
+        if current(base) and current(delta["key"]) and delta_file.is_file():
+            # Copied: frame dicts may be shared with the frame index
+            light_frames[positions[base]] = dict(light_frames[positions[base]], delta={
+                "key": positions[delta["key"]],
+                "url": f"{prefix}3D-Images/light/{delta['file']}",
+                "hash": delta["hash"],
+                "bytes": delta["bytes"],
+            })
+
+    # Duplicates load the frame they repeat (same URL and hash, fetched and decoded once)
+    for base, original in analysis.get("duplicates", {}).items():
+        if current(base) and current(original):
+            i, j = positions[base], positions[original]
+            light_paths[i] = light_paths[j]
+            light_frames[i] = dict(light_frames[j], duplicateOf=j)
+
+def load_light_encodings(light_path: Path) -> Dict[str, Dict]:
+    """{file name: {quality, ssim, bytes}} chosen by create-light-images.py --target-ssim / --max-kb"""
+    try:
+        with open(light_path / LIGHT_INDEX_FILE, 'r', encoding='utf-8') as f:
+            light_index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    encodings = {}
+    for entry in light_index.values():
+        encodings.update(entry.get("encoded", {}))
+    return encodings
+
+def decode_sample(path: Path):
+    """(RGB uint8 array of PLACEHOLDER_SCALE x the placeholder grid, (width, height)), or None if unreadable"""
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            grid = ((PLACEHOLDER_SIZE, max(1, round(PLACEHOLDER_SIZE * height / width))) if width >= height
+                    else (max(1, round(PLACEHOLDER_SIZE * width / height)), PLACEHOLDER_SIZE))
+            sample_size = (grid[0] * PLACEHOLDER_SCALE, grid[1] * PLACEHOLDER_SCALE)
+            # JPEG: let the decoder downscale by up to 1/8 while decoding
+            img.draft('RGB', sample_size)
+            sample = img.convert('RGB').resize(sample_size, Image.Resampling.BOX)
+            return np.asarray(sample), (width, height)
+    except (OSError, ValueError, ZeroDivisionError):
+        return None
+
+def compute_placeholders(paths: List[Path]) -> List[Optional[Dict]]:
+    """Placeholder grid, dominant color and dimensions of every frame.
+
+    Frames are decoded to small samples in parallel, then every group of
+    same-shaped samples (normally one per rotation) goes through NumPy at once.
+    The grid is stored at 4 bits per channel, two grid pixels per 3 bytes,
+    base64-encoded: 64 characters for a 16:9 frame (an 8x4 grid).
+    """
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(PLACEHOLDER_JOBS, len(paths))) as pool:
+        samples = list(pool.map(decode_sample, paths))
+
+    results = [None] * len(paths)
+    groups = {}
+    for i, sample in enumerate(samples):
+        if sample is not None:
+            groups.setdefault(sample[0].shape, []).append(i)
+    bins = 1 << (3 * COLOR_BITS)
+    for (sample_h, sample_w, _), members in groups.items():
+        pixels = np.stack([samples[i][0] for i in members])  # (frames, h, w, 3)
+        count = len(members)
+        grid_h, grid_w = sample_h // PLACEHOLDER_SCALE, sample_w // PLACEHOLDER_SCALE
+
+        # Box-average each grid pixel, quantize to 0-15 and pack pairs of nibbles into bytes
+        grid = pixels.reshape(count, grid_h, PLACEHOLDER_SCALE, grid_w, PLACEHOLDER_SCALE, 3).mean(axis=(2, 4))
+        nibbles = np.rint(grid / 17).astype(np.uint8).reshape(count, -1)
+        if nibbles.shape[1] % 2:
+            nibbles = np.pad(nibbles, ((0, 0), (0, 1)))
+        packed = (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]
+
+        # Dominant color: mean of the pixels in the fullest bin of a coarse RGB histogram
+        flat = pixels.reshape(count, -1, 3)
+        shift = 8 - COLOR_BITS
+        codes = (((flat[..., 0] >> shift).astype(np.int32) << (2 * COLOR_BITS))
+                 | ((flat[..., 1] >> shift).astype(np.int32) << COLOR_BITS) | (flat[..., 2] >> shift))
+        histogram = np.bincount((codes + np.arange(count)[:, None] * bins).ravel(),
+                                minlength=count * bins).reshape(count, bins)
+        in_mode = codes == histogram.argmax(axis=1)[:, None]
+        colors = (flat * in_mode[..., None]).sum(axis=1) / in_mode.sum(axis=1)[:, None]
+
+        for k, i in enumerate(members):
+            results[i] = {
+                "placeholder": {"w": grid_w, "h": grid_h, "data": base64.b64encode(packed[k].tobytes()).decode('ascii')},
+                "color": '#' + ''.join(f'{int(round(value)):02x}' for value in colors[k]),
+                "width": samples[i][1][0],
+                "height": samples[i][1][1],
+            }
+    return results
+
+def attach_placeholders(index: FrameIndex, frames: List[Dict], sources: List[Tuple[Path, str]]) -> int:
+    """Add placeholder and color (and dimensions the header did not give) to frame entries.
+
+    Only frames without a cached placeholder in the frame index are decoded;
+    returns how many were.
+    """
+    missing = [i for i, (_, rel_name) in enumerate(sources) if index.preview(rel_name) is None]
+    for i, preview in zip(missing, compute_placeholders([sources[i][0] for i in missing])):
+        if preview is not None:
+            index.set_preview(sources[i][1], preview)
+    for i, (_, rel_name) in enumerate(sources):
+        preview = index.preview(rel_name)
+        if preview is None:
+            continue
+        # Entries are shared with the frame index; never modify them in place
+        info = dict(frames[i], placeholder=preview["placeholder"], color=preview["color"])
+        info.setdefault("width", preview["width"])
+        info.setdefault("height", preview["height"])
+        frames[i] = info
+    return len(missing)
+
+def create_manifest(images_path: Path, prefix: str, collapse: bool = True,
+                    index: Optional[FrameIndex] = None, placeholders: bool = True) -> Optional[Dict]:
+    """Create the manifest for a 3D-Images folder, with paths prefixed by prefix.
+
+    With ``collapse``, the results of analyze-frames.py are applied to the light frames.
+    Without ``placeholders``, light frames are not decoded for their placeholder and color.
+    A FrameIndex passed as ``index`` is only updated in memory (server.py keeps one per
+    folder); otherwise the folder's index file is read and written back.
+    """
     light_path = images_path / "light"
-    
+
     if not images_path.exists():
-        print(f"  Warning: {images_path} does not exist, skipping...")
         return None
-    
-    # Get all images
-    full_images = get_image_files(images_path)
-    light_images = get_image_files(light_path)
-    
+
+    # Get all images (one scandir per folder, stat results reused for the index)
+    full_stats = scan_images(images_path)
+    light_stats = scan_images(light_path)
+    full_images = sorted(full_stats, key=natural_sort_key)
+    light_images = sorted(light_stats, key=natural_sort_key)
+
     # Create maps for matching
     full_map = {}
     light_map = {}
-    
-    # Map full images (exclude light folder files)
+
+    # Map full images (exclude light folder files); a frame may exist in several
+    # formats (create-light-images.py --formats), server.py negotiates between them
     for img in full_images:
         # Skip if it's actually in the light folder
-        if (light_path / img).exists():
+        if img in light_stats:
             continue
-        base = get_base_name(img)
-        if base not in full_map:
-            full_map[base] = img
-    
+        full_map.setdefault(get_base_name(img), []).append(img)
+
     # Map light images
     for img in light_images:
-        base = get_base_name(img)
-        if base not in light_map:
-            light_map[base] = img
-    
+        light_map.setdefault(get_base_name(img), []).append(img)
+
     # Get all unique base names and sort
     all_bases = set(full_map.keys()) | set(light_map.keys())
     all_bases_sorted = sorted(all_bases, key=natural_sort_key)
-    
-    # Build paths relative to client folder
-    client_name = client_folder.name
+
+    save_index = index is None
+    if save_index:
+        index = FrameIndex(images_path)
+    encodings = load_light_encodings(light_path)
+
+    def encoded(info: Dict, names: List[str], stats: Dict[str, os.stat_result]) -> Dict:
+        """Add the searched quality and SSIM per format, for files unchanged since they were encoded"""
+        chosen = {Path(name).suffix.lower().lstrip('.'): encodings[name] for name in names
+                  if name in encodings and encodings[name]["bytes"] == stats[name].st_size}
+        if not chosen:
+            return info
+        info = dict(info)
+        info["quality"] = {fmt: entry["quality"] for fmt, entry in chosen.items()}
+        info["ssim"] = {fmt: entry["ssim"] for fmt, entry in chosen.items()}
+        return info
+
+    def frame(folder: str, names: List[str]) -> Tuple[str, Dict]:
+        if folder == "light":
+            folder_path, rel, url, stats = light_path, "light/", f"{prefix}3D-Images/light/", light_stats
+        else:
+            folder_path, rel, url, stats = images_path, "", f"{prefix}3D-Images/", full_stats
+        variants = {name: index.describe(folder_path / name, f"{rel}{name}", stats[name]) for name in names}
+        if len(names) == 1:
+            info = variants[names[0]]
+            return f"{url}{names[0]}", encoded(info, names, stats) if folder == "light" else info
+
+        # Several encodings of one frame: the PACK_FORMATS file, plus the format-neutral
+        # URL server.py negotiates, versioned by all of them
+        base = get_base_name(names[0])
+        packed = resolve_frame_file(folder_path / base).name
+        if packed not in variants:
+            packed = names[0]
+        info = dict(variants[packed])
+        info["hash"] = hashlib.sha256(''.join(variants[name]["hash"] for name in names).encode('ascii')).hexdigest()[:HASH_LENGTH]
+        info["formats"] = {Path(name).suffix.lower().lstrip('.'): variant["bytes"] for name, variant in variants.items()}
+        info["negotiated"] = f"{url}{base}"
+        return f"{url}{packed}", encoded(info, names, stats) if folder == "light" else info
+
+    def preview_source(folder: str, names: List[str]) -> Tuple[Path, str]:
+        """(file, index name) of the variant of a frame that is cheapest to decode"""
+        name = min(names, key=lambda name: PLACEHOLDER_FORMATS.index(Path(name).suffix.lower())
+                   if Path(name).suffix.lower() in PLACEHOLDER_FORMATS else len(PLACEHOLDER_FORMATS))
+        if folder == "light":
+            return light_path / name, f"light/{name}"
+        return images_path / name, name
+
     full_paths = []
     light_paths = []
-    
+    full_frames = []
+    light_frames = []
+    preview_sources = []
+
     for base in all_bases_sorted:
         full_img = full_map.get(base)
         light_img = light_map.get(base)
-        
-        if full_img:
-            full_paths.append(f"{client_name}/3D-Images/{full_img}")
-        elif light_img:
-            # Use light version if full doesn't exist
-            full_paths.append(f"{client_name}/3D-Images/light/{light_img}")
-        
-        if light_img:
-            light_paths.append(f"{client_name}/3D-Images/light/{light_img}")
-        elif full_img:
-            # Use full version if light doesn't exist
-            light_paths.append(f"{client_name}/3D-Images/{full_img}")
-    
+
+        # Use the other tier if one version doesn't exist
+        path, info = frame("full", full_img) if full_img else frame("light", light_img)
+        full_paths.append(path)
+        full_frames.append(info)
+
+        path, info = frame("light", light_img) if light_img else frame("full", full_img)
+        light_paths.append(path)
+        light_frames.append(info)
+        preview_sources.append(preview_source("light", light_img) if light_img else preview_source("full", full_img))
+
+    previews = (attach_placeholders(index, light_frames, preview_sources)
+                if placeholders and PLACEHOLDERS_AVAILABLE else 0)
+    if save_index:
+        index.save()
+    else:
+        index.prune()
+    if collapse:
+        apply_frame_analysis(light_path, prefix, light_paths, light_frames)
+
     return {
         "light": light_paths,
-        "full": full_paths
+        "full": full_paths,
+        # Per-frame {hash, bytes, width, height}, plus the formats and
+        # format-neutral "negotiated" URL of frames stored in several
+        # encodings, the searched quality/ssim per format and the
+        # placeholder/color of light frames; the viewer
+        # appends ?v=<hash> so server.py can cache frames as immutable
+        "lightFrames": light_frames,
+        "fullFrames": full_frames,
+        "_hashed": index.hashed,
+        "_files": len(index.entries),
+        "_previews": previews
     }
 
+def create_manifest_for_client(client_folder: Path) -> Dict:
+    """Create manifest for a specific client folder"""
+    images_path = client_folder / "3D-Images"
+    if not images_path.exists():
+        print(f"  Warning: {images_path} does not exist, skipping...")
+        return None
+    return create_manifest(images_path, f"{client_folder.name}/")
+
 def create_root_manifest(root_path: Path) -> Dict:
     """Create manifest for root 3D-Images folder (no client folder)"""
     images_path = root_path / "3D-Images"
-    light_path = images_path / "light"
-    
     if not images_path.exists():
         print(f"Warning: {images_path} does not exist")
         return None
-    
-    # Get all images
-    full_images = get_image_files(images_path)
-    light_images = get_image_files(light_path)
-    
-    # Create maps for matching
-    full_map = {}
-    light_map = {}
-    
-    # Map full images (exclude light folder files)
-    for img in full_images:
-        # Skip if it's actually in the light folder
-        if (light_path / img).exists():
-            continue
-        base = get_base_name(img)
-        if base not in full_map:
-            full_map[base] = img
-    
-    # Map light images
-    for img in light_images:
-        base = get_base_name(img)
-        if base not in light_map:
-            light_map[base] = img
-    
-    # Get all unique base names and sort
-    all_bases = set(full_map.keys()) | set(light_map.keys())
-    all_bases_sorted = sorted(all_bases, key=natural_sort_key)
-    
-    # Build paths relative to root
-    full_paths = []
-    light_paths = []
-    
-    for base in all_bases_sorted:
-        full_img = full_map.get(base)
-        light_img = light_map.get(base)
-        
-        if full_img:
-            full_paths.append(f"3D-Images/{full_img}")
-        elif light_img:
-            full_paths.append(f"3D-Images/light/{light_img}")
-        
-        if light_img:
-            light_paths.append(f"3D-Images/light/{light_img}")
-        elif full_img:
-            light_paths.append(f"3D-Images/{full_img}")
-    
+    return create_manifest(images_path, "")
+
+def spiral_order(center: int, total: int) -> List[int]:
+    """Frame indices in the order viewer.js getSpiralOrder() requests them"""
+    indices = [center]
+    for offset in range(1, total + 1):
+        indices.append((center + offset) % total)
+        indices.append((center - offset + total) % total)
+    seen = set()
+    return [i for i in indices if i < total and not (i in seen or seen.add(i))]
+
+def pack_version(light_frames: List[Dict]) -> str:
+    """Pack version derived from the frame hashes, known without reading the frames"""
+    digest = hashlib.sha256()
+    for info in light_frames:
+        digest.update(info["hash"].encode('ascii'))
+    return digest.hexdigest()[:12]
+
+def pack_light_frames(root_path: Path, light_paths: List[str], light_frames: List[Dict],
+                      pack_rel_path: str, previous: Optional[Dict] = None) -> Dict:
+    """Concatenate the light frames into one container and return its index.
+
+    Frames are written in spiral order from frame 0, so the viewer can decode
+    nearby frames while the rest of the single response is still streaming.
+    ``frames[i]`` is ``[offset, length, mime type]`` of frame i in the pack.
+    An existing pack is reused if none of its frames changed.
+    """
+    pack_path = root_path / pack_rel_path
+    url = f"{pack_rel_path}?v={pack_version(light_frames)}"
+    if previous and previous.get("url") == url and pack_path.exists() and pack_path.stat().st_size == previous.get("size"):
+        return previous
+
+    temp_path = pack_path.with_name(pack_path.name + '.tmp')
+    frames = [None] * len(light_paths)
+    written = {}  # path -> entry, collapsed duplicates are stored once
+    offset = 0
+
+    with open(temp_path, 'wb') as out:
+        for index in spiral_order(0, len(light_paths)):
+            if light_paths[index] in written:
+                frames[index] = written[light_paths[index]]
+                continue
+            frame_file = resolve_frame_file(root_path / light_paths[index])
+            data = frame_file.read_bytes()
+            out.write(data)
+            mime = IMAGE_TYPES.get(frame_file.suffix.lower(), 'application/octet-stream')
+            frames[index] = written[light_paths[index]] = [offset, len(data), mime]
+            offset += len(data)
+    os.replace(temp_path, pack_path)
+
     return {
-        "light": light_paths,
-        "full": full_paths
+        # Versioned URL: server.py caches it as immutable
+        "url": url,
+        "size": offset,
+        "frames": frames
     }
 
+def load_manifest(manifest_path: Path) -> Optional[Dict]:
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_manifest(manifest: Dict, manifest_path: Path, root_path: Path, prefix: str, pack: bool,
+                   quiet: bool = False) -> bool:
+    """Optionally pack light frames, then write manifest JSON if it changed"""
+    hashed = manifest.pop("_hashed", 0)
+    files = manifest.pop("_files", 0)
+    previews = manifest.pop("_previews", 0)
+    previous = load_manifest(manifest_path)
+    if pack and manifest['light']:
+        manifest["lightPack"] = pack_light_frames(root_path, manifest['light'], manifest['lightFrames'],
+                                                  f"{prefix}3D-Images/light/{PACK_NAME}",
+                                                  (previous or {}).get("lightPack"))
+
+    # Leave an unchanged manifest alone so its ETag and caches stay valid
+    changed = manifest != previous
+    if changed:
+        temp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, manifest_path)
+
+    if quiet:
+        return changed
+    print(f"  [OK] {'Created' if changed else 'Unchanged'}: {manifest_path}")
+    print(f"    - {len(manifest['light'])} light images")
+    print(f"    - {len(manifest['full'])} full images")
+    print(f"    - {hashed} of {files} file(s) hashed, the rest unchanged since the last run")
+    if previews:
+        print(f"    - {previews} placeholder(s) computed")
+    elif not PLACEHOLDERS_AVAILABLE:
+        print("    - no placeholders (install numpy and Pillow to embed them)")
+    if "lightPack" in manifest:
+        print(f"    - light pack: {manifest['lightPack']['size'] / 1e6:.1f} MB in one file")
+    print()
+    return changed
+
+def find_manifest_targets(root_path: Path) -> List[Tuple[str, Path, str, Path]]:
+    """(label, 3D-Images folder, path prefix, manifest path) for the root and every client"""
+    targets = []
+
+    # Check for root 3D-Images folder
+    if (root_path / "3D-Images").exists():
+        targets.append(("root", root_path / "3D-Images", "", root_path / "image-manifest.json"))
+
+    # Check for client folders
+    for item in sorted(root_path.iterdir()):
+        if item.is_dir() and not item.name.startswith('.') and item.name not in ['3D-Images', '3D', 'img', 'js']:
+            # Check if it has a 3D-Images folder
+            images_path = item / "3D-Images"
+            if images_path.exists():
+                targets.append((item.name, images_path, f"{item.name}/", item / "image-manifest.json"))
+    return targets
+
+def folder_signature(images_path: Path) -> Tuple:
+    """Cheap fingerprint of a 3D-Images folder's frames (names, sizes, mtimes), frame analysis and light index"""
+    signature = []
+    for folder in (images_path, images_path / "light"):
+        for name, st in scan_images(folder).items():
+            signature.append((folder.name, name, st.st_size, st.st_mtime_ns))
+    for name in (ANALYSIS_FILE, LIGHT_INDEX_FILE):
+        try:
+            signature.append(("light", name, 0, (images_path / "light" / name).stat().st_mtime_ns))
+        except OSError:
+            pass
+    return tuple(sorted(signature))
+
+def watch(root_path: Path, pack: bool, interval: float = WATCH_INTERVAL):
+    """Poll the frame folders and regenerate manifests as soon as they settle.
+
+    A folder is regenerated once its fingerprint has changed and stayed the
+    same for one poll (so half-copied frames are not picked up), which keeps
+    the delay under a second with the default interval.
+    """
+    generated = {}
+    last_seen = {}
+    for label, images_path, prefix, manifest_path in find_manifest_targets(root_path):
+        generated[label] = last_seen[label] = folder_signature(images_path)
+
+    print(f"\nWatching for frame changes every {interval}s (Ctrl+C to stop)...")
+    try:
+        while True:
+            time.sleep(interval)
+            for label, images_path, prefix, manifest_path in find_manifest_targets(root_path):
+                signature = folder_signature(images_path)
+                stable = signature == last_seen.get(label)
+                last_seen[label] = signature
+                if not stable or signature == generated.get(label):
+                    continue
+                start = time.perf_counter()
+                manifest = create_manifest(images_path, prefix)
+                if manifest is None:
+                    continue
+                hashed = manifest.get("_hashed", 0)
+                changed = write_manifest(manifest, manifest_path, root_path, prefix, pack, quiet=True)
+                generated[label] = signature
+                print(f"  [{time.strftime('%H:%M:%S')}] {label}: {len(manifest['light'])} frames, "
+                      f"{hashed} rehashed, {'updated' if changed else 'unchanged'} "
+                      f"({(time.perf_counter() - start) * 1000:.0f}ms)")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
 def main():
     """Main function to generate manifests"""
+    parser = argparse.ArgumentParser(description='Generate image-manifest.json files')
+    parser.add_argument('--pack', action='store_true',
+                        help=f'Also pack all light frames of each client into 3D-Images/light/{PACK_NAME}')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and regenerate manifests when frames change')
+    parser.add_argument('--interval', type=float, default=WATCH_INTERVAL,
+                        help=f'Polling interval for --watch in seconds (default: {WATCH_INTERVAL})')
+    args = parser.parse_args()
+
     script_dir = Path(__file__).parent
     root_path = script_dir
-    
+
     print("Generating image-manifest.json files...")
     print(f"Working directory: {root_path}\n")
-    
+
     manifests_created = 0
-    
-    # Check for root 3D-Images folder
-    root_images = root_path / "3D-Images"
-    if root_images.exists():
-        print("Creating root manifest (for no clientID)...")
-        manifest = create_root_manifest(root_path)
+
+    for label, images_path, prefix, manifest_path in find_manifest_targets(root_path):
+        if label == "root":
+            print("Creating root manifest (for no clientID)...")
+        else:
+            print(f"Creating manifest for client: {label}...")
+        manifest = create_manifest(images_path, prefix)
         if manifest:
-            manifest_path = root_path / "image-manifest.json"
-            with open(manifest_path, 'w', encoding='utf-8') as f:
-                json.dump(manifest, f, indent=2, ensure_ascii=False)
-            print(f"  [OK] Created: {manifest_path}")
-            print(f"    - {len(manifest['light'])} light images")
-            print(f"    - {len(manifest['full'])} full images\n")
+            write_manifest(manifest, manifest_path, root_path, prefix, args.pack)
             manifests_created += 1
-    
-    # Check for client folders
-    for item in root_path.iterdir():
-        if item.is_dir() and not item.name.startswith('.') and item.name not in ['3D-Images', '3D', 'img', 'js']:
-            # Check if it has a 3D-Images folder
-            images_path = item / "3D-Images"
-            if images_path.exists():
-                print(f"Creating manifest for client: {item.name}...")
-                manifest = create_manifest_for_client(item)
-                if manifest:
-                    manifest_path = item / "image-manifest.json"
-                    with open(manifest_path, 'w', encoding='utf-8') as f:
-                        json.dump(manifest, f, indent=2, ensure_ascii=False)
-                    print(f"  [OK] Created: {manifest_path}")
-                    print(f"    - {len(manifest['light'])} light images")
-                    print(f"    - {len(manifest['full'])} full images\n")
-                    manifests_created += 1
-    
+
     if manifests_created == 0:
         print("No 3D-Images folders found. Make sure you have:")
         print("  - 3D-Images/ folder in root, OR")
@@ -205,6 +683,8 @@ def main():
     else:
         print(f"[OK] Successfully created {manifests_created} manifest file(s)")
 
+    if args.watch:
+        watch(root_path, args.pack, args.interval)
+
 if __name__ == "__main__":
     main()
-
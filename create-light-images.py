@@ -2,9 +2,26 @@
 """
 Image Resizer for 360° Product Viewer
 Creates optimized "light" versions of images for fast loading
+
+Usage:
+    python create-light-images.py                    # ./3D-Images
+    python create-light-images.py CLT695425          # one client folder
+    python create-light-images.py --all --jobs 8     # every client folder
+    python create-light-images.py CLT695425 --tiles  # also build deep-zoom tiles
+    python create-light-images.py --formats avif,webp,jpg # also write JPEG
+    python create-light-images.py --target-ssim 0.985 # lowest quality per frame that keeps SSIM >= 0.985
+    python create-light-images.py --max-kb 150       # highest quality per frame that fits in 150KB
 """
 
 import os
+import math
+import shutil
+import argparse
+import hashlib
+import io
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 try:
@@ -22,111 +39,643 @@ except ImportError:
     print("=" * 60)
     exit(1)
 
+try:
+    # Only needed for --target-ssim / --max-kb
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    # Registers AVIF support with Pillow versions that lack it natively
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
 # Configuration
 SOURCE_DIR = "3D-Images"
 OUTPUT_DIR = "3D-Images/light"
 TARGET_WIDTH = 2000  # Maximum width for light images
 QUALITY = 85  # Image quality (1-100) - used for JPEG/WebP
 WEBP_QUALITY = 85  # WebP quality (1-100)
+WEBP_METHOD = 6  # WebP encoder effort (0 = fastest, 6 = smallest files)
+AVIF_QUALITY = 60  # AVIF quality (1-100); visually close to WebP 85 at a fraction of the size
+AVIF_SPEED = 6  # AVIF encoder speed (0 = smallest files, 10 = fastest)
+INDEX_FILE = ".light-index.json"  # Source hashes of already processed images
+# Encodings written per frame (--formats); server.py sends each browser the smallest it supports.
+# JPEG is opt-in: client folders often ship their own light/*.jpg, which are never overwritten
+LIGHT_FORMATS = ['avif', 'webp']
+FORMAT_NAMES = {'avif': 'AVIF', 'webp': 'WEBP', 'jpg': 'JPEG'}
+# Light images of these formats are always this script's output, even without an index entry
+# (earlier versions wrote WebP without one); any other existing file is only replaced if indexed
+OWNED_FORMATS = {'avif', 'webp'}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
 
-def create_light_images():
-    """Create resized light versions of all images"""
-    
-    source_path = Path(SOURCE_DIR)
-    output_path = Path(OUTPUT_DIR)
-    
-    # Create output directory if it doesn't exist
-    output_path.mkdir(parents=True, exist_ok=True)
-    
-    # Get all image files (excluding the light folder itself)
+# Per-frame quality search (--target-ssim / --max-kb)
+QUALITY_RANGES = {'avif': (30, 90), 'webp': (40, 95), 'jpg': (40, 95)}  # Searched (low, high) per format
+DEFAULT_TARGET_SSIM = 0.985  # Mean SSIM of the luma against the resized source
+SSIM_WINDOW = 7  # Window edge in pixels
+
+# Deep-zoom tiles (--tiles)
+TILES_DIR = "3D-Images/tiles"
+TILE_SIZE = 512  # Tile edge in pixels
+TILE_QUALITY = 80  # WebP quality for tiles
+TILE_DESCRIPTOR = "descriptor.json"  # Per-frame pyramid description, written last
+
+
+def file_hash(path):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_signature(method, formats, search=None):
+    """Changing any of these settings invalidates existing light images"""
+    signature = f"w{TARGET_WIDTH}-q{WEBP_QUALITY}-m{method}-a{AVIF_QUALITY}-j{QUALITY}-{'+'.join(formats)}"
+    if search:
+        mode, target = search
+        ranges = '+'.join(f"{low}-{high}" for low, high in QUALITY_RANGES.values())
+        signature += f"-{mode}{target}-r{ranges}"
+    return signature
+
+
+def available_formats(formats):
+    """Drop encodings this Pillow build cannot write"""
+    writable = {ext for ext, name in Image.registered_extensions().items() if name in Image.SAVE}
+    usable = [fmt for fmt in formats if f'.{fmt}' in writable]
+    for fmt in formats:
+        if fmt not in usable:
+            print(f"Warning: Pillow cannot write {fmt.upper()} here (pip install pillow-avif-plugin), skipping it")
+    return usable
+
+
+def save_options(fmt, method, quality=None):
+    """Pillow save() keyword arguments for one light-image encoding (default quality if None)"""
+    if fmt == 'avif':
+        return {'quality': quality or AVIF_QUALITY, 'speed': AVIF_SPEED}
+    if fmt == 'webp':
+        return {'quality': quality or WEBP_QUALITY, 'method': method}
+    return {'quality': quality or QUALITY, 'optimize': True, 'progressive': True}
+
+
+def encode(frame, fmt, options):
+    """Encoded bytes of a frame"""
+    buffer = io.BytesIO()
+    frame.save(buffer, FORMAT_NAMES[fmt], **options)
+    return buffer.getvalue()
+
+
+def luma(img):
+    """Luma plane (ITU-R 601) as a float64 array"""
+    return np.asarray(img.convert('L'), dtype=np.float64)
+
+
+def window_mean(plane):
+    """Mean of every SSIM_WINDOW x SSIM_WINDOW window, from a summed-area table"""
+    table = np.pad(plane, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    n = SSIM_WINDOW
+    return (table[n:, n:] - table[:-n, n:] - table[n:, :-n] + table[:-n, :-n]) / (n * n)
+
+
+def ssim(reference, candidate):
+    """Mean structural similarity of two luma planes (1.0 = identical)"""
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mean_x, mean_y = window_mean(reference), window_mean(candidate)
+    var_x = window_mean(reference * reference) - mean_x * mean_x
+    var_y = window_mean(candidate * candidate) - mean_y * mean_y
+    covariance = window_mean(reference * candidate) - mean_x * mean_y
+    score = ((2 * mean_x * mean_y + c1) * (2 * covariance + c2)
+             / ((mean_x * mean_x + mean_y * mean_y + c1) * (var_x + var_y + c2)))
+    return float(score.mean())
+
+
+def search_quality(frame, fmt, method, search, reference):
+    """Binary search of the quality setting for one encoding of a frame.
+
+    ``search`` is ('ssim', target) for the lowest quality whose SSIM reaches
+    the target, or ('bytes', budget) for the highest quality that fits the
+    budget. When no quality in QUALITY_RANGES qualifies, the end closest to
+    the goal is used. Returns (encoded bytes, quality, ssim).
+    """
+    mode, target = search
+    low, high = QUALITY_RANGES[fmt]
+    tried = {}
+
+    def attempt(quality):
+        if quality not in tried:
+            data = encode(frame, fmt, save_options(fmt, method, quality))
+            score = ssim(reference, luma(Image.open(io.BytesIO(data))))
+            tried[quality] = (data, score)
+        return tried[quality]
+
+    best = None
+    while low <= high:
+        quality = (low + high) // 2
+        data, score = attempt(quality)
+        if mode == 'ssim':
+            if score >= target:
+                best, high = quality, quality - 1
+            else:
+                low = quality + 1
+        else:
+            if len(data) <= target:
+                best, low = quality, quality + 1
+            else:
+                high = quality - 1
+    if best is None:
+        best = QUALITY_RANGES[fmt][1] if mode == 'ssim' else QUALITY_RANGES[fmt][0]
+    data, score = attempt(best)
+    return data, best, score
+
+
+def find_source_images(source_path):
+    """Get all image files in source_path (excluding the light folder itself)"""
     image_files = []
-    for ext in ['*.jpg', '*.jpeg', '*.png', '*.webp', '*.JPG', '*.JPEG', '*.PNG', '*.WEBP']:
-        for file in source_path.glob(ext):
-            # Skip if file is in the light subfolder
-            if 'light' not in file.parts:
-                image_files.append(file)
-    
+    for file in source_path.iterdir():
+        if file.is_file() and file.suffix.lower() in IMAGE_EXTENSIONS:
+            image_files.append(file)
+    return sorted(image_files)
+
+
+def load_index(output_path):
+    try:
+        with open(output_path / INDEX_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index(output_path, index):
+    # Replaced atomically: the new entry touches the light folder, so server.py rebuilds its manifest
+    temp = output_path / (INDEX_FILE + '.tmp')
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(temp, output_path / INDEX_FILE)
+
+
+def needs_update(img_file, output_files, entry, signature):
+    """Return True if the light images for img_file must be (re)created.
+
+    The cheap mtime comparison is tried first; the content hash is only
+    computed when an output looks stale (e.g. the source was touched or
+    copied again without changing).
+    """
+    if not all(output_file.exists() for output_file in output_files):
+        return True
+    if entry and entry.get('settings') != signature:
+        return True
+    source_mtime = img_file.stat().st_mtime_ns
+    if all(output_file.stat().st_mtime_ns >= source_mtime for output_file in output_files):
+        return False
+    if not entry:
+        return True
+    if file_hash(img_file) != entry.get('hash'):
+        return True
+    # Source was touched but unchanged; refresh the output mtimes
+    for output_file in output_files:
+        os.utime(output_file)
+    return False
+
+
+def process_image(img_file, output_files, method, search=None):
+    """Resize one image and write it in every requested encoding (runs in a worker process)
+
+    ``output_files`` maps a format from LIGHT_FORMATS to its output path.
+    With ``search`` (see search_quality) the quality is chosen per frame and
+    the fixed-quality size is measured too, for the savings report.
+    """
+    start = time.perf_counter()
+    with Image.open(img_file) as img:
+        # Get original dimensions
+        orig_width, orig_height = img.size
+
+        # Calculate new dimensions (maintain aspect ratio)
+        if orig_width > TARGET_WIDTH:
+            ratio = TARGET_WIDTH / orig_width
+            new_width = TARGET_WIDTH
+            new_height = int(orig_height * ratio)
+            # Let the JPEG decoder downscale by 1/2, 1/4 or 1/8 while decoding
+            if img.format == 'JPEG':
+                img.draft('RGB', (new_width, new_height))
+            # reducing_gap shrinks with a fast box reduce() before the LANCZOS pass
+            resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        else:
+            # Image is already smaller, just copy with optimization
+            new_width = orig_width
+            new_height = orig_height
+            resized = img
+
+        # Keep RGBA for AVIF/WebP (supports transparency), convert other modes to RGB
+        if resized.mode not in ['RGB', 'RGBA']:
+            resized = resized.convert('RGB')
+
+        # Decode and resize once, encode as often as needed
+        searched = {}
+        reference = luma(resized) if search else None
+        for fmt, output_file in output_files.items():
+            frame = resized.convert('RGB') if fmt == 'jpg' and resized.mode != 'RGB' else resized
+            if not search:
+                frame.save(output_file, FORMAT_NAMES[fmt], **save_options(fmt, method))
+                continue
+            data, quality, score = search_quality(frame, fmt, method, search, reference)
+            output_file.write_bytes(data)
+            searched[fmt] = {
+                'quality': quality,
+                'ssim': round(score, 5),
+                'baseline': len(encode(frame, fmt, save_options(fmt, method))),
+            }
+
+    return {
+        'hash': file_hash(img_file),
+        'orig_size': (orig_width, orig_height),
+        'new_size': (new_width, new_height),
+        'orig_bytes': img_file.stat().st_size,
+        'new_bytes': {fmt: output_file.stat().st_size for fmt, output_file in output_files.items()},
+        'searched': searched,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def create_light_images(client_folder=None, jobs=None, force=False, method=WEBP_METHOD, formats=None, search=None):
+    """Create resized light versions of all images in a client folder.
+
+    ``search`` is None for the fixed qualities, ('ssim', target) or
+    ('bytes', budget) to search the quality of every frame.
+    Returns (processed, skipped, errors) counts.
+    """
+    base_path = Path(client_folder) if client_folder else Path('.')
+    source_path = base_path / SOURCE_DIR
+    output_path = base_path / OUTPUT_DIR
+    jobs = jobs or os.cpu_count() or 1
+    formats = available_formats(formats or LIGHT_FORMATS)
+    if not formats:
+        return 0, 0, 0
+
+    if not source_path.exists():
+        print(f"\nNo {SOURCE_DIR}/ folder found in {base_path}/")
+        return 0, 0, 0
+
+    image_files = find_source_images(source_path)
     if not image_files:
-        print(f"\nNo images found in {SOURCE_DIR}/")
+        print(f"\nNo images found in {source_path}/")
         print("Please make sure your images are in the 3D-Images folder")
-        return
-    
+        return 0, 0, 0
+
+    # Create output directory if it doesn't exist
+    output_path.mkdir(parents=True, exist_ok=True)
+
     print("=" * 60)
     print(f"Creating Light Images for 360° Viewer")
     print("=" * 60)
-    print(f"\nSource folder: {SOURCE_DIR}/")
-    print(f"Output folder: {OUTPUT_DIR}/")
+    print(f"\nSource folder: {source_path}/")
+    print(f"Output folder: {output_path}/")
     print(f"Target width: {TARGET_WIDTH}px")
-    print(f"Quality: {QUALITY}%")
+    print(f"Formats: {', '.join(fmt.upper() for fmt in formats)}")
+    if search and search[0] == 'ssim':
+        print(f"Quality: lowest per frame with SSIM >= {search[1]} (WebP method {method})")
+    elif search:
+        print(f"Quality: highest per frame within {search[1] / 1024:.0f}KB (WebP method {method})")
+    else:
+        print(f"Quality: AVIF {AVIF_QUALITY}%, WebP {WEBP_QUALITY}% (method {method}), JPEG {QUALITY}%")
     print(f"Images found: {len(image_files)}")
+    print(f"Parallel jobs: {jobs}")
+
+    previous = load_index(output_path)
+    index = {} if force else previous
+    signature = settings_signature(method, formats, search)
+
+    # Decide what needs work before starting the pool
+    todo = []
+    skipped = 0
+    kept = 0
+    for img_file in image_files:
+        # Light images this script did not write (e.g. a hand-made light/12.jpg) are left alone
+        written = set(previous.get(img_file.name, {}).get('outputs', []))
+        output_files = {}
+        for fmt in formats:
+            output_file = output_path / f"{img_file.stem}.{fmt}"
+            if fmt not in OWNED_FORMATS and output_file.exists() and output_file.name not in written:
+                kept += 1
+            else:
+                output_files[fmt] = output_file
+        if not output_files:
+            skipped += 1
+        elif force or needs_update(img_file, output_files.values(), index.get(img_file.name), signature):
+            todo.append((img_file, output_files))
+        else:
+            skipped += 1
+
+    print(f"Up to date (skipped): {skipped}")
+    if kept:
+        print(f"Existing light images kept (not written by this script): {kept}")
+    print(f"To process: {len(todo)}")
     print("\nProcessing...\n")
-    
+
     success_count = 0
     error_count = 0
-    
-    for i, img_file in enumerate(image_files, 1):
-        try:
-            # Open image
-            with Image.open(img_file) as img:
-                # Get original dimensions
-                orig_width, orig_height = img.size
-                
-                # Calculate new dimensions (maintain aspect ratio)
-                if orig_width > TARGET_WIDTH:
-                    ratio = TARGET_WIDTH / orig_width
-                    new_width = TARGET_WIDTH
-                    new_height = int(orig_height * ratio)
-                else:
-                    # Image is already smaller, just copy with optimization
-                    new_width = orig_width
-                    new_height = orig_height
-                
-                # Resize image
-                if orig_width > TARGET_WIDTH:
-                    resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                else:
-                    resized = img
-                
-                # Always save as WebP format for optimal compression
-                # Convert RGBA to RGB if necessary (WebP supports both)
-                if resized.mode == 'RGBA':
-                    # Keep RGBA for WebP (supports transparency)
-                    pass
-                elif resized.mode not in ['RGB', 'RGBA']:
-                    # Convert other modes to RGB
-                    resized = resized.convert('RGB')
-                
-                # Save as WebP with optimized quality
-                output_file = output_path / (img_file.stem + '.webp')
-                resized.save(output_file, 'WEBP', quality=WEBP_QUALITY, method=6)
-                
-                # Calculate file sizes
-                orig_size = img_file.stat().st_size / 1024  # KB
-                new_size = output_file.stat().st_size / 1024  # KB
+    total_orig = 0
+    total_new = dict.fromkeys(formats, 0)
+    total_baseline = dict.fromkeys(formats, 0)
+    cpu_seconds = 0.0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(process_image, img_file, output_files, method, search): (img_file, output_files)
+                   for img_file, output_files in todo}
+        for i, future in enumerate(as_completed(futures), 1):
+            img_file, output_files = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[{i}/{len(todo)}] ERROR: {img_file.name}")
+                print(f"  {str(e)}")
+                error_count += 1
+                continue
+
+            orig_size = result['orig_bytes'] / 1024  # KB
+            (orig_width, orig_height), (new_width, new_height) = result['orig_size'], result['new_size']
+
+            print(f"[{i}/{len(todo)}] {img_file.name} ({result['seconds']:.2f}s)")
+            print(f"  {orig_width}x{orig_height} → {new_width}x{new_height}")
+            for fmt, new_bytes in result['new_bytes'].items():
+                new_size = new_bytes / 1024  # KB
                 reduction = ((orig_size - new_size) / orig_size * 100) if orig_size > 0 else 0
-                
-                print(f"[{i}/{len(image_files)}] {img_file.name}")
-                print(f"  {orig_width}x{orig_height} → {new_width}x{new_height}")
-                print(f"  {orig_size:.1f}KB → {new_size:.1f}KB (-{reduction:.1f}%)")
-                
-                success_count += 1
-                
-        except Exception as e:
-            print(f"[{i}/{len(image_files)}] ERROR: {img_file.name}")
-            print(f"  {str(e)}")
-            error_count += 1
-    
+                searched = result['searched'].get(fmt)
+                details = (f" q{searched['quality']} SSIM {searched['ssim']:.4f}, fixed quality "
+                           f"{searched['baseline'] / 1024:.1f}KB" if searched else "")
+                print(f"  {fmt.upper():<5} {orig_size:.1f}KB → {new_size:.1f}KB (-{reduction:.1f}%){details}")
+
+            # Drop encodings this script wrote but no longer writes, so the server never negotiates a stale one
+            written = previous.get(img_file.name, {}).get('outputs', [])
+            for fmt in FORMAT_NAMES:
+                stale = output_path / f"{img_file.stem}.{fmt}"
+                if (fmt not in output_files and (fmt in OWNED_FORMATS or stale.name in written)
+                        and stale.exists()):
+                    stale.unlink()
+
+            index[img_file.name] = {
+                'hash': result['hash'],
+                'outputs': sorted(output_file.name for output_file in output_files.values()),
+                'settings': signature,
+            }
+            if result['searched']:
+                # Read by create-image-manifest.py into the frame's manifest entry
+                index[img_file.name]['encoded'] = {
+                    output_files[fmt].name: {'quality': searched['quality'], 'ssim': searched['ssim'],
+                                             'bytes': result['new_bytes'][fmt]}
+                    for fmt, searched in result['searched'].items()
+                }
+            total_orig += result['orig_bytes']
+            for fmt, new_bytes in result['new_bytes'].items():
+                total_new[fmt] += new_bytes
+                total_baseline[fmt] += result['searched'].get(fmt, {}).get('baseline', new_bytes)
+            cpu_seconds += result['seconds']
+            success_count += 1
+
+    elapsed = time.perf_counter() - start
+    # Forget sources that no longer exist
+    names = {img_file.name for img_file in image_files}
+    index = {name: entry for name, entry in index.items() if name in names}
+    save_index(output_path, index)
+
     print("\n" + "=" * 60)
     print("COMPLETE!")
     print("=" * 60)
     print(f"\n✓ Successfully processed: {success_count} images")
+    print(f"- Skipped (up to date): {skipped} images")
     if error_count > 0:
         print(f"✗ Errors: {error_count} images")
-    print(f"\nLight images saved to: {OUTPUT_DIR}/")
+    if success_count:
+        print(f"\nWall time: {elapsed:.1f}s ({success_count / elapsed:.2f} images/s)")
+        print(f"CPU time: {cpu_seconds:.1f}s across {jobs} job(s) ({cpu_seconds / elapsed:.1f}x speedup)")
+        print(f"Input: {total_orig / 1e6:.1f}MB ({total_orig / 1e6 / elapsed:.1f}MB/s) → "
+              f"Output: {', '.join(f'{fmt.upper()} {size / 1e6:.1f}MB' for fmt, size in total_new.items())}")
+        if search:
+            print("Against the fixed qualities:")
+            for fmt in formats:
+                baseline, size = total_baseline[fmt], total_new[fmt]
+                saved = (1 - size / baseline) * 100 if baseline else 0
+                print(f"  {fmt.upper():<5} {baseline / 1e6:.2f}MB → {size / 1e6:.2f}MB ({-saved:+.1f}%)")
+    print(f"\nLight images saved to: {output_path}/")
     print("\nYou can now refresh your browser to use the new viewer!")
     print("=" * 60)
+    return success_count, skipped, error_count
+
+
+def build_pyramid(img_file, frame_dir, method):
+    """Cut one full-res frame into a pyramid of TILE_SIZE WebP tiles.
+
+    Level 0 fits in a single tile; each following level doubles the
+    resolution up to the source size. Tiles are stored as
+    ``<level>/<x>_<y>.webp`` next to a descriptor the viewer reads to pick
+    the level matching its zoom (runs in a worker process).
+    """
+    start = time.perf_counter()
+    if frame_dir.exists():
+        shutil.rmtree(frame_dir)
+    frame_dir.mkdir(parents=True)
+
+    tile_count = 0
+    total_bytes = 0
+    with Image.open(img_file) as img:
+        if img.mode not in ['RGB', 'RGBA']:
+            img = img.convert('RGB')
+        width, height = img.size
+        max_level = max(0, math.ceil(math.log2(max(width, height) / TILE_SIZE)))
+        levels = [None] * (max_level + 1)
+
+        level_img = img
+        for level in range(max_level, -1, -1):
+            if level < max_level:
+                # Halve the previous level (much cheaper than resizing the source each time)
+                level_img = level_img.resize((max(1, math.ceil(level_img.width / 2)),
+                                              max(1, math.ceil(level_img.height / 2))),
+                                             Image.Resampling.LANCZOS)
+            level_width, level_height = level_img.size
+            columns = math.ceil(level_width / TILE_SIZE)
+            rows = math.ceil(level_height / TILE_SIZE)
+            level_dir = frame_dir / str(level)
+            level_dir.mkdir()
+            for y in range(rows):
+                for x in range(columns):
+                    box = (x * TILE_SIZE, y * TILE_SIZE,
+                           min((x + 1) * TILE_SIZE, level_width), min((y + 1) * TILE_SIZE, level_height))
+                    tile_file = level_dir / f"{x}_{y}.webp"
+                    level_img.crop(box).save(tile_file, 'WEBP', quality=TILE_QUALITY, method=method)
+                    tile_count += 1
+                    total_bytes += tile_file.stat().st_size
+            levels[level] = {'width': level_width, 'height': level_height, 'columns': columns, 'rows': rows}
+
+    descriptor = {
+        'width': width,
+        'height': height,
+        'tileSize': TILE_SIZE,
+        'format': 'webp',
+        'levels': levels,
+        'settings': f"t{TILE_SIZE}-q{TILE_QUALITY}-m{method}",
+    }
+    with open(frame_dir / TILE_DESCRIPTOR, 'w', encoding='utf-8') as f:
+        json.dump(descriptor, f, separators=(',', ':'))
+
+    return {
+        'levels': max_level + 1,
+        'tiles': tile_count,
+        'bytes': total_bytes,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def pyramid_is_current(img_file, frame_dir, method):
+    """A pyramid is current if its descriptor is newer than the source and settings match"""
+    descriptor_file = frame_dir / TILE_DESCRIPTOR
+    if not descriptor_file.exists() or descriptor_file.stat().st_mtime_ns < img_file.stat().st_mtime_ns:
+        return False
+    try:
+        with open(descriptor_file, 'r', encoding='utf-8') as f:
+            descriptor = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return descriptor.get('settings') == f"t{TILE_SIZE}-q{TILE_QUALITY}-m{method}"
 
-if __name__ == "__main__":
-    create_light_images()
 
+def create_tile_pyramids(client_folder=None, jobs=None, force=False, method=WEBP_METHOD):
+    """Build deep-zoom tile pyramids for every full-res frame of a client folder.
 
+    Returns (processed, skipped, errors) counts.
+    """
+    base_path = Path(client_folder) if client_folder else Path('.')
+    source_path = base_path / SOURCE_DIR
+    tiles_path = base_path / TILES_DIR
+    jobs = jobs or os.cpu_count() or 1
+
+    if not source_path.exists():
+        return 0, 0, 0
+    image_files = find_source_images(source_path)
+
+    todo = []
+    skipped = 0
+    for img_file in image_files:
+        frame_dir = tiles_path / img_file.stem
+        if force or not pyramid_is_current(img_file, frame_dir, method):
+            todo.append((img_file, frame_dir))
+        else:
+            skipped += 1
+
+    print("\n" + "=" * 60)
+    print("Creating Deep-Zoom Tiles")
+    print("=" * 60)
+    print(f"\nOutput folder: {tiles_path}/")
+    print(f"Tile size: {TILE_SIZE}px, quality {TILE_QUALITY}%")
+    print(f"Up to date (skipped): {skipped}")
+    print(f"To process: {len(todo)}\n")
+
+    success_count = 0
+    error_count = 0
+    total_tiles = 0
+    total_bytes = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(build_pyramid, img_file, frame_dir, method): img_file
+                   for img_file, frame_dir in todo}
+        for i, future in enumerate(as_completed(futures), 1):
+            img_file = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[{i}/{len(todo)}] ERROR: {img_file.name}")
+                print(f"  {str(e)}")
+                error_count += 1
+                continue
+            print(f"[{i}/{len(todo)}] {img_file.name}: {result['levels']} levels, "
+                  f"{result['tiles']} tiles, {result['bytes'] / 1024:.0f}KB ({result['seconds']:.2f}s)")
+            total_tiles += result['tiles']
+            total_bytes += result['bytes']
+            success_count += 1
+
+    # Remove pyramids of frames that no longer exist
+    if tiles_path.exists():
+        stems = {img_file.stem for img_file in image_files}
+        for frame_dir in tiles_path.iterdir():
+            if frame_dir.is_dir() and frame_dir.name not in stems:
+                shutil.rmtree(frame_dir)
+
+    elapsed = time.perf_counter() - start
+    if success_count:
+        print(f"\n✓ {success_count} pyramids, {total_tiles} tiles, {total_bytes / 1e6:.1f}MB "
+              f"in {elapsed:.1f}s")
+    if error_count > 0:
+        print(f"✗ Errors: {error_count} images")
+    return success_count, skipped, error_count
+
+
+def find_client_folders(root_path):
+    """All folders next to this script that contain a 3D-Images folder"""
+    return sorted(item for item in root_path.iterdir()
+                  if item.is_dir() and not item.name.startswith('.') and (item / SOURCE_DIR).is_dir())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create light images for the 360° viewer')
+    parser.add_argument('folders', nargs='*',
+                        help='Client folders containing 3D-Images/ (default: current folder)')
+    parser.add_argument('--all', action='store_true', help='Process every client folder next to this script')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Parallel worker processes (default: number of CPUs)')
+    parser.add_argument('--force', action='store_true', help='Re-create every light image')
+    parser.add_argument('--method', type=int, default=WEBP_METHOD, choices=range(7),
+                        help=f'WebP encoder effort, 0 = fastest (default: {WEBP_METHOD})')
+    parser.add_argument('--formats', default=','.join(LIGHT_FORMATS),
+                        help=f'Comma-separated encodings to write per frame (default: {",".join(LIGHT_FORMATS)})')
+    parser.add_argument('--tiles', action='store_true',
+                        help=f'Also build {TILE_SIZE}px deep-zoom tile pyramids of the full-res frames')
+    quality = parser.add_mutually_exclusive_group()
+    quality.add_argument('--target-ssim', type=float, nargs='?', const=DEFAULT_TARGET_SSIM, default=None,
+                         help=f'Search the lowest quality per frame with at least this SSIM '
+                              f'(default target: {DEFAULT_TARGET_SSIM})')
+    quality.add_argument('--max-kb', type=float, default=None,
+                         help='Search the highest quality per frame and format that fits in this many KB')
+    args = parser.parse_args()
+
+    search = None
+    if args.target_ssim is not None:
+        if not 0 < args.target_ssim < 1:
+            parser.error("--target-ssim must be between 0 and 1")
+        search = ('ssim', args.target_ssim)
+    elif args.max_kb is not None:
+        if args.max_kb <= 0:
+            parser.error("--max-kb must be positive")
+        search = ('bytes', int(args.max_kb * 1024))
+    if search and not NUMPY_AVAILABLE:
+        parser.error("--target-ssim and --max-kb need NumPy (pip install numpy)")
+
+    formats = [fmt.strip().lower() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in FORMAT_NAMES]
+    if unknown or not formats:
+        parser.error(f"--formats must be a list of {', '.join(FORMAT_NAMES)}")
+
+    folders = list(args.folders)
+    if args.all:
+        folders.extend(str(folder) for folder in find_client_folders(Path(__file__).resolve().parent))
+    if not folders:
+        folders = [None]
+
+    start = time.perf_counter()
+    totals = [0, 0, 0]
+    for folder in folders:
+        counts = create_light_images(folder, jobs=args.jobs, force=args.force, method=args.method, formats=formats,
+                                     search=search)
+        totals = [a + b for a, b in zip(totals, counts)]
+        if args.tiles:
+            create_tile_pyramids(folder, jobs=args.jobs, force=args.force, method=args.method)
+
+    if len(folders) > 1:
+        print(f"\nAll clients: {totals[0]} processed, {totals[1]} skipped, {totals[2]} errors "
+              f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
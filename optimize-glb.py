@@ -0,0 +1,742 @@
+#!/usr/bin/env python3
+"""
+GLB Optimizer for 360° Product Viewer
+Rewrites the 3D models (3D/*.glb) of client folders for smaller downloads and a faster start:
+merges duplicate accessors and meshes, quantizes positions and normals (KHR_mesh_quantization),
+drops unused attributes and nodes, and stores world-space bounds of every object in extras
+so viewer3d.js does not have to walk the vertices
+
+Usage:
+    python optimize-glb.py                # every client folder
+    python optimize-glb.py CLT695425      # one client folder
+    python optimize-glb.py --force        # re-optimize models that are up to date
+
+The original of every model is kept in 3D/source/ and each run starts from it.
+Dropping a new model into 3D/ replaces the kept original.
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+
+MODELS_DIR = "3D"
+SOURCE_DIR = "source"  # Untouched originals, inside 3D/
+OPTIMIZER_SIGNATURE = "optimize-glb/1 p16 n8"  # Stored in asset.extras; change it to rebuild every model
+
+GLB_MAGIC = b'glTF'
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+BYTE, UNSIGNED_BYTE, SHORT, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT = 5120, 5121, 5122, 5123, 5125, 5126
+COMPONENT_TYPECODES = {BYTE: 'b', UNSIGNED_BYTE: 'B', SHORT: 'h', UNSIGNED_SHORT: 'H', UNSIGNED_INT: 'I', FLOAT: 'f'}
+NORMALIZED_SCALES = {BYTE: 127, UNSIGNED_BYTE: 255, SHORT: 32767, UNSIGNED_SHORT: 65535}
+TYPE_COMPONENTS = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT2': 4, 'MAT3': 9, 'MAT4': 16}
+
+QUANTIZATION = 'KHR_mesh_quantization'
+POSITION_STEPS = 65535  # 16-bit positions across the mesh's largest extent
+NORMAL_STEPS = 127  # 8-bit signed normals
+# Models using these are already compressed and are left alone
+UNSUPPORTED_EXTENSIONS = {'KHR_draco_mesh_compression', 'EXT_meshopt_compression'}
+
+
+class Accessor:
+    """An accessor decoded into a flat array of its component values"""
+
+    def __init__(self, component_type, type_, values, normalized=False):
+        self.component_type = component_type
+        self.type = type_
+        self.values = values
+        self.normalized = normalized
+
+    @property
+    def components(self):
+        return TYPE_COMPONENTS[self.type]
+
+    @property
+    def count(self):
+        return len(self.values) // self.components
+
+    def floats(self):
+        """Component values as Python floats, dequantized like a GPU would"""
+        if self.normalized:
+            scale = NORMALIZED_SCALES[self.component_type]
+            return [max(value / scale, -1.0) for value in self.values]
+        return [float(value) for value in self.values]
+
+    def bounds(self):
+        """Per-component (min, max) lists"""
+        n = self.components
+        return ([min(self.values[i::n]) for i in range(n)],
+                [max(self.values[i::n]) for i in range(n)])
+
+    def key(self):
+        """Identity of the stored data, for merging duplicates"""
+        return (self.component_type, self.type, self.normalized, self.values.tobytes())
+
+
+# ============================================
+# GLB CONTAINER
+# ============================================
+
+def read_glb(path):
+    """Return (gltf JSON, BIN chunk bytes) of a binary glTF file"""
+    data = Path(path).read_bytes()
+    if len(data) < 12:
+        raise ValueError("file too short")
+    magic, version, length = struct.unpack_from('<4sII', data)
+    if magic != GLB_MAGIC or version != 2:
+        raise ValueError("not a glTF 2.0 binary")
+
+    gltf, binary = None, b''
+    offset = 12
+    while offset + 8 <= min(length, len(data)):
+        chunk_length, chunk_type = struct.unpack_from('<II', data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == CHUNK_JSON:
+            gltf = json.loads(chunk)
+        elif chunk_type == CHUNK_BIN and not binary:
+            binary = chunk
+        offset += 8 + chunk_length
+    if gltf is None:
+        raise ValueError("missing JSON chunk")
+    return gltf, binary
+
+
+def write_glb(path, gltf, binary):
+    """Write a binary glTF file atomically"""
+    json_bytes = json.dumps(gltf, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    json_bytes += b' ' * (-len(json_bytes) % 4)
+    binary += b'\0' * (-len(binary) % 4)
+    length = 12 + 8 + len(json_bytes) + (8 + len(binary) if binary else 0)
+
+    temp_path = path.with_name(path.name + '.tmp')
+    with open(temp_path, 'wb') as f:
+        f.write(struct.pack('<4sII', GLB_MAGIC, 2, length))
+        f.write(struct.pack('<II', len(json_bytes), CHUNK_JSON))
+        f.write(json_bytes)
+        if binary:
+            f.write(struct.pack('<II', len(binary), CHUNK_BIN))
+            f.write(binary)
+    os.replace(temp_path, path)
+
+
+def check_supported(gltf):
+    """Raise ValueError for models this tool cannot rewrite safely"""
+    compressed = UNSUPPORTED_EXTENSIONS.intersection(gltf.get('extensionsUsed', []))
+    if compressed:
+        raise ValueError(f"already compressed ({', '.join(sorted(compressed))})")
+    if any('uri' in buffer for buffer in gltf.get('buffers', [])):
+        raise ValueError("external buffers are not supported")
+    if any('sparse' in accessor or 'bufferView' not in accessor for accessor in gltf.get('accessors', [])):
+        raise ValueError("sparse accessors are not supported")
+
+
+def decode_accessor(gltf, binary, accessor_def):
+    """Read an accessor's elements into an Accessor, removing any interleaving"""
+    view = gltf['bufferViews'][accessor_def['bufferView']]
+    values = array(COMPONENT_TYPECODES[accessor_def['componentType']])
+    components = TYPE_COMPONENTS[accessor_def['type']]
+    element = values.itemsize * components
+    stride = view.get('byteStride') or element
+    start = view.get('byteOffset', 0) + accessor_def.get('byteOffset', 0)
+    count = accessor_def['count']
+
+    if stride == element:
+        values.frombytes(binary[start:start + count * element])
+    else:
+        for i in range(count):
+            values.frombytes(binary[start + i * stride:start + i * stride + element])
+    if len(values) != count * components:
+        raise ValueError("accessor data out of range")
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return Accessor(accessor_def['componentType'], accessor_def['type'], values,
+                    accessor_def.get('normalized', False))
+
+
+def accessor_refs(gltf):
+    """Yield (container, key, role) for every accessor reference, for remapping"""
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh['primitives']:
+            for attributes in [primitive['attributes'], *primitive.get('targets', [])]:
+                for name in attributes:
+                    yield attributes, name, name
+            if 'indices' in primitive:
+                yield primitive, 'indices', 'indices'
+    for skin in gltf.get('skins', []):
+        if 'inverseBindMatrices' in skin:
+            yield skin, 'inverseBindMatrices', 'inverseBindMatrices'
+    for animation in gltf.get('animations', []):
+        for sampler in animation['samplers']:
+            yield sampler, 'input', 'input'
+            yield sampler, 'output', 'output'
+
+
+# ============================================
+# TRANSFORMS
+# ============================================
+
+def node_matrix(node):
+    """Local transform of a node as a column-major 4x4 list"""
+    if 'matrix' in node:
+        return list(node['matrix'])
+    x, y, z, w = node.get('rotation', [0, 0, 0, 1])
+    sx, sy, sz = node.get('scale', [1, 1, 1])
+    tx, ty, tz = node.get('translation', [0, 0, 0])
+    return [
+        (1 - 2 * (y * y + z * z)) * sx, (2 * (x * y + z * w)) * sx, (2 * (x * z - y * w)) * sx, 0,
+        (2 * (x * y - z * w)) * sy, (1 - 2 * (x * x + z * z)) * sy, (2 * (y * z + x * w)) * sy, 0,
+        (2 * (x * z + y * w)) * sz, (2 * (y * z - x * w)) * sz, (1 - 2 * (x * x + y * y)) * sz, 0,
+        tx, ty, tz, 1,
+    ]
+
+
+def multiply(a, b):
+    """Product of two column-major 4x4 matrices"""
+    return [sum(a[k * 4 + row] * b[col * 4 + k] for k in range(4)) for col in range(4) for row in range(4)]
+
+
+def transform_point(m, x, y, z):
+    return (m[0] * x + m[4] * y + m[8] * z + m[12],
+            m[1] * x + m[5] * y + m[9] * z + m[13],
+            m[2] * x + m[6] * y + m[10] * z + m[14])
+
+
+def world_matrices(gltf):
+    """World matrix of every node reachable from a scene"""
+    nodes = gltf.get('nodes', [])
+    matrices = {}
+
+    def visit(index, parent):
+        matrices[index] = multiply(parent, node_matrix(nodes[index]))
+        for child in nodes[index].get('children', []):
+            visit(child, matrices[index])
+
+    identity = [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]
+    for scene in gltf.get('scenes', []):
+        for root in scene.get('nodes', []):
+            visit(root, identity)
+    return matrices
+
+
+def fold_dequantization(node, offset, scale):
+    """Change a node's transform so it maps quantized positions q to offset + scale * q"""
+    if 'matrix' in node:
+        m = node['matrix']
+        ox, oy, oz = offset
+        node['matrix'] = [value * scale for value in m[:12]] + [
+            m[0] * ox + m[4] * oy + m[8] * oz + m[12],
+            m[1] * ox + m[5] * oy + m[9] * oz + m[13],
+            m[2] * ox + m[6] * oy + m[10] * oz + m[14],
+            m[3] * ox + m[7] * oy + m[11] * oz + m[15],
+        ]
+        return
+    sx, sy, sz = node.get('scale', [1, 1, 1])
+    tx, ty, tz = node.get('translation', [0, 0, 0])
+    # Rotate the scaled offset into the parent space
+    rotation = node_matrix({'rotation': node.get('rotation', [0, 0, 0, 1])})
+    dx, dy, dz = transform_point(rotation, sx * offset[0], sy * offset[1], sz * offset[2])
+    node['translation'] = [tx + dx, ty + dy, tz + dz]
+    node['scale'] = [sx * scale, sy * scale, sz * scale]
+
+
+# ============================================
+# OPTIMIZATION PASSES
+# ============================================
+
+def write_bounds(gltf, accessors):
+    """Store world-space bounds of every mesh node and scene in their extras.
+
+    ``extras.bounds`` is ``{min, max, center, radius}`` (box and bounding
+    sphere), nodes also get ``extras.primitiveBounds``: one
+    ``[minX, minY, minZ, maxX, maxY, maxZ]`` per primitive, in order.
+    GLTFLoader copies extras to ``userData``.
+    """
+    nodes = gltf.get('nodes', [])
+    matrices = world_matrices(gltf)
+    node_bounds = {}
+
+    for index, matrix in matrices.items():
+        node = nodes[index]
+        if 'mesh' not in node:
+            continue
+        points = []
+        primitive_bounds = []
+        for primitive in gltf['meshes'][node['mesh']]['primitives']:
+            position = primitive['attributes'].get('POSITION')
+            if position is None:
+                continue
+            values = accessors[position].floats()
+            transformed = [transform_point(matrix, *values[i:i + 3]) for i in range(0, len(values), 3)]
+            if not transformed:
+                continue
+            points.extend(transformed)
+            primitive_bounds.append([round(min(p[axis] for p in transformed), 4) for axis in range(3)] +
+                                    [round(max(p[axis] for p in transformed), 4) for axis in range(3)])
+        if not points:
+            continue
+        low = [min(p[axis] for p in points) for axis in range(3)]
+        high = [max(p[axis] for p in points) for axis in range(3)]
+        center = [(low[axis] + high[axis]) / 2 for axis in range(3)]
+        radius = max(math.dist(center, p) for p in points)
+        node_bounds[index] = (low, high, center, radius)
+        extras = node.setdefault('extras', {})
+        extras['bounds'] = bounds_extras(low, high, center, radius)
+        extras['primitiveBounds'] = primitive_bounds
+
+    for scene in gltf.get('scenes', []):
+        members = [node_bounds[index] for index in scene_nodes(gltf, scene) if index in node_bounds]
+        if not members:
+            continue
+        low = [min(bounds[0][axis] for bounds in members) for axis in range(3)]
+        high = [max(bounds[1][axis] for bounds in members) for axis in range(3)]
+        center = [(low[axis] + high[axis]) / 2 for axis in range(3)]
+        radius = max(math.dist(center, bounds[2]) + bounds[3] for bounds in members)
+        scene.setdefault('extras', {})['bounds'] = bounds_extras(low, high, center, radius)
+
+
+def bounds_extras(low, high, center, radius):
+    return {
+        'min': [round(value, 4) for value in low],
+        'max': [round(value, 4) for value in high],
+        'center': [round(value, 4) for value in center],
+        'radius': round(radius, 4),
+    }
+
+
+def scene_nodes(gltf, scene):
+    """All node indices of a scene, depth first"""
+    nodes = gltf.get('nodes', [])
+    stack = list(scene.get('nodes', []))
+    while stack:
+        index = stack.pop()
+        yield index
+        stack.extend(nodes[index].get('children', []))
+
+
+def prune_nodes(gltf):
+    """Drop nodes outside every scene and nodes carrying nothing (no mesh, camera, skin or kept children).
+
+    Returns the number of nodes removed.
+    """
+    nodes = gltf.get('nodes', [])
+    # Joints and animated nodes are kept as they are
+    pinned = {joint for skin in gltf.get('skins', []) for joint in skin['joints']}
+    pinned.update(channel['target']['node'] for animation in gltf.get('animations', [])
+                  for channel in animation['channels'] if 'node' in channel['target'])
+    keep = set(pinned)
+
+    def visit(index):
+        node = nodes[index]
+        kept_children = [child for child in node.get('children', []) if visit(child)]
+        if (kept_children or index in pinned or node.get('extensions')
+                or any(key in node for key in ('mesh', 'camera', 'skin'))):
+            keep.add(index)
+            return True
+        return False
+
+    for scene in gltf.get('scenes', []):
+        for root in scene.get('nodes', []):
+            visit(root)
+
+    remap = {old: new for new, old in enumerate(sorted(keep))}
+    new_nodes = []
+    for old in sorted(keep):
+        node = nodes[old]
+        if 'children' in node:
+            children = [remap[child] for child in node['children'] if child in remap]
+            if children:
+                node['children'] = children
+            else:
+                del node['children']
+        new_nodes.append(node)
+    gltf['nodes'] = new_nodes
+
+    for scene in gltf.get('scenes', []):
+        scene['nodes'] = [remap[index] for index in scene.get('nodes', []) if index in remap]
+    for skin in gltf.get('skins', []):
+        skin['joints'] = [remap[joint] for joint in skin['joints']]
+        if 'skeleton' in skin:
+            skin['skeleton'] = remap.get(skin['skeleton'], skin['joints'][0])
+    for animation in gltf.get('animations', []):
+        for channel in animation['channels']:
+            if 'node' in channel['target']:
+                channel['target']['node'] = remap[channel['target']['node']]
+    return len(nodes) - len(new_nodes)
+
+
+def material_needs(material):
+    """(texCoord sets, needs tangents) for the textures a material references"""
+    tex_coords = set()
+    tangents = False
+
+    def walk(value, key=''):
+        nonlocal tangents
+        if isinstance(value, dict):
+            if isinstance(value.get('index'), int):
+                transform = value.get('extensions', {}).get('KHR_texture_transform', {})
+                tex_coords.add(transform.get('texCoord', value.get('texCoord', 0)))
+                if key.endswith('ormalTexture') or key.startswith('anisotropy'):
+                    tangents = True
+            for child_key, child in value.items():
+                walk(child, child_key)
+        elif isinstance(value, list):
+            for child in value:
+                walk(child, key)
+
+    walk(material or {})
+    return tex_coords, tangents
+
+
+def drop_unused_attributes(gltf):
+    """Remove texture coordinates, tangents and skin weights nothing uses. Returns the count removed."""
+    materials = gltf.get('materials', [])
+    skinned = {node['mesh'] for node in gltf.get('nodes', []) if 'skin' in node and 'mesh' in node}
+    dropped = 0
+    for mesh_index, mesh in enumerate(gltf.get('meshes', [])):
+        for primitive in mesh['primitives']:
+            material = materials[primitive['material']] if 'material' in primitive else None
+            tex_coords, tangents = material_needs(material)
+            for attributes in [primitive['attributes'], *primitive.get('targets', [])]:
+                for name in list(attributes):
+                    unused = (
+                        (name.startswith('TEXCOORD_') and int(name[9:]) not in tex_coords)
+                        or (name == 'TANGENT' and not tangents)
+                        or (name.startswith(('JOINTS_', 'WEIGHTS_')) and mesh_index not in skinned)
+                    )
+                    if unused:
+                        del attributes[name]
+                        dropped += 1
+    return dropped
+
+
+def quantize_meshes(gltf, accessors):
+    """Store positions as 16-bit and normals as 8-bit integers (KHR_mesh_quantization).
+
+    Positions are mapped onto 0..65535 over the mesh's largest extent and
+    the nodes using the mesh get the matching offset and uniform scale, so
+    world coordinates do not change. They are not normalized, because
+    three.js reads raw attribute values when raycasting and computing
+    bounding boxes. Returns the number of meshes quantized.
+    """
+    nodes = gltf.get('nodes', [])
+    instances = {}
+    for node in nodes:
+        if 'mesh' in node:
+            instances.setdefault(node['mesh'], []).append(node)
+
+    quantized_positions = {}
+    quantized_normals = {}
+    count = 0
+    for mesh_index, mesh in enumerate(gltf.get('meshes', [])):
+        users = instances.get(mesh_index, [])
+        # Folding the scale into a node would also scale its children and cameras
+        if not users or any(key in node for node in users for key in ('children', 'camera', 'skin')):
+            continue
+        if any('targets' in primitive for primitive in mesh['primitives']):
+            continue
+        positions = [primitive['attributes']['POSITION'] for primitive in mesh['primitives']
+                     if 'POSITION' in primitive['attributes']]
+        if not positions or any(accessors[index].component_type != FLOAT for index in positions):
+            continue
+
+        bounds = [accessors[index].bounds() for index in positions]
+        low = [min(mins[axis] for mins, _ in bounds) for axis in range(3)]
+        high = [max(maxs[axis] for _, maxs in bounds) for axis in range(3)]
+        extent = max(high[axis] - low[axis] for axis in range(3)) or 1.0
+        scale = extent / POSITION_STEPS
+
+        for primitive in mesh['primitives']:
+            attributes = primitive['attributes']
+            if 'POSITION' in attributes:
+                key = (attributes['POSITION'], tuple(low), scale)
+                if key not in quantized_positions:
+                    values = accessors[attributes['POSITION']].values
+                    quantized = array('H', (min(POSITION_STEPS, max(0, round((value - low[i % 3]) / scale)))
+                                            for i, value in enumerate(values)))
+                    accessors.append(Accessor(UNSIGNED_SHORT, 'VEC3', quantized))
+                    quantized_positions[key] = len(accessors) - 1
+                attributes['POSITION'] = quantized_positions[key]
+            normal = attributes.get('NORMAL')
+            if normal is not None and accessors[normal].component_type == FLOAT:
+                if normal not in quantized_normals:
+                    quantized = array('b', (min(NORMAL_STEPS, max(-NORMAL_STEPS, round(value * NORMAL_STEPS)))
+                                            for value in accessors[normal].values))
+                    accessors.append(Accessor(BYTE, 'VEC3', quantized, normalized=True))
+                    quantized_normals[normal] = len(accessors) - 1
+                attributes['NORMAL'] = quantized_normals[normal]
+
+        for node in users:
+            fold_dequantization(node, low, scale)
+        count += 1
+
+    if count:
+        for key in ('extensionsUsed', 'extensionsRequired'):
+            extensions = gltf.setdefault(key, [])
+            if QUANTIZATION not in extensions:
+                extensions.append(QUANTIZATION)
+    return count
+
+
+def shrink_indices(accessors, gltf):
+    """Use 16-bit indices where every index fits"""
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh['primitives']:
+            accessor = accessors[primitive['indices']] if 'indices' in primitive else None
+            if accessor is not None and accessor.component_type == UNSIGNED_INT and max(accessor.values, default=0) < 65535:
+                accessor.component_type = UNSIGNED_SHORT
+                accessor.values = array('H', accessor.values)
+
+
+def rebuild_buffer(gltf, accessors, binary):
+    """Write referenced accessors (duplicates merged) and images into a fresh BIN chunk.
+
+    Returns (new BIN bytes, number of duplicate accessors merged).
+    """
+    out = bytearray()
+    views = []
+    new_accessors = []
+    by_key = {}
+    remap = {}
+    merged = 0
+
+    def add_view(data, target=None, stride=None):
+        out.extend(b'\0' * (-len(out) % 4))
+        view = {'buffer': 0, 'byteOffset': len(out), 'byteLength': len(data)}
+        if stride:
+            view['byteStride'] = stride
+        if target:
+            view['target'] = target
+        out.extend(data)
+        views.append(view)
+        return len(views) - 1
+
+    for container, key, role in accessor_refs(gltf):
+        old = container[key]
+        if old not in remap:
+            accessor = accessors[old]
+            identity = (role == 'indices', role in ('input', 'output', 'inverseBindMatrices'), accessor.key())
+            if identity in by_key:
+                remap[old] = by_key[identity]
+                merged += 1
+            else:
+                values = accessor.values
+                if sys.byteorder == 'big':
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                data = values.tobytes()
+                element = values.itemsize * accessor.components
+                target = stride = None
+                if role == 'indices':
+                    target = ELEMENT_ARRAY_BUFFER
+                elif role not in ('input', 'output', 'inverseBindMatrices'):
+                    target = ARRAY_BUFFER
+                    # Vertex attributes must start on 4-byte boundaries
+                    if element % 4:
+                        stride = element + (-element % 4)
+                        padding = b'\0' * (stride - element)
+                        data = b''.join(data[i:i + element] + padding for i in range(0, len(data), element))
+                accessor_def = {
+                    'bufferView': add_view(data, target, stride),
+                    'componentType': accessor.component_type,
+                    'count': accessor.count,
+                    'type': accessor.type,
+                }
+                if accessor.normalized:
+                    accessor_def['normalized'] = True
+                if role in ('POSITION', 'input'):
+                    accessor_def['min'], accessor_def['max'] = accessor.bounds()
+                new_accessors.append(accessor_def)
+                by_key[identity] = remap[old] = len(new_accessors) - 1
+        container[key] = remap[old]
+
+    for image in gltf.get('images', []):
+        if 'bufferView' in image:
+            view = gltf['bufferViews'][image['bufferView']]
+            start = view.get('byteOffset', 0)
+            image['bufferView'] = add_view(binary[start:start + view['byteLength']])
+
+    gltf['accessors'] = new_accessors
+    gltf['bufferViews'] = views
+    gltf['buffers'] = [{'byteLength': len(out)}] if out else []
+    for key in ('accessors', 'bufferViews', 'buffers'):
+        if not gltf[key]:
+            del gltf[key]
+    return bytes(out), merged
+
+
+def merge_duplicate_meshes(gltf):
+    """Point nodes at one copy of identical meshes and drop meshes no node uses.
+
+    Meshes only count as identical if their names match too: GLTFLoader
+    names the objects of multi-primitive meshes after the mesh, and
+    viewer3d.js shows those names and loads plans by them.
+    Returns the number of meshes removed.
+    """
+    meshes = gltf.get('meshes', [])
+    used = sorted({node['mesh'] for node in gltf.get('nodes', []) if 'mesh' in node})
+    by_key = {}
+    remap = {}
+    new_meshes = []
+    for old in used:
+        key = json.dumps(meshes[old], sort_keys=True)
+        if key not in by_key:
+            new_meshes.append(meshes[old])
+            by_key[key] = len(new_meshes) - 1
+        remap[old] = by_key[key]
+    for node in gltf.get('nodes', []):
+        if 'mesh' in node:
+            node['mesh'] = remap[node['mesh']]
+    if new_meshes:
+        gltf['meshes'] = new_meshes
+    else:
+        gltf.pop('meshes', None)
+    return len(meshes) - len(new_meshes)
+
+
+def optimize_model(source, output):
+    """Optimize source into output, returns a dict of before/after statistics"""
+    start = time.perf_counter()
+    gltf, binary = read_glb(source)
+    check_supported(gltf)
+    before = {
+        'bytes': source.stat().st_size,
+        'nodes': len(gltf.get('nodes', [])),
+        'meshes': len(gltf.get('meshes', [])),
+        'accessors': len(gltf.get('accessors', [])),
+    }
+    accessors = [decode_accessor(gltf, binary, accessor_def) for accessor_def in gltf.get('accessors', [])]
+
+    write_bounds(gltf, accessors)
+    pruned = prune_nodes(gltf)
+    dropped = drop_unused_attributes(gltf)
+    quantized = quantize_meshes(gltf, accessors)
+    shrink_indices(accessors, gltf)
+    binary, merged_accessors = rebuild_buffer(gltf, accessors, binary)
+    merged_meshes = merge_duplicate_meshes(gltf)
+    gltf.setdefault('asset', {'version': '2.0'}).setdefault('extras', {})['optimizer'] = OPTIMIZER_SIGNATURE
+
+    write_glb(output, gltf, binary)
+    return {
+        'before': before,
+        'after': {
+            'bytes': output.stat().st_size,
+            'nodes': len(gltf.get('nodes', [])),
+            'meshes': len(gltf.get('meshes', [])),
+            'accessors': len(gltf.get('accessors', [])),
+        },
+        'pruned_nodes': pruned,
+        'dropped_attributes': dropped,
+        'quantized_meshes': quantized,
+        'merged_accessors': merged_accessors,
+        'merged_meshes': merged_meshes,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+# ============================================
+# CLIENT FOLDERS
+# ============================================
+
+def optimizer_signature(path):
+    """The optimizer signature stored in a GLB, or None for an original model"""
+    try:
+        gltf, _ = read_glb(path)
+    except (OSError, ValueError):
+        return None
+    return gltf.get('asset', {}).get('extras', {}).get('optimizer')
+
+
+def optimize_folder(models_path, force=False):
+    """Optimize every GLB in a 3D folder. Returns (processed, skipped, errors, bytes before, bytes after)."""
+    source_path = models_path / SOURCE_DIR
+    processed = skipped = errors = 0
+    total_before = total_after = 0
+
+    for model in sorted(models_path.glob('*.glb')):
+        source = source_path / model.name
+        signature = optimizer_signature(model)
+        if signature is None or not source.exists():
+            # A new or replaced original: keep it before overwriting the model
+            source_path.mkdir(exist_ok=True)
+            shutil.copy2(model, source)
+        elif (not force and signature == OPTIMIZER_SIGNATURE
+              and model.stat().st_mtime_ns >= source.stat().st_mtime_ns):
+            print(f"- {model}: up to date")
+            skipped += 1
+            continue
+
+        try:
+            stats = optimize_model(source, model)
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            print(f"✗ {model}: {e}")
+            errors += 1
+            continue
+
+        before, after = stats['before'], stats['after']
+        reduction = (1 - after['bytes'] / before['bytes']) * 100 if before['bytes'] else 0
+        print(f"✓ {model} ({stats['seconds']:.2f}s)")
+        print(f"  {before['bytes'] / 1024:.1f}KB → {after['bytes'] / 1024:.1f}KB (-{reduction:.1f}%)")
+        print(f"  nodes {before['nodes']} → {after['nodes']}, meshes {before['meshes']} → {after['meshes']}, "
+              f"accessors {before['accessors']} → {after['accessors']}")
+        print(f"  {stats['merged_accessors']} duplicate accessor(s) and {stats['merged_meshes']} mesh(es) merged, "
+              f"{stats['quantized_meshes']} mesh(es) quantized, {stats['pruned_nodes']} node(s) and "
+              f"{stats['dropped_attributes']} attribute(s) dropped")
+        processed += 1
+        total_before += before['bytes']
+        total_after += after['bytes']
+    return processed, skipped, errors, total_before, total_after
+
+
+def find_client_folders(root_path):
+    """All folders next to this script that contain 3D models"""
+    return sorted(item for item in root_path.iterdir()
+                  if item.is_dir() and not item.name.startswith('.') and any((item / MODELS_DIR).glob('*.glb')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Optimize the GLB models of the 360° viewer')
+    parser.add_argument('folders', nargs='*', help='Client folders containing 3D/ (default: all client folders)')
+    parser.add_argument('--force', action='store_true', help='Re-optimize models that are up to date')
+    args = parser.parse_args()
+
+    root_path = Path(__file__).resolve().parent
+    folders = [Path(folder) for folder in args.folders] or find_client_folders(root_path)
+
+    print("=" * 60)
+    print("Optimizing 3D Models for 360° Viewer")
+    print("=" * 60)
+    print()
+
+    start = time.perf_counter()
+    totals = [0, 0, 0, 0, 0]
+    for folder in folders:
+        models_path = folder / MODELS_DIR
+        if not models_path.is_dir():
+            print(f"Warning: {models_path} does not exist, skipping...")
+            continue
+        counts = optimize_folder(models_path, force=args.force)
+        totals = [a + b for a, b in zip(totals, counts)]
+
+    processed, skipped, errors, total_before, total_after = totals
+    print("\n" + "=" * 60)
+    print(f"Optimized {processed} model(s), {skipped} up to date, {errors} error(s) "
+          f"in {time.perf_counter() - start:.1f}s")
+    if total_before:
+        print(f"{total_before / 1024:.0f}KB → {total_after / 1024:.0f}KB "
+              f"(-{(1 - total_after / total_before) * 100:.1f}%)")
+    print(f"Originals are kept in {MODELS_DIR}/{SOURCE_DIR}/")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Precompress assets for the 360° Image Viewer
+Writes .gz (and .br when the brotli package is installed) siblings next to every
+text asset and 3D model, so server.py can send them without compressing per request
+
+Usage:
+    python precompress-assets.py                # viewer files + every client folder
+    python precompress-assets.py CLT695425      # one client folder
+"""
+
+import argparse
+import gzip
+import time
+from pathlib import Path
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Same set server.py negotiates Content-Encoding for
+COMPRESSIBLE_EXTENSIONS = {'.html', '.htm', '.js', '.css', '.json', '.svg', '.csv', '.txt', '.glb', '.gltf', '.bin'}
+MIN_SIZE = 256  # Smaller files are not worth a sibling
+SKIP_DIRS = {'.git', '__pycache__', 'node_modules', 'dist'}
+
+
+def iter_assets(folder: Path, recursive: bool):
+    """Yield compressible files in folder"""
+    pattern = '**/*' if recursive else '*'
+    for file in sorted(folder.glob(pattern)):
+        if not file.is_file() or SKIP_DIRS.intersection(file.relative_to(folder).parts):
+            continue
+        if file.suffix.lower() in COMPRESSIBLE_EXTENSIONS and file.stat().st_size >= MIN_SIZE:
+            yield file
+
+
+def write_sibling(source: Path, suffix: str, data: bytes):
+    """Write a compressed sibling; returns its size, or None if not worth it"""
+    target = source.with_name(source.name + suffix)
+    original_size = source.stat().st_size
+    if len(data) >= original_size:
+        # Compression does not help; remove a stale sibling so it is never served
+        if target.exists():
+            target.unlink()
+        return None
+    target.write_bytes(data)
+    return len(data)
+
+
+def is_fresh(source: Path, suffix: str) -> bool:
+    """True if the sibling exists and is not older than its source"""
+    target = source.with_name(source.name + suffix)
+    return target.exists() and target.stat().st_mtime_ns >= source.stat().st_mtime_ns
+
+
+def precompress_file(source: Path, force: bool = False):
+    """Create .gz/.br siblings for one file, returns {suffix: size}"""
+    data = source.read_bytes()
+    results = {}
+    suffixes = ['.gz', '.br'] if BROTLI_AVAILABLE else ['.gz']
+    for suffix in suffixes:
+        if not force and is_fresh(source, suffix):
+            results[suffix] = source.with_name(source.name + suffix).stat().st_size
+            continue
+        if suffix == '.gz':
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        else:
+            mode = brotli.MODE_GENERIC if source.suffix.lower() in {'.glb', '.bin'} else brotli.MODE_TEXT
+            compressed = brotli.compress(data, quality=11, mode=mode)
+        results[suffix] = write_sibling(source, suffix, compressed)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompress text assets and 3D models')
+    parser.add_argument('folders', nargs='*', help='Client folders to process (default: viewer files and all clients)')
+    parser.add_argument('--force', action='store_true', help='Recompress even if siblings are up to date')
+    args = parser.parse_args()
+
+    root_path = Path(__file__).parent
+
+    # (folder, recursive) pairs
+    targets = []
+    if args.folders:
+        targets = [(Path(folder), True) for folder in args.folders]
+    else:
+        targets.append((root_path, False))
+        for sub in ('js', 'img', 'dist'):
+            if (root_path / sub).is_dir():
+                targets.append((root_path / sub, True))
+        for item in sorted(root_path.iterdir()):
+            if item.is_dir() and (item / '3D-Images').exists():
+                targets.append((item, True))
+
+    print("=" * 60)
+    print("Precompressing Assets for 360° Viewer")
+    print("=" * 60)
+    print(f"\nEncodings: gzip{', brotli' if BROTLI_AVAILABLE else ' (install brotli for .br)'}\n")
+
+    start = time.perf_counter()
+    total_original = 0
+    total_best = 0
+    file_count = 0
+
+    for folder, recursive in targets:
+        if not folder.is_dir():
+            print(f"Warning: {folder} does not exist, skipping...")
+            continue
+        for source in iter_assets(folder, recursive):
+            try:
+                results = precompress_file(source, force=args.force)
+            except OSError as e:
+                print(f"✗ {source}: {e}")
+                continue
+            original = source.stat().st_size
+            sizes = {suffix: size for suffix, size in results.items() if size}
+            best = min(sizes.values()) if sizes else original
+            total_original += original
+            total_best += best
+            file_count += 1
+            details = ', '.join(f"{suffix} {size / 1024:.1f}KB" for suffix, size in sizes.items()) or 'not compressible'
+            print(f"✓ {source.relative_to(root_path) if source.is_relative_to(root_path) else source}: "
+                  f"{original / 1024:.1f}KB → {details}")
+
+    elapsed = time.perf_counter() - start
+    saved = (1 - total_best / total_original) * 100 if total_original else 0
+    print("\n" + "=" * 60)
+    print(f"Processed {file_count} file(s) in {elapsed:.1f}s")
+    print(f"{total_original / 1024:.0f}KB → {total_best / 1024:.0f}KB (-{saved:.1f}%)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,13 @@
 """
 Simple HTTP Server for 360° Image Viewer
 Run this script to serve the viewer on a random available port
+
+Production mode (no browser, fixed bind address, per-request latency log):
+    python server.py --production --host 0.0.0.0 --port 8080 --workers 64
 """
 
+import argparse
 import http.server
-import socketserver
 import os
 import socket
 import random
@@ -13,44 +16,2190 @@ import webbrowser
 import threading
 import time
 import json
+import math
+import queue
+import re
+import csv
+import bisect
+import uuid
+import gzip
+import hashlib
+import importlib.util
+import email.utils
+import urllib.parse
+from collections import OrderedDict, deque
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Production defaults
+# Every open connection holds a worker, idle or not, and browsers open up to 6 per host: the
+# pool keeps about DEFAULT_WORKERS / 6 visitors connected at once. A short idle timeout hands
+# workers back soon after a viewer's burst of frame requests, at the cost of a new handshake
+# for a visitor who pauses longer; raise --workers (idle threads are cheap) for more visitors.
+DEFAULT_WORKERS = 64  # Concurrent connections handled by the thread pool
+DEFAULT_MAX_PENDING = 128  # Accepted connections waiting for a free worker
+KEEP_ALIVE_TIMEOUT = 5  # Seconds an idle keep-alive connection may hold a worker
+DEFAULT_CACHE_MB = 256  # Memory budget of the hot-file cache
+DEFAULT_CACHE_MAX_FILE_MB = 4  # Larger files bypass the cache and go out via sendfile
+COMPRESSED_CACHE_MB = 64  # Memory for on-the-fly compressed responses
+MAX_COMPRESS_MB = 32  # Larger files are never compressed on the fly
+
+# Text assets and models worth compressing (images are already compressed)
+COMPRESSIBLE_EXTENSIONS = {'.html', '.htm', '.js', '.css', '.json', '.svg', '.csv', '.txt', '.glb', '.gltf', '.bin'}
+GZIP_LEVEL = 6  # On-the-fly levels favour speed; precompress-assets.py uses the maximum
+BROTLI_QUALITY = 5
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_SCRIPT = 'create-image-manifest.py'  # Single source of the manifest rules
+TILE_DESCRIPTOR = 'descriptor.json'  # Written by create-light-images.py --tiles
+# Encodings a format-neutral frame URL ("3D-Images/light/12") can resolve to
+FRAME_FORMATS = [('.avif', 'image/avif'), ('.webp', 'image/webp'), ('.jpg', 'image/jpeg'),
+                 ('.jpeg', 'image/jpeg'), ('.png', 'image/png')]
+# Only sent when listed in Accept; every browser decodes JPEG and PNG
+NEGOTIATED_TYPES = {'image/avif', 'image/webp'}
+TILE_FORMAT = 'webp'
+STREAM_TIERS = ('light', 'full')  # Manifest frame lists /frames/stream can send
+HIT_MAP_INDEX = 'index.json'  # Written by create-hit-maps.py next to the per-frame maps
+HIT_MAP_FORMAT = 'png'
+GLB_SCRIPT = 'optimize-glb.py'  # Reads GLB containers for the unit/object join
+UNITS_DIR = 'Units-Lists'  # Client folder holding the unit list CSV
+UNITS_PAGE_SIZE = 50
+UNITS_MAX_PAGE_SIZE = 500
+UNITS_CACHED_QUERIES = 256  # Encoded query responses kept per unit table
+# Canonical field names of known unit list columns; other headers are camelCased
+UNIT_FIELDS = {
+    'BLOC': 'block', 'ETAGE': 'floor', 'UNITREF': 'ref', 'TYPE': 'type', 'NUMBER OF ROOMS': 'rooms',
+    'SURFACE TOTAL': 'surface', 'SALEABLE AREA TOTAL': 'saleableSurface',
+    'PRICE PER SQUARE METER': 'pricePerM2', 'PKG': 'parking', 'TOTAL PRICE': 'price',
+    '2D PLAN': 'plan2d', '3D AXONOMETRIC': 'plan3d',
+}
+# Optional unit list column naming the unit's GLB object explicitly (served as the joined `object`)
+UNIT_OBJECT_HEADERS = {'OBJECT', '3D OBJECT', 'OBJECT NAME', 'MESH'}
+# Exporter suffixes of repeated object names: Blender "D-701.001", SketchUp "C-107_ID196082"
+OBJECT_SUFFIX_RE = re.compile(r'(?:\.\d{3}|_ID\d+)$', re.IGNORECASE)
+# Spreadsheet number formats: "5,764,500" / "1,234.5", "5.764.500" / "1.234,5", "108,5"
+COMMA_THOUSANDS_RE = re.compile(r'^-?\d{1,3}(?:,\d{3})+(?:\.\d+)?$')
+DOT_THOUSANDS_RE = re.compile(r'^-?\d{1,3}(?:(?:\.\d{3}){2,}(?:,\d+)?|(?:\.\d{3})+,\d+)$')
+DECIMAL_COMMA_RE = re.compile(r'^-?\d+,\d+$')
+MAX_RANGES = 16  # More ranges than this in one request are ignored (full 200 response)
+# /metrics: latency histogram bounds in seconds, and the most client folders labelled by name
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_CLIENT_FOLDERS = 256  # Distinct client folders told apart by /metrics and the scheduler
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Client timing beacons (POST /beacon): request limits, rolling window, append-only log
+BEACON_MAX_BYTES = 16 * 1024
+BEACON_MAX_SAMPLES = 64  # Samples per beacon
+BEACON_MAX_VALUE = 3600 * 1000  # Milliseconds; larger values are discarded
+BEACON_WINDOW = 2048  # Latest samples per client and metric behind the percentiles
+BEACON_MAX_SERIES = 1024  # Distinct (client, metric) pairs kept
+BEACON_QUEUE = 4096  # Beacons waiting for the log writer; more are dropped from the log
+BEACON_LOG = os.path.join('logs', 'beacons.jsonl')
+BEACON_LOG_MAX_MB = 16  # The log is rotated to .1, .2, ... beyond this size
+BEACON_LOG_BACKUPS = 3
+BEACON_METRIC_RE = re.compile(r'^[A-Za-z][A-Za-z0-9_.-]{0,63}$')
+BEACON_PERCENTILES = (50, 95, 99)
+# Request scheduling
+# Responses one remote address is sent at once over all its connections, 0 for no cap. Off by
+# default: behind a reverse proxy, CDN or carrier NAT many visitors share one address. A single
+# keep-alive connection is only ever sent one response at a time anyway.
+DEFAULT_VISITOR_TRANSFERS = 0
+SCHEDULE_TIMEOUT = 30  # Seconds a request may wait for a transfer slot before a 503
+SEND_CHUNK = 64 * 1024  # Background and rate-capped bodies are written in pieces of this size
+SCHEDULE_TIERS = ('first', 'light', 'full', 'model')  # Most urgent first
+BACKGROUND_TIERS = ('full', 'model')  # Prefetch that yields to the tiers above
+# (path regex, tier), first match wins; anything else (page, scripts, manifest, units) is 'first'.
+# Frame streams are 'light' or 'full' by their tier parameter (see FairScheduler.classify)
+TIER_CLASSES = [
+    (re.compile(r'/(?:tiles|hitmaps)(?:/|$)'), 'light'),
+    (re.compile(r'/3D-Images/light/'), 'light'),
+    (re.compile(r'/3D-Images/'), 'full'),
+    (re.compile(r'\.(?:glb|gltf|bin)$', re.IGNORECASE), 'model'),
+]
+STREAM_RE = re.compile(r'/frames/stream$')
+# A light frame file; the rotation's first frame (manifest index 0, where every visit opens) is 'first'
+LIGHT_FRAME_RE = re.compile(r'/3D-Images/light/([^/]+)$')
+UNSCHEDULED_RE = re.compile(r'^/(?:metrics|beacon)(?:/|$)')  # Monitoring never waits for a slot
+# (path regex, asset class) for /metrics, first match wins
+ASSET_CLASSES = [
+    (re.compile(r'/image-manifest\.json$'), 'manifest'),
+    (re.compile(r'/3D-Images/light/'), 'light_frame'),
+    (re.compile(r'/frames/stream$'), 'frame_stream'),
+    (re.compile(r'/tiles/'), 'tile'),
+    (re.compile(r'/hitmaps(?:/|$)'), 'hit_map'),
+    (re.compile(r'/3D-Images/'), 'full_frame'),
+    (re.compile(r'\.(?:glb|gltf|bin)$', re.IGNORECASE), 'model'),
+    (re.compile(r'/units(?:/|$)'), 'units'),
+    (re.compile(r'\.(?:js|css)$', re.IGNORECASE), 'static'),
+    (re.compile(r'^/metrics$'), 'metrics'),
+    (re.compile(r'^/beacon(?:/|$)'), 'beacon'),
+    (re.compile(r'(?:/|\.html?)$', re.IGNORECASE), 'page'),
+]
+# Preferred order when the client accepts several encodings, with file suffixes
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')] if BROTLI_AVAILABLE else [('gzip', '.gz')]
+
+# Cache-Control policies by path class
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'  # Hashed/versioned URLs never change
+CACHE_MEDIA = 'public, max-age=3600'  # Unversioned frames/models: short TTL, then ETag revalidation
+CACHE_REVALIDATE = 'no-cache'  # Manifest, settings, HTML, JS, CSS: always revalidate (cheap 304)
+CACHE_NONE = 'no-store'  # Dynamic responses (listings, errors)
+
+MEDIA_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.avif', '.gif', '.svg', '.ico', '.glb', '.gltf', '.bin', '.pack'}
+# Bundles of build-bundle.py: "app.3f2a9c1b7e.js", 10 hex characters of content hash (its HASH_LENGTH);
+# other dotted names ("render.20240101.jpg") are not content-hashed
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{10}\.(?:js|css)$')
+# "?v=<hash>" or "?h=<hash>" cache-busting query parameter
+VERSION_PARAMS = ('v', 'h', 'hash', 'version')
+
+
+def cache_policy(request_path, file_path=None):
+    """Pick the Cache-Control value for a request by its path class.
+
+    ``file_path`` is the file actually served when the URL does not end in
+    its extension (e.g. tile and manifest endpoints).
+    """
+    parts = urllib.parse.urlsplit(request_path)
+    path = urllib.parse.unquote(parts.path)
+    query = urllib.parse.parse_qs(parts.query)
+    if HASHED_NAME_RE.search(path) or any(query.get(p) for p in VERSION_PARAMS):
+        return CACHE_IMMUTABLE
+    ext = os.path.splitext(file_path or path)[1].lower()
+    if ext in MEDIA_EXTENSIONS:
+        return CACHE_MEDIA
+    return CACHE_REVALIDATE
+
+
+def make_etag(stat_result):
+    """Strong ETag from file size, mtime and inode"""
+    return '"%x-%x-%x"' % (stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino)
+
+
+def parse_accept_list(header):
+    """Split an Accept-style header into (accepted, rejected) sets of lowercase tokens"""
+    accepted = set()
+    rejected = set()
+    for item in (header or '').split(','):
+        token, _, params = item.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        (accepted if q > 0 else rejected).add(token)
+    return accepted, rejected
+
+
+def parse_accept_encoding(header):
+    """Return the set of content codings accepted with q > 0"""
+    accepted, rejected = parse_accept_list(header)
+    if '*' in accepted:
+        accepted.update(coding for coding, _ in ENCODINGS if coding not in rejected)
+    return accepted
+
+
+def compress_bytes(data, encoding):
+    """Compress data with the given content coding"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def encoded_etag(etag, encoding):
+    """Distinct strong ETag per content coding of the same file"""
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def parse_range_header(header, size):
+    """Parse a "bytes=" Range header into sorted, merged (start, end) pairs.
+
+    Returns None if the header is malformed or should be ignored (the full
+    file is sent), or an empty list if no range is satisfiable (416).
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+    ranges = []
+    items = spec.split(',')
+    if len(items) > MAX_RANGES:
+        return None
+    for item in items:
+        first, dash, last = item.strip().partition('-')
+        if not dash:
+            return None
+        first, last = first.strip(), last.strip()
+        try:
+            if first == '':
+                # Suffix range: the last N bytes
+                length = int(last)
+                if length <= 0:
+                    continue
+                start, end = max(0, size - length), size - 1
+            else:
+                start = int(first)
+                if last:
+                    end = int(last)
+                    if end < start:
+                        return None
+                    end = min(end, size - 1)
+                else:
+                    end = size - 1
+        except ValueError:
+            return None
+        if start < 0:
+            return None
+        if start < size:
+            ranges.append((start, end))
+
+    # Coalesce overlapping and adjacent ranges
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class HotFileCache:
+    """Byte-budgeted LRU cache of file contents, invalidated by mtime/size.
+
+    Light frames, scripts and manifests are requested by every visitor, so
+    keeping them in memory avoids a disk read and a Python read/write loop per
+    request. Files larger than ``max_file_bytes`` are not cached; the handler
+    streams them with ``socket.sendfile`` instead.
+    """
+
+    def __init__(self, max_bytes, max_file_bytes):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = min(max_file_bytes, max_bytes)
+        self._entries = OrderedDict()  # path -> (mtime_ns, size, data)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def cacheable(self, size):
+        return size <= self.max_file_bytes
+
+    def get(self, key, stat_result):
+        """Return cached bytes for key if its source file is unchanged, else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stat_result.st_mtime_ns and entry[1] == stat_result.st_size:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            return None
+
+    def put(self, key, stat_result, data):
+        """Insert data derived from a file, evicting least recently used entries"""
+        size = len(data)
+        if not self.cacheable(size):
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old[2])
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted[2])
+                self.evictions += 1
+            # Entries are validated against the source file's mtime and size
+            self._entries[key] = (stat_result.st_mtime_ns, stat_result.st_size, data)
+            self.current_bytes += size
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class CountingWriter:
+    """Write side of a connection that counts the bytes sent through it"""
+
+    __slots__ = ('raw', 'count')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.count = 0
+
+    def write(self, data):
+        self.count += len(data)
+        return self.raw.write(data)
+
+    def flush(self):
+        self.raw.flush()
+
+    def close(self):
+        self.raw.close()
+
+    @property
+    def closed(self):
+        return self.raw.closed
+
+
+class ClientFolders:
+    """Maps request paths to the client folder they belong to (bounded set of names)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._clients = {}  # first path segment -> is a client folder
+
+    def client(self, request_path):
+        """Client folder a request belongs to, '' for the root, 'other' beyond MAX_CLIENT_FOLDERS"""
+        first, slash, _ = request_path.lstrip('/').partition('/')
+        if not slash:
+            return ''
+        known = self._clients.get(first)
+        if known is None:
+            if len(self._clients) >= MAX_CLIENT_FOLDERS:
+                return 'other'
+            known = self._clients[first] = (not first.startswith('.')
+                                            and os.path.isdir(os.path.join(self.directory, first, '3D-Images')))
+        return first if known else ''
+
+
+class MetricsShard:
+    """Counters of one worker thread; only that thread writes to them"""
+
+    __slots__ = ('series', 'connections', 'requests')
+
+    def __init__(self):
+        self.series = {}  # (asset class, client, status) -> [count, bytes, seconds, bucket counts...]
+        self.connections = 0  # Open connections handled by this thread (0 or 1)
+        self.requests = 0  # Requests in progress on this thread (0 or 1)
+
+
+def label_value(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """Request counts, bytes and latency histograms served at /metrics.
+
+    Each worker thread records into its own MetricsShard, so a request
+    takes no lock; a scrape adds the shards up. Series are labelled with
+    the asset class (ASSET_CLASSES), the client folder and the status.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.started = time.time()
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()  # Taken once per thread, when its shard is created
+        self.folders = ClientFolders(directory)
+
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = MetricsShard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def client(self, request_path):
+        """Client label of a request path"""
+        return self.folders.client(request_path)
+
+    def record(self, path, status, sent, seconds):
+        """Count one finished request (called by its worker thread)"""
+        parts = urllib.parse.urlsplit(path)
+        request_path = urllib.parse.unquote(parts.path)
+        if 'json=1' in parts.query.split('&'):
+            asset = 'listing'
+        else:
+            asset = next((name for pattern, name in ASSET_CLASSES if pattern.search(request_path)), 'other')
+        key = (asset, self.client(request_path), status)
+        series = self.shard().series
+        values = series.get(key)
+        if values is None:
+            values = series[key] = [0, 0, 0.0] + [0] * (len(METRICS_BUCKETS) + 1)
+        values[0] += 1
+        values[1] += sent
+        values[2] += seconds
+        values[3 + bisect.bisect_left(METRICS_BUCKETS, seconds)] += 1
+
+    def render(self, server):
+        """All metrics in the Prometheus text exposition format"""
+        totals = {}
+        connections = requests = 0
+        for shard in list(self._shards):
+            connections += shard.connections
+            requests += shard.requests
+            # dict.copy() is atomic, the owning thread may be adding series meanwhile
+            for key, values in shard.series.copy().items():
+                total = totals.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    total[i] += value
+
+        lines = []
+
+        def header(name, kind, text):
+            lines.append(f'# HELP {name} {text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def sample(name, labels, value):
+            label_text = ','.join(f'{key}="{label_value(val)}"' for key, val in labels)
+            lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+        def series_labels(asset, client, status=None):
+            return (('class', asset), ('client', client)) + ((('status', status),) if status is not None else ())
+
+        header('viewer_http_requests_total', 'counter', 'Requests served')
+        for key, values in sorted(totals.items()):
+            sample('viewer_http_requests_total', series_labels(*key), values[0])
+        header('viewer_http_response_bytes_total', 'counter', 'Bytes sent (headers and bodies)')
+        for key, values in sorted(totals.items()):
+            sample('viewer_http_response_bytes_total', series_labels(*key), values[1])
+
+        # One latency histogram per asset class and client, over all statuses
+        histograms = {}
+        for (asset, client, _), values in totals.items():
+            histogram = histograms.setdefault((asset, client), [0] * len(values))
+            for i, value in enumerate(values):
+                histogram[i] += value
+        header('viewer_http_request_duration_seconds', 'histogram', 'Time from request line to last byte')
+        for (asset, client), values in sorted(histograms.items()):
+            labels = series_labels(asset, client)
+            cumulative = 0
+            for bound, count in zip(METRICS_BUCKETS + ('+Inf',), values[3:]):
+                cumulative += count
+                sample('viewer_http_request_duration_seconds_bucket', labels + (('le', bound),), cumulative)
+            sample('viewer_http_request_duration_seconds_sum', labels, f'{values[2]:.6f}')
+            sample('viewer_http_request_duration_seconds_count', labels, values[0])
+
+        header('viewer_http_connections_open', 'gauge', 'Connections held by a worker thread')
+        sample('viewer_http_connections_open', (), connections)
+        header('viewer_http_requests_in_flight', 'gauge', 'Requests being served')
+        sample('viewer_http_requests_in_flight', (), requests)
+        header('viewer_http_workers', 'gauge', 'Size of the worker thread pool')
+        sample('viewer_http_workers', (), getattr(server, 'max_workers', 0))
+
+        caches = [(name, cache.stats()) for name, cache in
+                  (('files', getattr(server, 'file_cache', None)),
+                   ('compressed', getattr(server, 'compressed_cache', None))) if cache is not None]
+        for field, kind, text in (('hits', 'counter', 'Cache hits'), ('misses', 'counter', 'Cache misses'),
+                                  ('evictions', 'counter', 'Entries evicted'),
+                                  ('entries', 'gauge', 'Cached entries'), ('bytes', 'gauge', 'Cached bytes')):
+            name = f'viewer_cache_{field}_total' if kind == 'counter' else f'viewer_cache_{field}'
+            header(name, kind, text)
+            for cache_name, stats in caches:
+                sample(name, (('cache', cache_name),), stats[field])
+        manifest_cache = getattr(server, 'manifest_cache', None)
+        units_cache = getattr(server, 'units_cache', None)
+        header('viewer_manifest_builds_total', 'counter', 'Manifests built in-process')
+        sample('viewer_manifest_builds_total', (), manifest_cache.builds if manifest_cache else 0)
+        header('viewer_unit_table_loads_total', 'counter', 'Unit list CSVs parsed')
+        sample('viewer_unit_table_loads_total', (), units_cache.loads if units_cache else 0)
+        beacons = getattr(server, 'beacons', None)
+        if beacons is not None:
+            header('viewer_beacon_samples_total', 'counter', 'Client timing samples aggregated')
+            sample('viewer_beacon_samples_total', (), beacons.accepted)
+            header('viewer_beacon_log_dropped_total', 'counter', 'Beacons not logged because the writer fell behind')
+            sample('viewer_beacon_log_dropped_total', (), beacons.dropped)
+        scheduler = getattr(server, 'scheduler', None)
+        if scheduler is not None:
+            stats = scheduler.stats()
+            header('viewer_scheduler_slots', 'gauge', 'Responses that may be sent at once')
+            sample('viewer_scheduler_slots', (), scheduler.transfers)
+            for field, name, kind, text in (
+                    ('running', 'viewer_scheduler_transfers', 'gauge', 'Responses being sent'),
+                    ('waiting', 'viewer_scheduler_waiting', 'gauge', 'Requests waiting for a transfer slot'),
+                    ('admitted', 'viewer_scheduler_admitted_total', 'counter', 'Requests granted a transfer slot'),
+                    ('wait_seconds', 'viewer_scheduler_wait_seconds_total', 'counter',
+                     'Time requests waited for a transfer slot')):
+                header(name, kind, text)
+                for tier in SCHEDULE_TIERS:
+                    value = stats[field][tier]
+                    sample(name, (('tier', tier),), f'{value:.6f}' if isinstance(value, float) else value)
+            header('viewer_scheduler_yields_total', 'counter', 'Background transfers paused for a more urgent request')
+            sample('viewer_scheduler_yields_total', (), stats['yields'])
+            header('viewer_scheduler_timeouts_total', 'counter', 'Requests answered 503 after waiting too long')
+            sample('viewer_scheduler_timeouts_total', (), stats['timeouts'])
+            header('viewer_scheduler_throttled_seconds_total', 'counter', 'Time senders waited for a bandwidth cap')
+            for bucket, seconds in stats['throttled'].items():
+                sample('viewer_scheduler_throttled_seconds_total', (('cap', bucket),), f'{seconds:.6f}')
+        header('viewer_start_time_seconds', 'gauge', 'Server start time (Unix time)')
+        sample('viewer_start_time_seconds', (), f'{self.started:.3f}')
+        return '\n'.join(lines) + '\n'
+
+
+class BeaconStore:
+    """Client timing samples: rolling percentiles in memory, raw beacons in a JSONL log.
+
+    Beacons are appended to the log by a background thread; a beacon that
+    finds the writer's queue full is still aggregated but not logged, so a
+    slow disk never holds up a request.
+    """
+
+    def __init__(self, log_path=BEACON_LOG, max_bytes=BEACON_LOG_MAX_MB * 1024 * 1024,
+                 backups=BEACON_LOG_BACKUPS):
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._series = {}  # (client, metric) -> deque of the latest values
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(BEACON_QUEUE)
+        self.accepted = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.written = 0
+        if log_path:
+            threading.Thread(target=self._write_loop, name='beacon-writer', daemon=True).start()
+
+    def add(self, client, samples):
+        """Aggregate valid {metric, value} samples; returns how many were kept"""
+        valid = []
+        for item in samples[:BEACON_MAX_SAMPLES]:
+            if not isinstance(item, dict):
+                continue
+            metric, value = item.get('metric'), item.get('value')
+            if (isinstance(metric, str) and BEACON_METRIC_RE.match(metric)
+                    and isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and math.isfinite(value) and 0 <= value <= BEACON_MAX_VALUE):
+                valid.append((metric, float(value)))
+        with self._lock:
+            kept = 0
+            for metric, value in valid:
+                series = self._series.get((client, metric))
+                if series is None:
+                    if len(self._series) >= BEACON_MAX_SERIES:
+                        continue
+                    series = self._series[(client, metric)] = deque(maxlen=BEACON_WINDOW)
+                series.append(value)
+                kept += 1
+            self.accepted += kept
+            self.rejected += len(samples) - kept
+        if kept and self.log_path:
+            record = {'time': round(time.time(), 3), 'client': client,
+                      'samples': [{'metric': metric, 'value': value} for metric, value in valid]}
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+        return kept
+
+    def summary(self, client=None):
+        """{client: {metric: {count, p50, p95, p99}}} over the rolling window"""
+        with self._lock:
+            snapshot = [(key, list(values)) for key, values in self._series.items()
+                        if client is None or key[0] == client]
+        clients = {}
+        for (series_client, metric), values in sorted(snapshot):
+            values.sort()
+            stats = {'count': len(values)}
+            for percentile in BEACON_PERCENTILES:
+                # Nearest rank
+                rank = max(1, math.ceil(percentile / 100 * len(values)))
+                stats[f'p{percentile}'] = round(values[rank - 1], 1)
+            clients.setdefault(series_client, {})[metric] = stats
+        return {'window': BEACON_WINDOW, 'clients': clients}
+
+    def _write_loop(self):
+        log = None
+        while True:
+            records = [self._queue.get()]
+            # Write everything that piled up in one go
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if log is None:
+                    os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+                    log = open(self.log_path, 'a', encoding='utf-8')
+                log.write(''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records))
+                log.flush()
+                self.written += len(records)
+                if log.tell() >= self.max_bytes:
+                    log.close()
+                    log = None
+                    self._rotate()
+            except OSError as e:
+                print(f"Beacon log error: {e}")
+                if log is not None:
+                    log.close()
+                    log = None
+
+    def _rotate(self):
+        """beacons.jsonl -> beacons.jsonl.1 -> ... -> beacons.jsonl.<backups> (dropped)"""
+        if self.backups < 1:
+            os.remove(self.log_path)
+        for index in range(self.backups, 0, -1):
+            source = self.log_path if index == 1 else f'{self.log_path}.{index - 1}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.log_path}.{index}')
+
+
+class TokenBucket:
+    """Bandwidth cap of ``rate`` bytes per second, with one second of burst"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.throttled = 0.0  # Seconds senders were told to wait
+        self._lock = threading.Lock()
+
+    def take(self, size):
+        """Reserve size bytes; returns the seconds to wait before sending them"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= size
+            if self.tokens >= 0:
+                return 0.0
+            delay = -self.tokens / self.rate
+            self.throttled += delay
+            return delay
+
+
+class Transfer:
+    """A request holding (or waiting for) one of the scheduler's transfer slots"""
+
+    __slots__ = ('tier', 'priority', 'background', 'tenant', 'visitor', 'seq', 'buckets')
+
+    def __init__(self, tier, tenant, visitor, seq, buckets):
+        self.tier = tier
+        self.priority = SCHEDULE_TIERS.index(tier)
+        self.background = tier in BACKGROUND_TIERS
+        self.tenant = tenant
+        self.visitor = visitor
+        self.seq = seq
+        self.buckets = buckets
+
+    @property
+    def chunked(self):
+        """Background and rate-capped bodies go out in SEND_CHUNK pieces through pace()"""
+        return self.background or bool(self.buckets)
+
+
+class FairScheduler:
+    """Admits GET requests to a bounded number of concurrent transfers, most urgent first.
+
+    Requests are classified by tier (SCHEDULE_TIERS: the rotation's first
+    light frame and the page, light frames, full frames, models) and by
+    tenant (client folder). A free slot goes to the waiting request of the
+    most urgent tier, and among those to the tenant with the fewest
+    transfers running, so one visitor bulk-loading full frames cannot
+    starve another client's first frame.
+
+    Tenants, and optionally visitors (remote addresses, over all their
+    keep-alive connections), are capped separately, background tiers never take the
+    last quarter of the slots, and background bodies give up their slot
+    between chunks while a more urgent request waits for one. Optional
+    token buckets cap the bandwidth of each tenant and of all background
+    prefetch together.
+    """
+
+    def __init__(self, directory, transfers, tenant_transfers=None, visitor_transfers=DEFAULT_VISITOR_TRANSFERS,
+                 tenant_rate=0, prefetch_rate=0, timeout=SCHEDULE_TIMEOUT):
+        self.folders = ClientFolders(directory)
+        self.transfers = max(1, transfers)
+        self.tenant_transfers = max(1, tenant_transfers or self.transfers // 2)
+        self.visitor_transfers = max(0, visitor_transfers or 0)  # 0: no per-address cap
+        self.background_transfers = max(1, self.transfers - max(1, self.transfers // 4))
+        self.tenant_rate = tenant_rate
+        self.prefetch_bucket = TokenBucket(prefetch_rate) if prefetch_rate > 0 else None
+        self.timeout = timeout
+        self._tenant_buckets = {}
+        self._cond = threading.Condition()
+        self._waiting = []  # Transfers waiting for a slot, in arrival order
+        self._seq = 0
+        self._active = 0
+        self._active_background = 0
+        self._tenants = {}  # tenant -> transfers running
+        self._visitors = {}  # remote address -> transfers running
+        self._first_frames = {}  # 3D-Images folder -> (folder mtimes, base name of frame 0)
+        self._builder = None
+        self.running = dict.fromkeys(SCHEDULE_TIERS, 0)
+        self.admitted = dict.fromkeys(SCHEDULE_TIERS, 0)
+        self.wait_seconds = dict.fromkeys(SCHEDULE_TIERS, 0.0)
+        self.yields = 0
+        self.timeouts = 0
+
+    def classify(self, request_path, query, tenant):
+        """Tier of a request"""
+        if STREAM_RE.search(request_path):
+            return 'full' if urllib.parse.parse_qs(query).get('tier', ['light'])[0] == 'full' else 'light'
+        tier = next((name for pattern, name in TIER_CLASSES if pattern.search(request_path)), 'first')
+        frame = LIGHT_FRAME_RE.search(request_path)
+        # Every visit opens on frame 0 and waits behind a spinner for it. Keyed on the frame, not
+        # the visitor, so visitors behind one proxy or NAT address each get their first frame first
+        if frame and tenant != 'other' and os.path.splitext(frame.group(1))[0] == self.first_frame(tenant):
+            return 'first'
+        return tier
+
+    def first_frame(self, tenant):
+        """Base name of a client's first rotation frame, as create-image-manifest.py orders them"""
+        images_path = os.path.join(self.folders.directory, tenant, '3D-Images')
+        light_path = os.path.join(images_path, 'light')
+        signature = folder_mtimes(images_path, light_path)
+        cached = self._first_frames.get(images_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        if self._builder is None:
+            self._builder = load_manifest_builder()
+        names = set()
+        for path in (images_path, light_path):
+            try:
+                with os.scandir(path) as entries:
+                    names.update(self._builder.get_base_name(entry.name) for entry in entries
+                                 if os.path.splitext(entry.name)[1] in self._builder.IMAGE_EXTENSIONS
+                                 and entry.is_file())
+            except OSError:
+                pass
+        first = min(names, key=self._builder.natural_sort_key, default=None)
+        self._first_frames[images_path] = (signature, first)
+        return first
+
+    def acquire(self, path, visitor):
+        """Wait for a transfer slot; returns the Transfer, or None for unscheduled paths.
+
+        Raises TimeoutError when no slot frees up within the timeout.
+        """
+        parts = urllib.parse.urlsplit(path)
+        request_path = urllib.parse.unquote(parts.path)
+        if UNSCHEDULED_RE.match(request_path):
+            return None
+        tenant = self.folders.client(request_path)
+        tier = self.classify(request_path, parts.query, tenant)
+        with self._cond:
+            transfer = Transfer(tier, tenant, visitor, self._seq, self._buckets(tier, tenant))
+            self._seq += 1
+            self._wait(transfer, self.timeout)
+            self.admitted[tier] += 1
+        return transfer
+
+    def release(self, transfer):
+        with self._cond:
+            self._stop(transfer)
+            if self._waiting:
+                self._cond.notify_all()
+
+    def pace(self, transfer, size):
+        """Called before each chunk of a chunked body.
+
+        A background transfer first hands its slot to a more urgent waiting
+        request (and waits for a slot again); then the bandwidth caps apply.
+        """
+        if transfer.background and self._waiting:
+            with self._cond:
+                self._stop(transfer)
+                waiting = self._next()
+                if waiting is not None and waiting.priority < transfer.priority:
+                    self.yields += 1
+                    self._cond.notify_all()
+                    # No timeout: the response has started, giving up would cut it short
+                    self._wait(transfer, None)
+                else:
+                    self._start(transfer)
+        delay = max((bucket.take(size) for bucket in transfer.buckets), default=0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def stats(self):
+        with self._cond:
+            waiting = dict.fromkeys(SCHEDULE_TIERS, 0)
+            for transfer in self._waiting:
+                waiting[transfer.tier] += 1
+            tenant_buckets = list(self._tenant_buckets.values())
+            return {
+                'running': dict(self.running),
+                'waiting': waiting,
+                'admitted': dict(self.admitted),
+                'wait_seconds': dict(self.wait_seconds),
+                'yields': self.yields,
+                'timeouts': self.timeouts,
+                'throttled': {'tenant': sum(bucket.throttled for bucket in tenant_buckets),
+                              'prefetch': self.prefetch_bucket.throttled if self.prefetch_bucket else 0.0},
+            }
+
+    def _buckets(self, tier, tenant):
+        buckets = []
+        if self.tenant_rate > 0:
+            bucket = self._tenant_buckets.get(tenant)
+            if bucket is None:
+                bucket = self._tenant_buckets[tenant] = TokenBucket(self.tenant_rate)
+            buckets.append(bucket)
+        if tier in BACKGROUND_TIERS and self.prefetch_bucket is not None:
+            buckets.append(self.prefetch_bucket)
+        return tuple(buckets)
+
+    def _eligible(self, transfer):
+        return (self._active < self.transfers
+                and self._tenants.get(transfer.tenant, 0) < self.tenant_transfers
+                and (not self.visitor_transfers or self._visitors.get(transfer.visitor, 0) < self.visitor_transfers)
+                and (not transfer.background or self._active_background < self.background_transfers))
+
+    def _next(self):
+        """The waiting transfer that gets the next free slot, or None"""
+        best = None
+        for transfer in self._waiting:
+            if self._eligible(transfer):
+                key = (transfer.priority, self._tenants.get(transfer.tenant, 0), transfer.seq)
+                if best is None or key < best[0]:
+                    best = (key, transfer)
+        return best[1] if best else None
+
+    def _wait(self, transfer, timeout):
+        """Queue a transfer until it is next in line, then start it (lock held)"""
+        start = time.monotonic()
+        self._waiting.append(transfer)
+        try:
+            while self._next() is not transfer:
+                remaining = None if timeout is None else start + timeout - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.timeouts += 1
+                    raise TimeoutError(f'No transfer slot within {timeout}s')
+                self._cond.wait(remaining)
+        finally:
+            self._waiting.remove(transfer)
+        self._start(transfer)
+        self.wait_seconds[transfer.tier] += time.monotonic() - start
+        if self._waiting:
+            # More than one slot may have freed up
+            self._cond.notify_all()
+
+    def _start(self, transfer):
+        self._active += 1
+        self._active_background += transfer.background
+        self._tenants[transfer.tenant] = self._tenants.get(transfer.tenant, 0) + 1
+        self._visitors[transfer.visitor] = self._visitors.get(transfer.visitor, 0) + 1
+        self.running[transfer.tier] += 1
+
+    def _stop(self, transfer):
+        self._active -= 1
+        self._active_background -= transfer.background
+        for counts, key in ((self._tenants, transfer.tenant), (self._visitors, transfer.visitor)):
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+        self.running[transfer.tier] -= 1
+
+
+class CachedResponse:
+    """A generated response body with its validator and lazily compressed variants"""
+
+    __slots__ = ('body', 'etag', 'signature', 'variants')
+
+    def __init__(self, body, signature=None):
+        self.body = body
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:20]
+        self.signature = signature
+        self.variants = {}  # content coding -> compressed body
+
+    def encoded(self, encoding):
+        data = self.variants.get(encoding)
+        if data is None:
+            data = self.variants[encoding] = compress_bytes(self.body, encoding)
+        return data
+
+
+def load_script(filename):
+    """Import a sibling script (not importable by name because of the dashes)"""
+    spec = importlib.util.spec_from_file_location(filename[:-3].replace('-', '_'), os.path.join(SCRIPT_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_manifest_builder():
+    """Import create-image-manifest.py"""
+    return load_script(MANIFEST_SCRIPT)
+
+
+def folder_mtimes(*paths):
+    """mtime_ns of each folder (0 if missing); changes when files are added, removed or renamed"""
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            mtimes.append(0)
+    return tuple(mtimes)
+
+
+def folder_files(*paths):
+    """(path, size, mtime_ns) of every file in the folders; changes when a file is added, removed or rewritten"""
+    files = []
+    for path in paths:
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        fs = entry.stat()
+                        files.append((entry.path, fs.st_size, fs.st_mtime_ns))
+        except OSError:
+            pass
+    return tuple(sorted(files))
+
+
+class ManifestCache:
+    """Image manifests built in-process with create-image-manifest.py's rules.
+
+    Each manifest is kept in memory until a file in its 3D-Images or light
+    folder is added, removed or rewritten (size or mtime), so a client
+    folder without image-manifest.json costs a scandir per request and a
+    build per change.
+    Builds lock only their own folder, and the frame index of each folder
+    is kept in memory: serving a request never writes into the folder.
+    """
+
+    def __init__(self):
+        self._entries = {}  # images folder -> CachedResponse
+        self._parsed = {}  # manifest file or images folder -> (signature, manifest dict)
+        self._indexes = {}  # images folder -> FrameIndex, updated by each build
+        self._locks = {}  # images folder -> lock held while it is built
+        self._lock = threading.Lock()
+        self._builder = None
+        self.builds = 0
+
+    def builder(self):
+        """create-image-manifest.py, imported once"""
+        if self._builder is None:
+            self._builder = load_manifest_builder()
+        return self._builder
+
+    def load(self, manifest_path, images_path, prefix):
+        """Parsed manifest of a folder: image-manifest.json if present, otherwise the in-process build"""
+        try:
+            fs = os.stat(manifest_path)
+            key, signature, body = manifest_path, (fs.st_size, fs.st_mtime_ns), None
+        except OSError:
+            entry = self.get(images_path, prefix)
+            if entry is None:
+                return None
+            key, signature, body = images_path, entry.etag, entry.body
+        parsed = self._parsed.get(key)
+        if parsed is not None and parsed[0] == signature:
+            return parsed[1]
+        try:
+            if body is None:
+                with open(manifest_path, 'rb') as f:
+                    body = f.read()
+            manifest = json.loads(body)
+        except (OSError, ValueError):
+            return None
+        self._parsed[key] = (signature, manifest)
+        return manifest
+
+    def get(self, images_path, prefix):
+        """Return the CachedResponse for a 3D-Images folder, or None if it does not exist"""
+        if not os.path.isdir(images_path):
+            return None
+        light_path = os.path.join(images_path, 'light')
+        entry = self._entries.get(images_path)
+        # Every frame file is checked, not just the folders: a frame overwritten in place keeps the
+        # folder mtime, and its old hash would otherwise stay in ?v= URLs cached as immutable
+        if entry is not None and entry.signature == folder_files(images_path, light_path):
+            return entry
+
+        # Build once even if many visitors arrive at the same time; other folders are not held up
+        with self._lock:
+            lock = self._locks.setdefault(images_path, threading.Lock())
+        with lock:
+            signature = folder_files(images_path, light_path)
+            entry = self._entries.get(images_path)
+            if entry is not None and entry.signature == signature:
+                return entry
+            builder = self.builder()
+            index = self._indexes.get(images_path)
+            if index is None:
+                # Seeded from the index file create-image-manifest.py leaves, if any
+                index = self._indexes[images_path] = builder.FrameIndex(Path(images_path))
+            # Decoding every frame for placeholders is left to the offline script
+            manifest = builder.create_manifest(Path(images_path), prefix, index=index, placeholders=False)
+            if manifest is None:
+                return None
+            for key in [key for key in manifest if key.startswith('_')]:
+                del manifest[key]
+            body = json.dumps(manifest, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+            entry = CachedResponse(body, signature)
+            self._entries[images_path] = entry
+            self.builds += 1
+            return entry
+
+
+class ListingCache:
+    """JSON directory listings (?json=1), invalidated by the directory's mtime"""
+
+    def __init__(self, max_entries=1024):
+        self._entries = OrderedDict()  # directory -> CachedResponse
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+
+    def get(self, path):
+        signature = folder_mtimes(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.signature == signature:
+                self._entries.move_to_end(path)
+                return entry
+
+        files = []
+        with os.scandir(path) as entries:
+            for item in entries:
+                if item.is_file():
+                    files.append({
+                        'name': item.name,
+                        'size': item.stat().st_size,
+                        'type': 'file'
+                    })
+                elif item.is_dir():
+                    files.append({
+                        'name': item.name,
+                        'type': 'directory'
+                    })
+        entry = CachedResponse(json.dumps(files).encode('utf-8'), signature)
+
+        with self._lock:
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+
+def parse_number(text):
+    """Number in a spreadsheet export ("5,764,500", "5 764 500", "108,5"), or None"""
+    text = text.strip().replace('\u00a0', '').replace('\u202f', '').replace(' ', '')
+    if COMMA_THOUSANDS_RE.match(text):
+        text = text.replace(',', '')
+    elif DOT_THOUSANDS_RE.match(text):
+        text = text.replace('.', '').replace(',', '.')
+    elif DECIMAL_COMMA_RE.match(text):
+        text = text.replace(',', '.')
+    try:
+        value = float(text)
+    except ValueError:
+        return None
+    if value != value or value in (float('inf'), float('-inf')):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+def unit_field_name(header):
+    """Field name of a CSV header, e.g. "TOTAL PRICE" -> price, "SURFACE COURT" -> surfaceCourt"""
+    header = ' '.join(header.replace('\ufeff', '').split())
+    if header.upper() in UNIT_FIELDS:
+        return UNIT_FIELDS[header.upper()]
+    words = re.findall(r'[A-Za-z0-9]+', header)
+    if not words:
+        return None
+    return words[0].lower() + ''.join(word.capitalize() for word in words[1:])
+
+
+def unit_key(value):
+    """Lookup key of a unit ref or object name (case and spacing insensitive)"""
+    return ''.join(str(value).split()).upper()
+
+
+def object_key(value):
+    """Join key of a unit ref or object name: no exporter suffix, case, spacing or separators ("D-701.001" -> D701)"""
+    key = OBJECT_SUFFIX_RE.sub('', ''.join(str(value).split()))
+    return re.sub(r'[-_.]', '', key).upper()
+
+
+def comparable(value):
+    """Sort key that keeps numbers and strings of one column comparable"""
+    return (0, value, '') if isinstance(value, (int, float)) else (1, 0, str(value).lower())
+
+
+class UnitTable:
+    """A client's unit list CSV as typed rows with lookup, filter and sort indexes.
+
+    Numeric columns get a sorted (value, row) index for range queries,
+    columns with few distinct values a value -> rows index for equality
+    filters, and every column an ascending and descending row order, so a
+    query only touches the rows it returns.
+    """
+
+    def __init__(self, headers, records, object_names, signature):
+        self.signature = signature
+        fields = []
+        columns = []
+        object_column = None
+        for column, header in enumerate(headers):
+            if ' '.join(header.replace('\ufeff', '').split()).upper() in UNIT_OBJECT_HEADERS:
+                object_column = column
+                continue
+            name = unit_field_name(header)
+            if name and name not in fields:
+                fields.append(name)
+                columns.append(column)
+        if 'ref' not in fields:
+            raise ValueError("unit list has no UNITREF column")
+
+        # A column is numeric when every non-empty cell parses as a number
+        def cell(record, column):
+            return (record[column] if column is not None and column < len(record) else '').strip()
+
+        raw = [([cell(record, column) for column in columns], cell(record, object_column)) for record in records]
+        raw = [(cells, name) for cells, name in raw if cells[fields.index('ref')]]
+        explicit = [name for _, name in raw]  # Object column, if any
+        raw = [cells for cells, _ in raw]
+        numeric = set()
+        for i, name in enumerate(fields):
+            cells = [cells[i] for cells in raw if cells[i]]
+            if name != 'ref' and cells and all(parse_number(cell) is not None for cell in cells):
+                numeric.add(name)
+        self.rows = [tuple((parse_number(cell) if name in numeric else cell) if cell else None
+                           for name, cell in zip(fields, cells)) for cells in raw]
+        self.fields = fields + ['object']
+        self.numeric = numeric
+
+        # O(1) lookups; the first row wins for a repeated ref
+        ref_column = fields.index('ref')
+        self.by_ref = {}
+        for index, row in enumerate(self.rows):
+            self.by_ref.setdefault(unit_key(row[ref_column]), index)
+
+        # Join to the model: the object named in an object column, else an object named like
+        # the unit ref (or its plan file). Copies of an object ("D-701.001") share its key
+        objects = {}
+        for name in sorted(object_names, key=lambda name: (len(name), name)):
+            objects.setdefault(object_key(name), name)
+        self.objects = [None] * len(self.rows)
+        self.by_object = {}
+        plan_columns = [fields.index(name) for name in ('plan2d', 'plan3d') if name in fields]
+        for index, row in enumerate(self.rows):
+            candidates = [explicit[index]] if explicit[index] else []
+            candidates += [row[ref_column]] + [os.path.splitext(os.path.basename(str(row[column])))[0]
+                                               for column in plan_columns if row[column]]
+            for candidate in candidates:
+                key = object_key(candidate)
+                name = objects.get(key)
+                if name is not None and key not in self.by_object:
+                    self.objects[index] = name
+                    self.by_object[key] = index
+                    break
+
+        self.sorted_values = {}  # numeric field -> ascending values
+        self.sorted_rows = {}  # numeric field -> rows in the order of sorted_values
+        self.equal = {}  # field -> {value key: [rows]}
+        self.order = {}  # field -> (ascending rows, descending rows), empty cells last
+        for i, name in enumerate(self.fields):
+            values = self.objects if name == 'object' else [row[i] for row in self.rows]
+            present = [index for index, value in enumerate(values) if value is not None]
+            missing = [index for index, value in enumerate(values) if value is None]
+            ascending = sorted(present, key=lambda index: comparable(values[index]))
+            descending = sorted(present, key=lambda index: comparable(values[index]), reverse=True)
+            self.order[name] = (ascending + missing, descending + missing)
+            if name in numeric:
+                self.sorted_rows[name] = ascending
+                self.sorted_values[name] = [values[index] for index in ascending]
+            groups = {}
+            for index in present:
+                groups.setdefault(self.value_key(values[index]), []).append(index)
+            self.equal[name] = groups
+
+        self._responses = OrderedDict()  # normalized query -> CachedResponse
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def value_key(value):
+        if isinstance(value, (int, float)):
+            return float(value)
+        return unit_key(value)
+
+    def unit(self, index):
+        """One row as a {field: value} object"""
+        return dict(zip(self.fields, self.rows[index] + (self.objects[index],)))
+
+    def select(self, params):
+        """Row indices matching params, in no particular order.
+
+        ``field=a,b`` keeps rows whose value is one of the listed values,
+        ``field_min=x`` / ``field_max=y`` bound numeric fields.
+        """
+        candidates = None
+        for param, value in params.items():
+            field, _, bound = param.rpartition('_')
+            if bound in ('min', 'max') and field in self.sorted_values:
+                limit = parse_number(value)
+                if limit is None:
+                    raise ValueError(f"{param} must be a number")
+                values = self.sorted_values[field]
+                if bound == 'min':
+                    matched = self.sorted_rows[field][bisect.bisect_left(values, limit):]
+                else:
+                    matched = self.sorted_rows[field][:bisect.bisect_right(values, limit)]
+            elif param in self.equal:
+                groups = self.equal[param]
+                matched = []
+                for option in value.split(','):
+                    if param in self.numeric:
+                        number = parse_number(option)
+                        key = float(number) if number is not None else None
+                    else:
+                        key = unit_key(option)
+                    matched.extend(groups.get(key, ()))
+            else:
+                raise ValueError(f"unknown filter {param}")
+            matched = set(matched)
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                break
+        return candidates
+
+    def query(self, params):
+        """CachedResponse with one page of the rows matching params.
+
+        Besides filters, ``sort=field`` (``-field`` for descending), ``page``
+        (from 1) and ``per_page`` are understood. Rows are sent as arrays in
+        the order of ``fields`` to keep the JSON compact.
+        """
+        params = dict(params)
+        sort = params.pop('sort', '')
+        try:
+            page = int(params.pop('page', 1))
+            per_page = int(params.pop('per_page', UNITS_PAGE_SIZE))
+        except ValueError:
+            raise ValueError("page and per_page must be integers")
+        if page < 1 or not 1 <= per_page <= UNITS_MAX_PAGE_SIZE:
+            raise ValueError(f"page must be >= 1 and per_page between 1 and {UNITS_MAX_PAGE_SIZE}")
+        field = sort.lstrip('-') or 'ref'
+        if field not in self.order:
+            raise ValueError(f"cannot sort by {field}")
+
+        key = (tuple(sorted(params.items())), sort, page, per_page)
+        with self._lock:
+            entry = self._responses.get(key)
+            if entry is not None:
+                self._responses.move_to_end(key)
+                return entry
+
+        matched = self.select(params)
+        order = self.order[field][1 if sort.startswith('-') else 0] if sort else range(len(self.rows))
+        if matched is not None:
+            order = [index for index in order if index in matched]
+        total = len(order)
+        start = (page - 1) * per_page
+        rows = [list(self.rows[index]) + [self.objects[index]] for index in order[start:start + per_page]]
+        body = json.dumps({
+            'total': total,
+            'page': page,
+            'perPage': per_page,
+            'fields': self.fields,
+            'units': rows,
+        }, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        entry = CachedResponse(body)
+
+        with self._lock:
+            self._responses[key] = entry
+            while len(self._responses) > UNITS_CACHED_QUERIES:
+                self._responses.popitem(last=False)
+        return entry
+
+
+class UnitsCache:
+    """Unit tables per client, reloaded when the CSV or the 3D models change"""
+
+    def __init__(self):
+        self._tables = {}  # client folder -> UnitTable
+        self._lock = threading.Lock()
+        self._glb = None
+        self.loads = 0
+
+    @staticmethod
+    def sources(folder):
+        """(CSV path, model paths) of a client folder"""
+        csv_files = []
+        try:
+            with os.scandir(os.path.join(folder, UNITS_DIR)) as entries:
+                csv_files = sorted(entry.path for entry in entries
+                                   if entry.name.lower().endswith('.csv') and entry.is_file())
+        except OSError:
+            pass
+        models_path = os.path.join(folder, '3D')
+        try:
+            with os.scandir(models_path) as entries:
+                models = sorted(entry.path for entry in entries
+                                if entry.name.lower().endswith('.glb') and entry.is_file())
+        except OSError:
+            models = []
+        return (csv_files[0] if csv_files else None), models
+
+    def signature(self, folder):
+        csv_path, models = self.sources(folder)
+        if csv_path is None:
+            return None, None, None
+        stats = []
+        for path in (csv_path, *models):
+            try:
+                fs = os.stat(path)
+                stats.append((path, fs.st_mtime_ns, fs.st_size))
+            except OSError:
+                stats.append((path, 0, 0))
+        return csv_path, models, tuple(stats)
+
+    def object_names(self, models):
+        """Names of the mesh nodes of the client's models"""
+        if self._glb is None:
+            self._glb = load_script(GLB_SCRIPT)
+        names = []
+        for path in models:
+            try:
+                gltf, _ = self._glb.read_glb(path)
+            except (OSError, ValueError):
+                continue
+            names.extend(node['name'] for node in gltf.get('nodes', []) if 'mesh' in node and node.get('name'))
+        return names
+
+    def get(self, folder):
+        """Return the UnitTable of a client folder, or None if it has no unit list"""
+        csv_path, models, signature = self.signature(folder)
+        if csv_path is None:
+            return None
+        table = self._tables.get(folder)
+        if table is not None and table.signature == signature:
+            return table
+
+        # Parse once even if many visitors arrive at the same time
+        with self._lock:
+            table = self._tables.get(folder)
+            if table is not None and table.signature == signature:
+                return table
+            with open(csv_path, newline='', encoding='utf-8-sig', errors='replace') as f:
+                sample = f.read(4096)
+                f.seek(0)
+                try:
+                    dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+                except csv.Error:
+                    dialect = csv.excel
+                records = list(csv.reader(f, dialect))
+            if not records:
+                return None
+            table = UnitTable(records[0], records[1:], self.object_names(models), signature)
+            self._tables[folder] = table
+            self.loads += 1
+            return table
+
+
+class ThreadPoolHTTPServer(http.server.HTTPServer):
+    """HTTP server that hands each connection to a bounded thread pool.
+
+    Connections beyond ``max_workers + max_pending`` are left in the kernel
+    listen backlog until a slot frees up, so a burst of visitors can never
+    spawn an unbounded number of threads.
+    """
+
+    allow_reuse_address = True
+    request_queue_size = DEFAULT_MAX_PENDING
+
+    def __init__(self, server_address, handler_class, max_workers=DEFAULT_WORKERS,
+                 max_pending=DEFAULT_MAX_PENDING, log_latency=True,
+                 cache_bytes=DEFAULT_CACHE_MB * 1024 * 1024,
+                 cache_max_file_bytes=DEFAULT_CACHE_MAX_FILE_MB * 1024 * 1024, metrics=True,
+                 beacon_log=None, scheduler=True, transfers=None, tenant_transfers=None,
+                 visitor_transfers=DEFAULT_VISITOR_TRANSFERS, tenant_rate=0, prefetch_rate=0):
+        super().__init__(server_address, handler_class)
+        self.max_workers = max_workers
+        self.log_latency = log_latency
+        # Handlers serve the current directory
+        self.metrics = Metrics(os.getcwd()) if metrics else None
+        self.file_cache = HotFileCache(cache_bytes, cache_max_file_bytes) if cache_bytes > 0 else None
+        self.compressed_cache = HotFileCache(COMPRESSED_CACHE_MB * 1024 * 1024, COMPRESSED_CACHE_MB * 1024 * 1024)
+        self.manifest_cache = ManifestCache()
+        self.listing_cache = ListingCache()
+        self.units_cache = UnitsCache()
+        self.beacons = BeaconStore(beacon_log)
+        # The beacon log and its rotations are never served, even inside the served directory
+        self.private_prefixes = (os.path.abspath(beacon_log),) if beacon_log else ()
+        # Half the workers send at once by default, so urgent requests find a queue to jump
+        self.scheduler = (FairScheduler(os.getcwd(), transfers or max_workers // 2, tenant_transfers,
+                                        visitor_transfers, tenant_rate, prefetch_rate) if scheduler else None)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='http-worker')
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def process_request(self, request, client_address):
+        """Queue the connection on the pool instead of handling it inline"""
+        self._slots.acquire()
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            # Executor already shut down
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        shard = self.metrics.shard() if self.metrics is not None else None
+        if shard is not None:
+            shard.connections += 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            if shard is not None:
+                shard.connections -= 1
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
 
 class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between the many frame requests of a session
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEP_ALIVE_TIMEOUT
+
+    extensions_map = {
+        **http.server.SimpleHTTPRequestHandler.extensions_map,
+        '.glb': 'model/gltf-binary',
+        '.gltf': 'model/gltf+json',
+        '.webp': 'image/webp',
+        '.avif': 'image/avif',
+        '.json': 'application/json',
+        '.js': 'text/javascript',
+    }
+
+    # (path regex, handler method) pairs checked before the filesystem
+    routes = [
+        (re.compile(r'^/metrics$'), 'serve_metrics'),
+        (re.compile(r'^/beacon/summary$'), 'serve_beacon_summary'),
+        (re.compile(r'^/(?:(?P<client>[^/]+)/)?image-manifest\.json$'), 'serve_manifest'),
+        (re.compile(r'^/(?:(?P<client>[^/]+)/)?3D-Images/(?:(?P<tier>light)/)?(?P<frame>[^/]+)$'), 'serve_frame'),
+        (re.compile(r'^/(?:(?P<client>[^/]+)/)?frames/stream$'), 'serve_frame_stream'),
+        (re.compile(r'^/(?:(?P<client>[^/]+)/)?tiles/(?P<frame>[^/]+)'
+                    r'(?:/(?P<level>\d+)/(?P<x>\d+)/(?P<y>\d+))?$'), 'serve_tile'),
+        (re.compile(r'^/(?:(?P<client>[^/]+)/)?hitmaps(?:/(?P<frame>[^/]+))?$'), 'serve_hit_map'),
+        (re.compile(r'^/(?:(?P<client>[^/]+)/)?units/object/(?P<name>[^/]+)$'), 'serve_unit_by_object'),
+        (re.compile(r'^/(?:(?P<client>[^/]+)/)?units(?:/(?P<ref>[^/]+))?$'), 'serve_units'),
+    ]
+    post_routes = [
+        (re.compile(r'^/beacon$'), 'receive_beacon'),
+    ]
+
+    def setup(self):
+        super().setup()
+        # Counts headers and bodies; sendfile() output is added in sendfile()
+        self.wfile = CountingWriter(self.wfile)
+
+    def handle_one_request(self):
+        """Handle a single request and log it with its latency"""
+        self._request_start = time.perf_counter()
+        self._response_code = None
+        self._response_size = '-'
+        self._cache_control = None
+        self._segments = None
+        self._boundary = None
+        self._vary = None
+        self._in_flight = None
+        self._transfer = None
+        sent = self.wfile.count
+        try:
+            super().handle_one_request()
+        finally:
+            if self._in_flight is not None:
+                self._in_flight.requests -= 1
+        if self._response_code is not None:
+            elapsed = time.perf_counter() - self._request_start
+            metrics = getattr(self.server, 'metrics', None)
+            if metrics is not None:
+                metrics.record(getattr(self, 'path', ''), self._response_code, self.wfile.count - sent, elapsed)
+            if getattr(self.server, 'log_latency', True):
+                self.log_message('"%s" %s %s %.1fms', self.requestline,
+                                 self._response_code, self._response_size, elapsed * 1000)
+
+    def parse_request(self):
+        # Time from the request line on, not the keep-alive wait before it
+        self._request_start = time.perf_counter()
+        metrics = getattr(self.server, 'metrics', None)
+        if metrics is not None:
+            self._in_flight = metrics.shard()
+            self._in_flight.requests += 1
+        return super().parse_request()
+
+    def log_error(self, format, *args):
+        # Idle keep-alive connections timing out are normal, not errors
+        if format.startswith('Request timed out'):
+            return
+        super().log_error(format, *args)
+
+    def log_request(self, code='-', size='-'):
+        # Deferred to handle_one_request() so the log line includes latency
+        if isinstance(code, http.HTTPStatus):
+            code = code.value
+        self._response_code = code
+        self._response_size = size
+
     def end_headers(self):
         # Add CORS headers
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
+        self.send_header('Cache-Control', self._cache_control or CACHE_NONE)
+        if self._vary:
+            self.send_header('Vary', self._vary)
         super().end_headers()
+
+    def send_head(self):
+        """Dispatch to a dynamic route or serve a file from disk"""
+        request_path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        for pattern, method_name in self.routes:
+            match = pattern.match(request_path)
+            if match:
+                return getattr(self, method_name)(**match.groupdict())
+        return self.send_static()
+
+    def send_static(self):
+        """Serve the request path from disk (file, index.html or directory listing)"""
+        path = self.translate_path(self.path)
+        if any(os.path.abspath(path).startswith(private) for private in getattr(self.server, 'private_prefixes', ())):
+            self.send_error(404, "File not found")
+            return None
+        if os.path.isdir(path):
+            parts = urllib.parse.urlsplit(self.path)
+            if not parts.path.endswith('/'):
+                # Let the base class send the trailing-slash redirect
+                return super().send_head()
+            for index in ('index.html', 'index.htm'):
+                index = os.path.join(path, index)
+                if os.path.isfile(index):
+                    path = index
+                    break
+            else:
+                return self.list_directory(path)
+        if path.endswith('/'):
+            self.send_error(404, "File not found")
+            return None
+        return self.send_file(path)
+
+    def send_file(self, path):
+        """Serve a file with validators, answering conditional requests with 304"""
+        try:
+            fs = os.stat(path)
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+
+        etag = make_etag(fs)
+        last_modified = self.date_time_string(fs.st_mtime)
+        self._cache_control = cache_policy(self.path, path)
+        compressible = os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+        range_header = self.headers.get('Range')
+        # Byte ranges always refer to the identity coding
+        encoding = self.choose_encoding(fs.st_size) if compressible and range_header is None else None
+        if encoding is not None:
+            etag = encoded_etag(etag, encoding)
+
+        if self.is_not_modified(etag, fs.st_mtime):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            if compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return None
+
+        if encoding is not None:
+            body, length = self.open_encoded_body(path, fs, encoding)
+            if body is None:
+                # Compression failed; fall back to the identity coding
+                encoding, etag = None, make_etag(fs)
+        if encoding is None:
+            body, length = self.open_body(path, fs)
+        if body is None:
+            self.send_error(404, "File not found")
+            return None
+
+        if range_header is not None and self.if_range_matches(etag, last_modified):
+            ranges = parse_range_header(range_header, length)
+            if ranges is not None:
+                return self.send_range_head(body, length, ranges, path, etag, last_modified)
+
+        self.send_response(200)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(length))
+        if encoding is not None:
+            self.send_header('Content-Encoding', encoding)
+        if compressible:
+            self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Last-Modified', last_modified)
+        self.send_header('ETag', etag)
+        self.end_headers()
+        return body
+
+    def if_range_matches(self, etag, last_modified):
+        """An If-Range validator must match exactly for the Range to apply"""
+        if_range = self.headers.get('If-Range')
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"') or if_range.startswith('W/'):
+            # Weak validators never match for ranges
+            return if_range == etag
+        return if_range == last_modified
+
+    def send_range_head(self, body, length, ranges, path, etag, last_modified):
+        """Send 206 (single or multipart/byteranges) or 416 headers"""
+        if not ranges:
+            if hasattr(body, 'close'):
+                body.close()
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{length}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+
+        content_type = self.guess_type(path)
+        self.send_response(206)
+        self.send_header('Accept-Ranges', 'bytes')
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            self._segments = [(b'', start, end - start + 1)]
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{length}')
+            self.send_header('Content-Length', str(end - start + 1))
+        else:
+            boundary = uuid.uuid4().hex
+            segments = []
+            for index, (start, end) in enumerate(ranges):
+                separator = '' if index == 0 else '\r\n'
+                part_head = (f'{separator}--{boundary}\r\n'
+                             f'Content-Type: {content_type}\r\n'
+                             f'Content-Range: bytes {start}-{end}/{length}\r\n\r\n')
+                segments.append((part_head.encode('latin-1'), start, end - start + 1))
+            segments.append((f'\r\n--{boundary}--\r\n'.encode('latin-1'), 0, 0))
+            self._segments = segments
+            total = sum(len(head) + count for head, _, count in segments)
+            self.send_header('Content-Type', f'multipart/byteranges; boundary={boundary}')
+            self.send_header('Content-Length', str(total))
+        self.send_header('Last-Modified', last_modified)
+        self.send_header('ETag', etag)
+        self.end_headers()
+        return body
+
+    def client_path(self, client, *parts):
+        """Filesystem path inside a client folder (or the root), or None if unsafe"""
+        for part in (client or '', *parts):
+            if part in ('.', '..') or '/' in part or '\\' in part or part.startswith('.'):
+                return None
+        base = os.path.join(self.directory, client) if client else self.directory
+        return os.path.join(base, *parts)
+
+    def send_cached_response(self, entry, content_type):
+        """Send a generated body with ETag/304 handling and gzip/brotli negotiation"""
+        self._cache_control = CACHE_REVALIDATE
+        encoding = self.choose_encoding(len(entry.body)) if len(entry.body) > 256 else None
+        etag = encoded_etag(entry.etag, encoding) if encoding else entry.etag
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return None
+
+        body = entry.encoded(encoding) if encoding else entry.body
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('ETag', etag)
+        self.end_headers()
+        return body
+
+    def serve_metrics(self):
+        """Request, latency, connection and cache metrics in the Prometheus text format"""
+        metrics = getattr(self.server, 'metrics', None)
+        if metrics is None:
+            self.send_error(404, "File not found")
+            return None
+        body = metrics.render(self.server).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', METRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        return body
+
+    def receive_beacon(self):
+        """POST {client, samples: [{metric, value}]}: client timings in milliseconds"""
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self.send_error(411, "Content-Length required")
+            return None
+        if not 0 <= length <= BEACON_MAX_BYTES:
+            # The body is not read, so the connection cannot be reused
+            self.close_connection = True
+            self.send_error(413, "Beacon too large")
+            return None
+        try:
+            beacon = json.loads(self.rfile.read(length))
+            client = beacon.get('client') or ''
+            samples = beacon['samples']
+        except (ValueError, KeyError, AttributeError):
+            self.send_error(400, "Expected {client, samples: [{metric, value}]}")
+            return None
+        images_path = self.client_path(client, '3D-Images') if isinstance(client, str) else None
+        if images_path is None or not isinstance(samples, list) or (client and not os.path.isdir(images_path)):
+            self.send_error(400, "Unknown client or malformed samples")
+            return None
+
+        store = getattr(self.server, 'beacons', None)
+        if store is not None:
+            store.add(client, samples)
+        self.send_response(204)
+        self.end_headers()
+        return None
+
+    def serve_beacon_summary(self):
+        """p50/p95/p99 of the client timings per client and metric (?client= for one client)"""
+        store = getattr(self.server, 'beacons', None)
+        if store is None:
+            self.send_error(404, "File not found")
+            return None
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        summary = store.summary(query['client'][0] if 'client' in query else None)
+        summary.update(accepted=store.accepted, rejected=store.rejected, logged=store.written, dropped=store.dropped)
+        body = json.dumps(summary, separators=(',', ':')).encode('utf-8')
+        return self.send_cached_response(CachedResponse(body), 'application/json')
+
+    def serve_manifest(self, client):
+        """image-manifest.json: the generated file if present, otherwise built in-process"""
+        manifest_path = self.client_path(client, 'image-manifest.json')
+        images_path = self.client_path(client, '3D-Images')
+        if manifest_path is None:
+            self.send_error(404, "File not found")
+            return None
+        if os.path.isfile(manifest_path):
+            return self.send_file(manifest_path)
+
+        cache = getattr(self.server, 'manifest_cache', None) or ManifestCache()
+        entry = cache.get(images_path, f'{client}/' if client else '')
+        if entry is None:
+            self.send_error(404, "File not found")
+            return None
+        return self.send_cached_response(entry, 'application/json')
+
+    def negotiate_frame(self, path):
+        """Smallest encoding of a format-neutral frame path the client accepts, or None"""
+        accepted, _ = parse_accept_list(self.headers.get('Accept'))
+        best = None
+        for ext, mime in FRAME_FORMATS:
+            if mime in NEGOTIATED_TYPES and mime not in accepted:
+                continue
+            try:
+                size = os.stat(path + ext).st_size
+            except OSError:
+                continue
+            if best is None or size < best[1]:
+                best = (path + ext, size)
+        return best[0] if best else None
+
+    def serve_frame(self, client, frame, tier=None):
+        """Frame file, or the smallest encoding of a format-neutral frame the client accepts"""
+        folder = ('3D-Images', tier) if tier else ('3D-Images',)
+        path = self.client_path(client, *folder, frame)
+        if path is None or os.path.exists(path):
+            return self.send_static()
+
+        best = self.negotiate_frame(path)
+        if best is None:
+            self.send_error(404, "File not found")
+            return None
+        # Caches must keep one copy per Accept header
+        self._vary = 'Accept'
+        return self.send_file(best)
+
+    def serve_frame_stream(self, client):
+        """A tier's frames in spiral order from ?start=N as one multipart response.
+
+        Query: ``start`` (frame index, default 0), ``tier`` (light or full,
+        default light) and ``count`` (frames to send, default all). Each part
+        carries ``X-Frame-Index`` (comma-separated when collapsed duplicates
+        share the file) and ``X-Frame-Hash``, and is flushed as soon as it has
+        been read (see send_stream), so nearby frames arrive within one round
+        trip instead of one request each.
+        """
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        tier = query.get('tier', ['light'])[0]
+        try:
+            start = int(query.get('start', ['0'])[0])
+            count = int(query['count'][0]) if 'count' in query else None
+        except ValueError:
+            self.send_error(400, "start and count must be integers")
+            return None
+        if count is not None and count < 1:
+            self.send_error(400, "count must be positive")
+            return None
+        if tier not in STREAM_TIERS:
+            self.send_error(400, f"tier must be one of: {', '.join(STREAM_TIERS)}")
+            return None
+
+        manifest_path = self.client_path(client, 'image-manifest.json')
+        images_path = self.client_path(client, '3D-Images')
+        if manifest_path is None:
+            self.send_error(404, "File not found")
+            return None
+        cache = getattr(self.server, 'manifest_cache', None) or ManifestCache()
+        manifest = cache.load(manifest_path, images_path, f'{client}/' if client else '')
+        paths = (manifest or {}).get(tier) or []
+        infos = (manifest or {}).get(f'{tier}Frames') or []
+
+        parts = {}  # file -> (frame hash, indices), in spiral order of first use
+        for index in cache.builder().spiral_order(start % len(paths), len(paths))[:count] if paths else []:
+            info = infos[index] if index < len(infos) else {}
+            # Frames stored in several formats are sent in the smallest one the client accepts
+            path = self.client_path(None, *(info.get('negotiated') or paths[index]).split('/'))
+            if path is not None and not os.path.isfile(path):
+                path = self.negotiate_frame(path)
+            if path is None:
+                continue
+            frame_hash = info.get('hash', '')
+            parts.setdefault(path, (frame_hash, []))[1].append(index)
+        if not parts:
+            self.send_error(404, "File not found")
+            return None
+
+        self._boundary = uuid.uuid4().hex
+        self._vary = 'Accept'
+        self.send_response(200)
+        self.send_header('Content-Type', f'multipart/mixed; boundary={self._boundary}')
+        if self.request_version == 'HTTP/1.0':
+            # No chunked coding before HTTP/1.1: the end of the body is the end of the connection
+            self.close_connection = True
+        else:
+            self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('X-Frame-Count', str(len(parts)))
+        self.end_headers()
+        return [(path, frame_hash, indices) for path, (frame_hash, indices) in parts.items()]
+
+    def serve_tile(self, client, frame, level=None, x=None, y=None):
+        """Deep-zoom tile (frame, level, x, y) or a frame's pyramid descriptor"""
+        if level is None:
+            path = self.client_path(client, '3D-Images', 'tiles', frame, TILE_DESCRIPTOR)
+        else:
+            path = self.client_path(client, '3D-Images', 'tiles', frame, str(int(level)),
+                                    f'{int(x)}_{int(y)}.{TILE_FORMAT}')
+        if path is None:
+            self.send_error(404, "File not found")
+            return None
+        return self.send_file(path)
+
+    def serve_hit_map(self, client, frame=None):
+        """Object-ID map of a frame (create-hit-maps.py), or the index describing the maps"""
+        name = f'{frame}.{HIT_MAP_FORMAT}' if frame else HIT_MAP_INDEX
+        path = self.client_path(client, '3D-Images', 'hitmaps', name)
+        if path is None:
+            self.send_error(404, "File not found")
+            return None
+        return self.send_file(path)
+
+    def unit_table(self, client):
+        """The client's UnitTable, or None after sending an error"""
+        folder = self.client_path(client)
+        if folder is None or not os.path.isdir(folder):
+            self.send_error(404, "File not found")
+            return None
+        cache = getattr(self.server, 'units_cache', None) or UnitsCache()
+        try:
+            table = cache.get(folder)
+        except (OSError, ValueError, csv.Error) as e:
+            self.send_error(500, f"Unit list could not be read: {e}")
+            return None
+        if table is None:
+            self.send_error(404, "No unit list")
+        return table
+
+    def send_unit(self, table, index):
+        """One unit as a JSON object"""
+        if index is None:
+            self.send_error(404, "Unit not found")
+            return None
+        body = json.dumps(table.unit(index), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        return self.send_cached_response(CachedResponse(body), 'application/json')
+
+    def serve_units(self, client, ref=None):
+        """Unit list query (filters, sort, page) or one unit by its UNITREF"""
+        table = self.unit_table(client)
+        if table is None:
+            return None
+        if ref is not None:
+            return self.send_unit(table, table.by_ref.get(unit_key(ref)))
+        params = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+        params.pop('v', None)
+        try:
+            entry = table.query(params)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return None
+        return self.send_cached_response(entry, 'application/json')
+
+    def serve_unit_by_object(self, client, name):
+        """The unit joined to a 3D object, by the object's name in the GLB.
+
+        three.js suffixes repeated names ("D-1505_3"), so the name without
+        the suffix is tried as well.
+        """
+        table = self.unit_table(client)
+        if table is None:
+            return None
+        index = table.by_object.get(object_key(name))
+        if index is None:
+            base = re.match(r'^(.*)_\d+$', name)
+            if base:
+                index = table.by_object.get(object_key(base.group(1)))
+        return self.send_unit(table, index)
+
+    def open_body(self, path, fs):
+        """Return (body, length): cached bytes for small files, an open file for large ones"""
+        cache = getattr(self.server, 'file_cache', None)
+        if cache is not None and cache.cacheable(fs.st_size):
+            data = cache.get(path, fs)
+            if data is not None:
+                return data, len(data)
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return None, 0
+        if cache is None or not cache.cacheable(fs.st_size):
+            return f, fs.st_size
+        with f:
+            data = f.read()
+        # The file may have been replaced between stat() and read()
+        if len(data) == fs.st_size:
+            cache.put(path, fs, data)
+        return data, len(data)
+
+    def choose_encoding(self, size):
+        """Pick the preferred content coding the client accepts, if any"""
+        accepted = parse_accept_encoding(self.headers.get('Accept-Encoding'))
+        if not accepted or size > MAX_COMPRESS_MB * 1024 * 1024:
+            return None
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted:
+                return encoding
+        return None
+
+    def open_encoded_body(self, path, fs, encoding):
+        """Return (body, length) for a compressed response.
+
+        A fresh precompressed sibling (``file.js.br``/``file.js.gz`` written by
+        precompress-assets.py) is served as-is; otherwise the file is
+        compressed once and kept in memory until it changes.
+        """
+        suffix = dict(ENCODINGS)[encoding]
+        try:
+            sibling_fs = os.stat(path + suffix)
+            if sibling_fs.st_mtime_ns >= fs.st_mtime_ns:
+                return self.open_body(path + suffix, sibling_fs)
+        except OSError:
+            pass
+
+        cache = getattr(self.server, 'compressed_cache', None)
+        key = (path, encoding)
+        if cache is not None:
+            data = cache.get(key, fs)
+            if data is not None:
+                return data, len(data)
+        source, _ = self.open_body(path, fs)
+        if source is None:
+            return None, 0
+        if hasattr(source, 'read'):
+            with source:
+                source = source.read()
+        data = compress_bytes(source, encoding)
+        if cache is not None:
+            cache.put(key, fs, data)
+        return data, len(data)
+
+    def do_GET(self):
+        """Serve a GET request once the scheduler grants it a transfer slot"""
+        scheduler = getattr(self.server, 'scheduler', None)
+        if scheduler is not None:
+            try:
+                self._transfer = scheduler.acquire(self.path, self.client_address[0])
+            except TimeoutError:
+                self.send_error(503, "Server busy")
+                return
+        try:
+            body = self.send_head()
+            if body is None:
+                return
+            try:
+                self.send_body(body)
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+        finally:
+            if self._transfer is not None:
+                scheduler.release(self._transfer)
+
+    def do_POST(self):
+        """Serve a POST request (client beacons only)"""
+        request_path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        for pattern, method_name in self.post_routes:
+            match = pattern.match(request_path)
+            if match:
+                getattr(self, method_name)(**match.groupdict())
+                return
+        self.send_error(405, "Method not allowed")
+
+    def do_HEAD(self):
+        """Serve a HEAD request"""
+        body = self.send_head()
+        if body is not None and hasattr(body, 'close'):
+            body.close()
+
+    def send_body(self, body):
+        """Write a response body: bytes directly, files via zero-copy sendfile"""
+        if self._boundary is not None:
+            self.send_stream(body, self._boundary)
+        elif self._segments is not None:
+            self.send_segments(body, self._segments)
+        elif isinstance(body, (bytes, bytearray, memoryview)):
+            self.write_body(body)
+        elif hasattr(body, 'fileno'):
+            self.sendfile(body)
+        else:
+            self.copyfile(body, self.wfile)
+
+    def send_segments(self, body, segments):
+        """Write (prefix, offset, count) segments of a ranged response"""
+        is_bytes = isinstance(body, (bytes, bytearray, memoryview))
+        view = memoryview(body) if is_bytes else None
+        for prefix, offset, count in segments:
+            if prefix:
+                self.wfile.write(prefix)
+            if not count:
+                continue
+            if is_bytes:
+                self.write_body(view[offset:offset + count])
+            else:
+                self.sendfile(body, offset, count)
+
+    def write_body(self, data):
+        """Write body bytes, in paced chunks when the scheduler asks for them"""
+        transfer = self._transfer
+        if transfer is None or not transfer.chunked:
+            self.wfile.write(data)
+            return
+        view = memoryview(data)
+        for offset in range(0, len(view), SEND_CHUNK):
+            chunk = view[offset:offset + SEND_CHUNK]
+            self.server.scheduler.pace(transfer, len(chunk))
+            self.wfile.write(chunk)
+
+    def sendfile(self, body, offset=0, count=None):
+        """Zero-copy write of an open file, counted with the rest of the response"""
+        # socket.sendfile() uses os.sendfile() where available and falls
+        # back to a buffered send loop elsewhere
+        self.wfile.flush()
+        transfer = self._transfer
+        if transfer is None or not transfer.chunked:
+            self.wfile.count += self.connection.sendfile(body, offset, count)
+            return
+        end = os.fstat(body.fileno()).st_size if count is None else offset + count
+        while offset < end:
+            self.server.scheduler.pace(transfer, min(SEND_CHUNK, end - offset))
+            sent = self.connection.sendfile(body, offset, min(SEND_CHUNK, end - offset))
+            if not sent:
+                break
+            self.wfile.count += sent
+            offset += sent
+
+    def send_stream(self, parts, boundary):
+        """Write (file, hash, indices) parts as a chunked multipart body, one chunk per frame"""
+        chunked = self.request_version != 'HTTP/1.0'
+        for path, frame_hash, indices in parts:
+            try:
+                fs = os.stat(path)
+            except OSError:
+                continue
+            data, _ = self.open_body(path, fs)
+            if data is None:
+                continue
+            if hasattr(data, 'read'):
+                with data:
+                    data = data.read()
+            head = (f'--{boundary}\r\n'
+                    f'Content-Type: {self.guess_type(path)}\r\n'
+                    f'Content-Length: {len(data)}\r\n'
+                    f'X-Frame-Index: {",".join(map(str, indices))}\r\n'
+                    + (f'X-Frame-Hash: {frame_hash}\r\n' if frame_hash else '')
+                    + '\r\n').encode('latin-1')
+            # One write per frame: the socket file is unbuffered, so it goes out immediately
+            if chunked:
+                size = len(head) + len(data) + 2
+                self.write_body(b''.join((b'%x\r\n' % size, head, data, b'\r\n\r\n')))
+            else:
+                self.write_body(b''.join((head, data, b'\r\n')))
+        tail = f'--{boundary}--\r\n'.encode('latin-1')
+        self.wfile.write(b'%x\r\n%s\r\n0\r\n\r\n' % (len(tail), tail) if chunked else tail)
+
+    def is_not_modified(self, etag, mtime):
+        """Evaluate If-None-Match (preferred) or If-Modified-Since"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since is None:
+            return False
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if since is None or since.tzinfo is None:
+            return False
+        # Last-Modified has one-second resolution
+        return int(mtime) <= since.timestamp()
     
     def list_directory(self, path):
         """Override to provide JSON directory listing"""
         # Check if JSON listing is requested
-        if '?json=1' in self.path:
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        if query.get('json') == ['1']:
+            cache = getattr(self.server, 'listing_cache', None) or ListingCache()
             try:
-                files = []
-                for item in os.listdir(path):
-                    item_path = os.path.join(path, item)
-                    if os.path.isfile(item_path):
-                        stat = os.stat(item_path)
-                        files.append({
-                            'name': item,
-                            'size': stat.st_size,
-                            'type': 'file'
-                        })
-                    elif os.path.isdir(item_path):
-                        files.append({
-                            'name': item,
-                            'type': 'directory'
-                        })
-                
-                # Send JSON response
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps(files).encode('utf-8'))
-                return None
-            except Exception as e:
+                entry = cache.get(path)
+            except OSError as e:
                 self.send_error(500, f"Error listing directory: {str(e)}")
                 return None
+            return self.send_cached_response(entry, 'application/json')
         
         # Default directory listing
         return super().list_directory(path)
@@ -81,36 +2230,103 @@ def open_browser_delayed(url, delay=2):
     thread = threading.Thread(target=_open, daemon=True)
     thread.start()
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Serve the 360° Image Viewer')
+    parser.add_argument('--production', action='store_true',
+                        help='Production mode: bind to --host/--port and do not open a browser')
+    parser.add_argument('--host', default=None,
+                        help='Bind address (default: 0.0.0.0 in production, all interfaces otherwise)')
+    parser.add_argument('--port', type=int, default=None,
+                        help='Port to listen on (default: 8080 in production, random 8000-8999 otherwise)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Size of the request thread pool (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help=f'Connections queued for a free worker (default: {DEFAULT_MAX_PENDING})')
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_MB,
+                        help=f'Memory for hot files, 0 disables the cache (default: {DEFAULT_CACHE_MB})')
+    parser.add_argument('--cache-max-file-mb', type=float, default=DEFAULT_CACHE_MAX_FILE_MB,
+                        help=f'Larger files are sent with sendfile instead (default: {DEFAULT_CACHE_MAX_FILE_MB})')
+    parser.add_argument('--no-browser', action='store_true',
+                        help='Do not open a browser window')
+    parser.add_argument('--no-metrics', action='store_true',
+                        help='Do not collect request metrics or serve /metrics')
+    parser.add_argument('--no-scheduler', action='store_true',
+                        help='Serve requests in arrival order, without tiers, per-client limits or rate caps')
+    parser.add_argument('--transfers', type=int, default=None,
+                        help='Responses sent at once, the rest wait most urgent first (default: half the workers)')
+    parser.add_argument('--tenant-transfers', type=int, default=None,
+                        help='Responses sent at once per client folder (default: half the transfers)')
+    parser.add_argument('--visitor-transfers', type=int, default=DEFAULT_VISITOR_TRANSFERS,
+                        help=f'Responses sent at once per remote address, 0 for no cap; only useful without a proxy '
+                             f'or CDN in front (default: {DEFAULT_VISITOR_TRANSFERS})')
+    parser.add_argument('--tenant-rate-mb', type=float, default=0,
+                        help='Bandwidth cap per client folder in MB/s, 0 for none (default: 0)')
+    parser.add_argument('--prefetch-rate-mb', type=float, default=0,
+                        help='Bandwidth cap of all full-frame and model transfers in MB/s, 0 for none (default: 0)')
+    parser.add_argument('--beacon-log', default=BEACON_LOG,
+                        help=f'Append-only log of client timing beacons, "" to keep them in memory only '
+                             f'(default: {BEACON_LOG})')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
     # Change to the directory where this script is located
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
     
-    # Find an available random port
-    PORT = find_available_port()
+    if args.production:
+        host = args.host if args.host is not None else '0.0.0.0'
+        PORT = args.port if args.port is not None else 8080
+    else:
+        host = args.host if args.host is not None else ''
+        # Find an available random port
+        PORT = args.port if args.port is not None else find_available_port()
     
-    with socketserver.TCPServer(("", PORT), MyHTTPRequestHandler) as httpd:
-        url = f"http://localhost:{PORT}"
+    with ThreadPoolHTTPServer((host, PORT), MyHTTPRequestHandler,
+                              max_workers=args.workers, max_pending=args.max_pending,
+                              cache_bytes=args.cache_mb * 1024 * 1024,
+                              cache_max_file_bytes=int(args.cache_max_file_mb * 1024 * 1024),
+                              metrics=not args.no_metrics, beacon_log=args.beacon_log or None,
+                              scheduler=not args.no_scheduler, transfers=args.transfers,
+                              tenant_transfers=args.tenant_transfers, visitor_transfers=args.visitor_transfers,
+                              tenant_rate=int(args.tenant_rate_mb * 1024 * 1024),
+                              prefetch_rate=int(args.prefetch_rate_mb * 1024 * 1024)) as httpd:
+        url = f"http://{host if host not in ('', '0.0.0.0') else 'localhost'}:{PORT}"
         url_with_client = f"{url}?clientID=CLT695425"
+        open_browser = not (args.production or args.no_browser)
         
         print("=" * 60)
         print("🚀 360° Image Viewer Server Started!")
         print("=" * 60)
         print(f"\n📍 Server running at: {url}")
         print(f"\n🎯 Demo scene URL: {url_with_client}")
-        print(f"\n🌐 Opening browser in 2 seconds...")
-        print("   (Or manually open the URL above)\n")
+        print(f"\n🧵 Worker threads: {args.workers} (HTTP/1.1 keep-alive)")
+        if httpd.scheduler is not None:
+            scheduler = httpd.scheduler
+            per_visitor = f", {scheduler.visitor_transfers} per address" if scheduler.visitor_transfers else ""
+            print(f"\n🚦 Transfers: {scheduler.transfers} at once, {scheduler.tenant_transfers} per client"
+                  f"{per_visitor} (first frame > light > full > model)")
+        if open_browser:
+            print(f"\n🌐 Opening browser in 2 seconds...")
+            print("   (Or manually open the URL above)\n")
+        else:
+            print()
         print("Press Ctrl+C to stop the server\n")
         print("=" * 60)
         
         # Open browser automatically with demo clientID
-        open_browser_delayed(url_with_client, delay=2)
+        if open_browser:
+            open_browser_delayed(url_with_client, delay=2)
         
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\n\n🛑 Server stopped.")
+            if httpd.file_cache is not None:
+                stats = httpd.file_cache.stats()
+                print(f"   Cache: {stats['hits']} hits, {stats['misses']} misses, "
+                      f"{stats['evictions']} evictions, {stats['bytes'] / 1e6:.1f} MB held")
 
 if __name__ == "__main__":
     main()
-
-
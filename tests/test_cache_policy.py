@@ -0,0 +1,32 @@
+"""
+Cache-Control policies of server.py by request path.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import server  # noqa: E402
+
+
+class CachePolicyTests(unittest.TestCase):
+
+    def test_bundles_and_versioned_urls_are_immutable(self):
+        for path in ('/dist/app.3f2a9c1b7e.js', '/dist/style-2.0123456789.css',
+                     '/CLT695425/3D-Images/light/1.jpg?v=9c1b7e3f2a'):
+            self.assertEqual(server.cache_policy(path), server.CACHE_IMMUTABLE, path)
+
+    def test_dotted_names_are_not_content_hashed(self):
+        self.assertEqual(server.cache_policy('/CLT/3D-Images/render.20240101.jpg'), server.CACHE_MEDIA)
+        self.assertEqual(server.cache_policy('/CLT/3D/model.deadbeef12.glb'), server.CACHE_MEDIA)
+        self.assertEqual(server.cache_policy('/js/viewer.12345678.js'), server.CACHE_REVALIDATE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Which existing light images create-light-images.py replaces: WebP/AVIF files
+of earlier versions of the script (which kept no index) are its own output,
+a client's hand-made light/*.jpg is not.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+SCRIPT = REPO_DIR / 'create-light-images.py'
+BLUE = (0, 0, 255)
+RED = (255, 0, 0)
+
+
+@unittest.skipUnless(PIL_AVAILABLE, 'needs Pillow')
+class ExistingLightImageTests(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.client = self.root / 'CLIENT'
+        self.light = self.client / '3D-Images' / 'light'
+        self.light.mkdir(parents=True)
+        self.write_source(BLUE)
+        # What the pre-index version of the script left behind: a WebP and no .light-index.json
+        Image.new('RGB', (64, 48), BLUE).save(self.light / '0.webp', 'WEBP', quality=50)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write_source(self, color):
+        Image.new('RGB', (64, 48), color).save(self.client / '3D-Images' / '0.png')
+
+    def run_script(self, *args):
+        result = subprocess.run([sys.executable, str(SCRIPT), str(self.client), '--jobs', '1', *args],
+                                capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def color(self, name):
+        with Image.open(self.light / name) as img:
+            return img.convert('RGB').getpixel((32, 24))
+
+    def assertColor(self, name, expected):
+        # Lossy encodings: close to the expected color
+        self.assertTrue(all(abs(a - b) < 24 for a, b in zip(self.color(name), expected)),
+                        f"{name} is {self.color(name)}, expected {expected}")
+
+    def test_force_replaces_webp_of_earlier_versions(self):
+        before = (self.light / '0.webp').read_bytes()
+        output = self.run_script('--force', '--formats', 'webp')
+        self.assertIn('To process: 1', output)
+        self.assertNotIn('kept', output)
+        self.assertNotEqual((self.light / '0.webp').read_bytes(), before)
+
+    def test_changed_source_updates_every_format(self):
+        self.run_script()
+        self.write_source(RED)
+        os.utime(self.client / '3D-Images' / '0.png', ns=(1 << 62, 1 << 62))
+        self.run_script()
+        for path in self.light.iterdir():
+            if path.suffix in ('.webp', '.avif'):
+                self.assertColor(path.name, RED)
+
+    def test_dropped_format_of_earlier_versions_is_removed(self):
+        self.run_script('--formats', 'avif')
+        if (self.light / '0.avif').exists():
+            self.assertFalse((self.light / '0.webp').exists())
+
+    def test_hand_made_jpeg_is_kept(self):
+        Image.new('RGB', (64, 48), BLUE).save(self.light / '0.jpg', 'JPEG')
+        before = (self.light / '0.jpg').read_bytes()
+        self.write_source(RED)
+        output = self.run_script('--force', '--formats', 'webp,jpg')
+        self.assertIn('Existing light images kept (not written by this script): 1', output)
+        self.assertEqual((self.light / '0.jpg').read_bytes(), before)
+        self.assertColor('0.webp', RED)
+
+
+if __name__ == '__main__':
+    unittest.main()
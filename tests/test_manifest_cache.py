@@ -0,0 +1,63 @@
+"""
+Manifests server.py builds for client folders without image-manifest.json,
+from frames of the demo client folder CLT695425/.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import server  # noqa: E402
+
+LIGHT_DIR = os.path.join(REPO_DIR, 'CLT695425', '3D-Images', 'light')
+
+
+class ManifestCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.images = os.path.join(self.root, 'CLIENT', '3D-Images')
+        self.light = os.path.join(self.images, 'light')
+        os.makedirs(self.light)
+        for name in ('1.jpg', '2.jpg', '3.jpg'):
+            shutil.copy2(os.path.join(LIGHT_DIR, name), self.light)
+        self.cache = server.ManifestCache()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def manifest(self):
+        return json.loads(self.cache.get(self.images, 'CLIENT/').body)
+
+    def test_unchanged_folder_is_not_rebuilt(self):
+        first = self.cache.get(self.images, 'CLIENT/')
+        self.assertIs(self.cache.get(self.images, 'CLIENT/'), first)
+        self.assertEqual(self.cache.builds, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.images, '.manifest-index.json')))
+
+    def test_frame_overwritten_in_place_gets_a_new_hash(self):
+        before = self.manifest()['lightFrames'][1]['hash']
+        folder_mtimes = server.folder_mtimes(self.images, self.light)
+
+        # Same name, new content; the folder mtimes do not change
+        with open(os.path.join(LIGHT_DIR, '4.jpg'), 'rb') as source, \
+                open(os.path.join(self.light, '2.jpg'), 'wb') as target:
+            target.write(source.read())
+        self.assertEqual(server.folder_mtimes(self.images, self.light), folder_mtimes)
+
+        after = self.manifest()['lightFrames'][1]['hash']
+        self.assertNotEqual(after, before)
+        self.assertEqual(self.cache.builds, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Range, multipart/byteranges and If-Range handling of server.py, checked
+against the demo client folder CLT695425/.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+
+import http.client
+import os
+import sys
+import threading
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import server  # noqa: E402
+
+FRAME = 'CLT695425/3D-Images/1.jpg'
+MODEL = 'CLT695425/3D/Serenia Zenata Orbiting Mockup Units Boxes.glb'
+
+
+class RangeRequestTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Handlers serve the current directory
+        cls._cwd = os.getcwd()
+        os.chdir(REPO_DIR)
+        cls.httpd = server.ThreadPoolHTTPServer(('127.0.0.1', 0), server.MyHTTPRequestHandler,
+                                                max_workers=4, log_latency=False, beacon_log=None)
+        cls.thread = threading.Thread(target=cls.httpd.serve_forever, daemon=True)
+        cls.thread.start()
+        with open(os.path.join(REPO_DIR, FRAME), 'rb') as f:
+            cls.frame = f.read()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+        cls.thread.join()
+        os.chdir(cls._cwd)
+
+    def request(self, path, headers=None):
+        """(response, body) of a GET with the given headers"""
+        connection = http.client.HTTPConnection(*self.httpd.server_address, timeout=10)
+        try:
+            connection.request('GET', '/' + path.replace(' ', '%20'), headers=headers or {})
+            response = connection.getresponse()
+            return response, response.read()
+        finally:
+            connection.close()
+
+    def test_full_response_advertises_ranges(self):
+        response, body = self.request(FRAME)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader('Accept-Ranges'), 'bytes')
+        self.assertEqual(body, self.frame)
+
+    def test_single_range(self):
+        response, body = self.request(FRAME, {'Range': 'bytes=100-1099'})
+        self.assertEqual(response.status, 206)
+        self.assertEqual(response.getheader('Content-Range'), f'bytes 100-1099/{len(self.frame)}')
+        self.assertEqual(response.getheader('Content-Length'), '1000')
+        self.assertEqual(body, self.frame[100:1100])
+
+    def test_suffix_and_open_ended_ranges(self):
+        response, body = self.request(FRAME, {'Range': 'bytes=-500'})
+        self.assertEqual(response.status, 206)
+        self.assertEqual(body, self.frame[-500:])
+
+        response, body = self.request(FRAME, {'Range': f'bytes={len(self.frame) - 10}-'})
+        self.assertEqual(response.status, 206)
+        self.assertEqual(body, self.frame[-10:])
+
+    def test_multipart_byteranges(self):
+        response, body = self.request(FRAME, {'Range': 'bytes=0-99,2000-2099'})
+        self.assertEqual(response.status, 206)
+        content_type = response.getheader('Content-Type')
+        self.assertTrue(content_type.startswith('multipart/byteranges; boundary='))
+        self.assertEqual(int(response.getheader('Content-Length')), len(body))
+
+        boundary = content_type.split('boundary=', 1)[1].encode('latin-1')
+        parts = body.split(b'--' + boundary)
+        self.assertEqual(parts[-1], b'--\r\n')
+        ranges = []
+        for part in parts[1:-1]:
+            head, _, data = part.partition(b'\r\n\r\n')
+            self.assertIn(b'Content-Type: image/jpeg', head)
+            content_range = next(line for line in head.split(b'\r\n') if line.startswith(b'Content-Range:'))
+            ranges.append((content_range.decode('latin-1'), data.removesuffix(b'\r\n')))
+        self.assertEqual(ranges, [
+            (f'Content-Range: bytes 0-99/{len(self.frame)}', self.frame[0:100]),
+            (f'Content-Range: bytes 2000-2099/{len(self.frame)}', self.frame[2000:2100]),
+        ])
+
+    def test_overlapping_ranges_are_merged(self):
+        response, body = self.request(FRAME, {'Range': 'bytes=0-99,50-199'})
+        self.assertEqual(response.status, 206)
+        self.assertEqual(response.getheader('Content-Range'), f'bytes 0-199/{len(self.frame)}')
+        self.assertEqual(body, self.frame[:200])
+
+    def test_unsatisfiable_range(self):
+        response, body = self.request(FRAME, {'Range': f'bytes={len(self.frame) + 1}-'})
+        self.assertEqual(response.status, 416)
+        self.assertEqual(response.getheader('Content-Range'), f'bytes */{len(self.frame)}')
+        self.assertEqual(body, b'')
+
+    def test_if_range_matching_etag(self):
+        etag = self.request(FRAME)[0].getheader('ETag')
+        response, body = self.request(FRAME, {'Range': 'bytes=0-9', 'If-Range': etag})
+        self.assertEqual(response.status, 206)
+        self.assertEqual(body, self.frame[:10])
+
+    def test_if_range_stale_etag(self):
+        response, body = self.request(FRAME, {'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, self.frame)
+
+    def test_model_range(self):
+        with open(os.path.join(REPO_DIR, MODEL), 'rb') as f:
+            model = f.read()
+        # Resuming a model download from the middle
+        response, body = self.request(MODEL, {'Range': f'bytes={len(model) // 2}-'})
+        self.assertEqual(response.status, 206)
+        self.assertEqual(body, model[len(model) // 2:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+Request tiers of server.py's FairScheduler against the demo client folder CLT695425/.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import server  # noqa: E402
+
+
+class ClassifyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = server.FairScheduler(REPO_DIR, transfers=8)
+
+    def tier(self, path):
+        transfer = self.scheduler.acquire(path, '10.0.0.1')
+        self.scheduler.release(transfer)
+        return transfer.tier
+
+    def test_first_frame_for_every_visitor_behind_one_address(self):
+        # Frame 0 of the rotation, whichever URL form and however often it is requested
+        for path in ('/CLT695425/3D-Images/light/1.jpg', '/CLT695425/3D-Images/light/1',
+                     '/CLT695425/3D-Images/light/1.jpg?v=abc', '/CLT695425/3D-Images/light/1.jpg'):
+            self.assertEqual(self.tier(path), 'first', path)
+        self.assertEqual(self.tier('/CLT695425/3D-Images/light/2.jpg'), 'light')
+        self.assertEqual(self.tier('/CLT695425/3D-Images/light/10.jpg'), 'light')
+
+    def test_tiers(self):
+        self.assertEqual(self.tier('/index.html?clientID=CLT695425'), 'first')
+        self.assertEqual(self.tier('/CLT695425/image-manifest.json'), 'first')
+        self.assertEqual(self.tier('/CLT695425/3D-Images/1.jpg'), 'full')
+        self.assertEqual(self.tier('/CLT695425/3D/model.glb'), 'model')
+        self.assertEqual(self.tier('/CLT695425/tiles/1/0/0_0.webp'), 'light')
+        self.assertEqual(self.tier('/CLT695425/hitmaps/1'), 'light')
+        self.assertEqual(self.tier('/CLT695425/frames/stream?start=0'), 'light')
+        self.assertEqual(self.tier('/CLT695425/frames/stream?start=0&tier=full'), 'full')
+        self.assertIsNone(self.scheduler.acquire('/metrics', '10.0.0.1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
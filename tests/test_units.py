@@ -0,0 +1,123 @@
+"""
+Unit list joins of server.py against the demo client folder CLT695425/.
+
+The demo CSV lists block 1 shops and offices (MAG1, B01...), which are not
+modelled in the demo GLB (buildings C and D: "C-101", "D-901"...), so it
+joins no object by name. The tests add an object column to a copy of it.
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+
+import csv
+import http.client
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import server  # noqa: E402
+
+CLIENT = os.path.join(REPO_DIR, 'CLT695425')
+# Demo units mapped to objects of the demo model for the tests
+OBJECTS = {'MAG1': 'COMMERCE_17', 'B01': 'D-701', 'B02': 'C-107'}
+
+
+def read_units():
+    with open(os.path.join(CLIENT, 'Units-Lists', 'Units-lists.csv'), newline='', encoding='utf-8-sig') as f:
+        return list(csv.reader(f))
+
+
+class ObjectKeyTests(unittest.TestCase):
+
+    def test_exporter_suffixes_and_separators(self):
+        self.assertEqual(server.object_key('D-701.001'), 'D701')
+        self.assertEqual(server.object_key('C-107_ID196082'), 'C107')
+        self.assertEqual(server.object_key('commerce 17'), 'COMMERCE17')
+        self.assertEqual(server.object_key('D701'), server.object_key('D-701'))
+
+    def test_demo_units_match_no_object_by_name(self):
+        records = read_units()
+        names = server.UnitsCache().object_names([os.path.join(CLIENT, '3D', name)
+                                                  for name in os.listdir(os.path.join(CLIENT, '3D'))])
+        self.assertTrue(names)
+        table = server.UnitTable(records[0], records[1:], names, None)
+        self.assertEqual(len(table.rows), 46)
+        self.assertEqual(table.by_object, {})
+
+
+class UnitObjectJoinTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # A client folder with the demo model and the demo CSV plus a "3D OBJECT" column
+        cls.root = tempfile.mkdtemp()
+        client = os.path.join(cls.root, 'CLIENT')
+        shutil.copytree(os.path.join(CLIENT, '3D'), os.path.join(client, '3D'))
+        os.makedirs(os.path.join(client, 'Units-Lists'))
+        records = read_units()
+        ref = records[0].index('UNITREF')
+        with open(os.path.join(client, 'Units-Lists', 'units.csv'), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(records[0] + ['3D OBJECT'])
+            for record in records[1:]:
+                writer.writerow(record + [OBJECTS.get(record[ref], '')])
+
+        cls._cwd = os.getcwd()
+        os.chdir(cls.root)
+        cls.httpd = server.ThreadPoolHTTPServer(('127.0.0.1', 0), server.MyHTTPRequestHandler,
+                                                max_workers=4, log_latency=False, beacon_log=None)
+        cls.thread = threading.Thread(target=cls.httpd.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+        cls.thread.join()
+        os.chdir(cls._cwd)
+        shutil.rmtree(cls.root)
+
+    def get_json(self, path):
+        connection = http.client.HTTPConnection(*self.httpd.server_address, timeout=10)
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            body = response.read()
+            return response.status, json.loads(body) if response.status == 200 else None
+        finally:
+            connection.close()
+
+    def test_unit_by_ref_carries_its_object(self):
+        status, unit = self.get_json('/CLIENT/units/MAG1')
+        self.assertEqual(status, 200)
+        self.assertEqual(unit['object'], 'COMMERCE_17')
+        self.assertEqual(unit['price'], 5764500)
+        self.assertNotIn('3dObject', unit)
+
+    def test_unit_by_object_name(self):
+        for name, ref in (('D-701', 'B01'), ('D-701.001', 'B01'), ('D-701_3', 'B01'),
+                          ('C-107_ID196084', 'B02'), ('COMMERCE_17', 'MAG1')):
+            status, unit = self.get_json(f'/CLIENT/units/object/{name}')
+            self.assertEqual(status, 200, name)
+            self.assertEqual(unit['ref'], ref, name)
+
+    def test_unjoined_object(self):
+        status, _ = self.get_json('/CLIENT/units/object/D-901')
+        self.assertEqual(status, 404)
+
+    def test_object_filter(self):
+        status, page = self.get_json('/CLIENT/units?object=D-701,COMMERCE_17&sort=ref')
+        self.assertEqual(status, 200)
+        refs = [row[page['fields'].index('ref')] for row in page['units']]
+        self.assertEqual(refs, ['B01', 'MAG1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -27,6 +27,45 @@ function getRepoBasePath() {
     return '/';
 }
 
+// Startup timings (ms since navigation start) sent to server.py's /beacon in batches
+class PerformanceBeacon {
+    constructor() {
+        this.url = `${getRepoBasePath()}beacon`;
+        this.client = getClientID() || '';
+        this.samples = [];
+        this.recorded = new Set();
+        this.flushTimer = null;
+        this.flushDelay = 5000; // Batch the timings recorded close together
+        
+        // Send whatever is left when the page is hidden or closed
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') this.flush();
+        });
+        window.addEventListener('pagehide', () => this.flush());
+    }
+    
+    record(metric, value = performance.now()) {
+        // Each metric once per page load
+        if (this.recorded.has(metric)) return;
+        this.recorded.add(metric);
+        this.samples.push({ metric, value: Math.round(value) });
+        clearTimeout(this.flushTimer);
+        this.flushTimer = setTimeout(() => this.flush(), this.flushDelay);
+    }
+    
+    flush() {
+        clearTimeout(this.flushTimer);
+        if (!this.samples.length || !navigator.sendBeacon) return;
+        // text/plain keeps the beacon a simple request (no CORS preflight)
+        const body = new Blob([JSON.stringify({ client: this.client, samples: this.samples })], { type: 'text/plain' });
+        if (navigator.sendBeacon(this.url, body)) {
+            this.samples = [];
+        }
+    }
+}
+
+window.viewerBeacon = new PerformanceBeacon();
+
 // 360° Product Viewer - Drag to rotate through images
 class ProductViewer {
     constructor() {
@@ -51,8 +90,13 @@ class ProductViewer {
         // Two-tier image system
         this.lightImages = [];  // Fast loading, lower res for dragging
         this.fullImages = [];   // High res, loaded on demand
+        this.lightFrameInfo = []; // Per-frame {hash, bytes, width, height} from the manifest
+        this.fullFrameInfo = [];
+        // Request format-neutral frame URLs (server.py sends the smallest encoding); off on static hosting
+        this.negotiateFormats = !window.location.hostname.includes('.github.io');
         this.lightImageElements = [];
         this.fullImageElements = [];
+        this.placeholderElements = []; // Decoded manifest placeholders, painted until a frame arrives
         
         // Rotation drag controls
         this.isDragging = false;
@@ -79,6 +123,18 @@ class ProductViewer {
         this.lastZoomMouseX = 0;
         this.lastZoomMouseY = 0;
         
+        // Deep-zoom tiles (create-light-images.py --tiles, served by server.py)
+        this.tileDescriptors = new Map(); // frame name -> descriptor, or null if none
+        this.tileCache = new Map(); // tile URL -> Image, oldest first
+        this.maxCachedTiles = 256;
+        
+        // Light frames packed into one file (create-image-manifest.py --pack)
+        this.lightPack = null;
+        this.lightPackPromise = null;
+        
+        // Unpacked light frames in one spiral-ordered response (server.py /frames/stream)
+        this.frameStreamPromise = null;
+        
         this.useFullRes = false; // Start with light images
         this.fullResLoadTimeout = null;
         this.discoveryComplete = false;
@@ -136,8 +192,12 @@ class ProductViewer {
                     
                     this.lightImages = [firstLightPath];
                     this.fullImages = [firstFullPath];
+                    this.lightPack = manifest.lightPack || null;
+                    this.lightFrameInfo = manifest.lightFrames || [];
                     this.currentImageIndex = 0;
                     
+                    // Blurred placeholder from the manifest while the first frame downloads
+                    this.drawPlaceholder(0);
                     this.loadSingleImage(0, 'light').then(() => {
                         this.showImage(0, 'light');
                         setTimeout(() => {
@@ -243,6 +303,9 @@ class ProductViewer {
                 const manifest = await manifestResponse.json();
                 this.lightImages = manifest.light || [];
                 this.fullImages = manifest.full || [];
+                this.lightPack = manifest.lightPack || null;
+                this.lightFrameInfo = manifest.lightFrames || [];
+                this.fullFrameInfo = manifest.fullFrames || [];
                 this.totalImages = Math.max(this.lightImages.length, this.fullImages.length);
                 return;
             }
@@ -570,7 +633,10 @@ class ProductViewer {
         this.resizeCanvas();
     }
     
-    drawImage(img) {
+    drawImage(img, aspect = null) {
+        // Placeholders pass the frame's aspect ratio, which their few pixels only approximate
+        window.viewerBeacon.record(aspect ? 'firstPlaceholder' : 'firstFrame');
+        
         // Clear canvas
         this.ctx.fillStyle = '#000000';
         this.ctx.fillRect(0, 0, this.canvas.width, this.canvas.height);
@@ -580,7 +646,7 @@ class ProductViewer {
         
         // Calculate base dimensions to fit image while maintaining aspect ratio
         const canvasAspect = this.canvas.width / this.canvas.height;
-        const imgAspect = img.width / img.height;
+        const imgAspect = aspect || img.width / img.height;
         
         let baseWidth, baseHeight, baseX, baseY;
         
@@ -610,6 +676,11 @@ class ProductViewer {
         // Draw image with transformations
         this.ctx.drawImage(img, baseX, baseY, baseWidth, baseHeight);
         
+        // Sharpen the visible area with deep-zoom tiles when zoomed past the image resolution
+        if (this.zoom > 1.0 && !this.isRotating && !aspect) {
+            this.drawTiles(img, baseX, baseY, baseWidth, baseHeight);
+        }
+        
         // Restore context state
         this.ctx.restore();
         
@@ -617,7 +688,273 @@ class ProductViewer {
         this.baseImageBounds = { x: baseX, y: baseY, width: baseWidth, height: baseHeight };
     }
     
+    drawPlaceholder(index) {
+        // Paint the manifest's tiny RGB444 grid (or dominant color) of a light frame, scaled up and smoothed
+        const info = this.lightFrameInfo[index];
+        if (!info || !info.color) return false;
+        
+        if (!this.placeholderElements[index]) {
+            const grid = info.placeholder;
+            const canvas = document.createElement('canvas');
+            canvas.width = grid ? grid.w : 1;
+            canvas.height = grid ? grid.h : 1;
+            const ctx = canvas.getContext('2d');
+            if (grid) {
+                // Two 4-bit channels per byte, high nibble first: r g b r g b ...
+                const bytes = atob(grid.data);
+                const pixels = ctx.createImageData(grid.w, grid.h);
+                for (let i = 0, p = 0; p < pixels.data.length; i++) {
+                    const nibble = (bytes.charCodeAt(i >> 1) >> (i & 1 ? 0 : 4)) & 0xF;
+                    pixels.data[p++] = nibble * 17;
+                    if (p % 4 === 3) pixels.data[p++] = 255;
+                }
+                ctx.putImageData(pixels, 0, 0);
+            } else {
+                ctx.fillStyle = info.color;
+                ctx.fillRect(0, 0, 1, 1);
+            }
+            this.placeholderElements[index] = canvas;
+        }
+        
+        const aspect = info.width && info.height ? info.width / info.height : this.placeholderElements[index].width / this.placeholderElements[index].height;
+        this.drawImage(this.placeholderElements[index], aspect);
+        return true;
+    }
+    
+    getFrameName(index) {
+        // Frame name shared by light, full and tile files: "3D-Images/light/12.webp" -> "12"
+        const src = this.lightImages[index] || this.fullImages[index];
+        if (!src) return null;
+        const file = src.split('/').pop();
+        return decodeURIComponent(file.replace(/\.[^.]+$/, ''));
+    }
+    
+    getTileDescriptor(index) {
+        // Returns the frame's pyramid descriptor, or null while loading / if it has no tiles
+        const frame = this.getFrameName(index);
+        if (!frame) return null;
+        if (this.tileDescriptors.has(frame)) {
+            return this.tileDescriptors.get(frame);
+        }
+        this.tileDescriptors.set(frame, null);
+        const url = `${this.repoBasePath}${this.basePath}tiles/${encodeURIComponent(frame)}`.replace(/\/+/g, '/');
+        fetch(url)
+            .then(response => response.ok ? response.json() : null)
+            .then(descriptor => {
+                if (!descriptor || !descriptor.levels) return;
+                this.tileDescriptors.set(frame, descriptor);
+                if (this.getFrameName(this.currentImageIndex) === frame) {
+                    this.redrawCurrentImage();
+                }
+            })
+            .catch(() => {});
+        return null;
+    }
+    
+    getTile(frame, level, x, y) {
+        // Returns a loaded tile image, starting the download if needed
+        const url = `${this.repoBasePath}${this.basePath}tiles/${encodeURIComponent(frame)}/${level}/${x}/${y}`.replace(/\/+/g, '/');
+        let tile = this.tileCache.get(url);
+        if (tile) {
+            // Mark as recently used
+            this.tileCache.delete(url);
+            this.tileCache.set(url, tile);
+            return tile.complete && tile.naturalWidth > 0 ? tile : null;
+        }
+        tile = new Image();
+        tile.onload = () => {
+            if (this.getFrameName(this.currentImageIndex) === frame) {
+                this.redrawCurrentImage();
+            }
+        };
+        tile.src = url;
+        this.tileCache.set(url, tile);
+        // Keep memory bounded by the viewport, not by the source resolution
+        while (this.tileCache.size > this.maxCachedTiles) {
+            this.tileCache.delete(this.tileCache.keys().next().value);
+        }
+        return null;
+    }
+    
+    drawTiles(img, baseX, baseY, baseWidth, baseHeight) {
+        // Called inside drawImage() with the zoom/pan transform applied
+        const descriptor = this.getTileDescriptor(this.currentImageIndex);
+        if (!descriptor) return;
+        
+        // Pick the smallest level at least as detailed as the frame is drawn on screen
+        const screenWidth = baseWidth * this.zoom * (window.devicePixelRatio || 1);
+        let level = descriptor.levels.findIndex(info => info.width >= screenWidth);
+        if (level < 0) level = descriptor.levels.length - 1;
+        const info = descriptor.levels[level];
+        
+        // The loaded image is already sharp enough
+        if (info.width <= img.width) return;
+        
+        // Visible canvas rectangle mapped back to untransformed frame coordinates
+        const centerX = baseX + baseWidth / 2;
+        const centerY = baseY + baseHeight / 2;
+        const left = (0 - centerX - this.panX) / this.zoom + centerX;
+        const right = (this.canvas.width - centerX - this.panX) / this.zoom + centerX;
+        const top = (0 - centerY - this.panY) / this.zoom + centerY;
+        const bottom = (this.canvas.height - centerY - this.panY) / this.zoom + centerY;
+        
+        // Frame coordinates -> level pixels -> tile indices
+        const scaleX = info.width / baseWidth;
+        const scaleY = info.height / baseHeight;
+        const tileSize = descriptor.tileSize;
+        const firstCol = Math.max(0, Math.floor((left - baseX) * scaleX / tileSize));
+        const lastCol = Math.min(info.columns - 1, Math.floor((right - baseX) * scaleX / tileSize));
+        const firstRow = Math.max(0, Math.floor((top - baseY) * scaleY / tileSize));
+        const lastRow = Math.min(info.rows - 1, Math.floor((bottom - baseY) * scaleY / tileSize));
+        
+        const frame = this.getFrameName(this.currentImageIndex);
+        for (let y = firstRow; y <= lastRow; y++) {
+            for (let x = firstCol; x <= lastCol; x++) {
+                const tile = this.getTile(frame, level, x, y);
+                if (tile) {
+                    this.ctx.drawImage(
+                        tile,
+                        baseX + x * tileSize / scaleX,
+                        baseY + y * tileSize / scaleY,
+                        tile.naturalWidth / scaleX,
+                        tile.naturalHeight / scaleY
+                    );
+                }
+            }
+        }
+    }
+    
+    async loadLightPack() {
+        // Stream the pack and decode every frame as soon as its bytes have arrived
+        const pack = this.lightPack;
+        const url = `${this.repoBasePath}${pack.url}`.replace(/\/+/g, '/');
+        const response = await fetch(url);
+        if (!response.ok || !response.body) {
+            throw new Error(`Pack request failed (${response.status})`);
+        }
+        
+        // Frames in the order they appear in the pack (spiral order from frame 0)
+        const order = pack.frames.map((_, index) => index)
+            .filter(index => pack.frames[index])
+            .sort((a, b) => pack.frames[a][0] - pack.frames[b][0]);
+        const buffer = new Uint8Array(pack.size);
+        const reader = response.body.getReader();
+        const decodes = [];
+        const decoded = new Map(); // offset -> decode, collapsed duplicates share one copy
+        let received = 0;
+        let next = 0;
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer.set(value.subarray(0, pack.size - received), received);
+            received = Math.min(pack.size, received + value.length);
+            
+            while (next < order.length) {
+                const index = order[next];
+                const [offset, length, type] = pack.frames[index];
+                if (offset + length > received) break;
+                if (decoded.has(offset)) {
+                    decodes.push(decoded.get(offset).then(img => {
+                        if (img && !this.lightImageElements[index]) this.lightImageElements[index] = img;
+                    }));
+                } else {
+                    const decode = this.decodePackedFrame(index, buffer.subarray(offset, offset + length), type);
+                    decoded.set(offset, decode);
+                    decodes.push(decode);
+                }
+                next++;
+            }
+            this.updateLoadingProgress(`Loading light images... ${next}/${order.length}`, next, order.length);
+        }
+        await Promise.all(decodes);
+    }
+    
+    async loadFrameStream(start, count = null) {
+        // server.py sends the frames in spiral order from `start`, one multipart part each.
+        // WebP is assumed decodable, as for the frame pack
+        const query = `start=${start}&tier=light${count ? `&count=${count}` : ''}`;
+        const url = `${this.repoBasePath}${this.basePath}frames/stream?${query}`.replace(/\/+/g, '/');
+        const response = await fetch(url, { headers: { Accept: 'image/webp,image/*;q=0.8,*/*;q=0.5' } });
+        const boundary = /boundary=([^;\s]+)/.exec(response.headers.get('Content-Type') || '');
+        if (!response.ok || !response.body || !boundary) {
+            throw new Error(`Frame stream request failed (${response.status})`);
+        }
+        
+        const total = parseInt(response.headers.get('X-Frame-Count'), 10) || count || this.totalImages;
+        const reader = response.body.getReader();
+        const headDecoder = new TextDecoder();
+        const decodes = [];
+        let buffer = new Uint8Array(0); // Bytes of the parts not parsed yet
+        let parts = 0;
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            const joined = new Uint8Array(buffer.length + value.length);
+            joined.set(buffer);
+            joined.set(value, buffer.length);
+            buffer = joined;
+            
+            // Every complete part: "--boundary", headers, blank line, Content-Length bytes, CRLF
+            while (true) {
+                let headEnd = -1;
+                for (let i = 0; i + 3 < Math.min(buffer.length, 1024); i++) {
+                    if (buffer[i] === 13 && buffer[i + 1] === 10 && buffer[i + 2] === 13 && buffer[i + 3] === 10) {
+                        headEnd = i;
+                        break;
+                    }
+                }
+                if (headEnd < 0) break;
+                const head = headDecoder.decode(buffer.subarray(0, headEnd));
+                const length = parseInt((/content-length:\s*(\d+)/i.exec(head) || [])[1], 10);
+                const indices = ((/x-frame-index:\s*([\d,]+)/i.exec(head) || [])[1] || '').split(',').map(Number);
+                const type = ((/content-type:\s*([^\r\n]+)/i.exec(head) || [])[1] || '').trim();
+                if (isNaN(length)) break;
+                const bodyStart = headEnd + 4;
+                if (buffer.length < bodyStart + length + 2) break;
+                
+                const decode = this.decodePackedFrame(indices[0], buffer.subarray(bodyStart, bodyStart + length), type);
+                // Collapsed duplicates share the decoded frame
+                decodes.push(decode.then(img => {
+                    for (const index of indices) {
+                        if (img && !this.lightImageElements[index]) this.lightImageElements[index] = img;
+                    }
+                }));
+                buffer = buffer.subarray(bodyStart + length + 2);
+                parts++;
+                this.updateLoadingProgress(`Loading light images... ${parts}/${total}`, parts, total);
+            }
+        }
+        await Promise.all(decodes);
+    }
+    
+    decodePackedFrame(index, bytes, type) {
+        return new Promise(resolve => {
+            const img = new Image();
+            img.onload = () => {
+                if (!this.lightImageElements[index]) {
+                    this.lightImageElements[index] = img;
+                }
+                resolve(img);
+            };
+            img.onerror = () => resolve(null);
+            img.src = URL.createObjectURL(new Blob([bytes], { type }));
+        });
+    }
+    
     async loadSingleImage(index, tier = 'light') {
+        // Frames collapsed or delta-encoded by analyze-frames.py (light tier only)
+        const frameInfo = tier === 'light' ? this.lightFrameInfo[index] : null;
+        if (frameInfo && frameInfo.duplicateOf !== undefined && frameInfo.duplicateOf !== index) {
+            const original = this.lightImageElements[frameInfo.duplicateOf] || await this.loadSingleImage(frameInfo.duplicateOf, 'light');
+            this.lightImageElements[index] = original;
+            return original;
+        }
+        if (frameInfo && frameInfo.delta) {
+            return this.loadDeltaFrame(index, frameInfo.delta);
+        }
+        
         return new Promise((resolve, reject) => {
             const img = new Image();
             const src = tier === 'light' ? this.lightImages[index] : this.fullImages[index];
@@ -630,16 +967,48 @@ class ProductViewer {
             
             const targetArray = tier === 'light' ? this.lightImageElements : this.fullImageElements;
             
+            // Content-hash versioned URL, cached as immutable by server.py
+            const info = (tier === 'light' ? this.lightFrameInfo : this.fullFrameInfo)[index];
+            // Frames in several formats: the manifest lists a real file, "negotiated" is the same URL without extension
+            const negotiate = this.negotiateFormats && info && info.negotiated;
+            const file = negotiate ? src.replace(/\.[^./]+$/, '') : src;
+            const url = info && info.hash ? `${file}${file.includes('?') ? '&' : '?'}v=${info.hash}` : file;
+            
             img.onload = () => {
                 targetArray[index] = img;
                 resolve(img);
             };
             img.onerror = (err) => {
+                if (negotiate) {
+                    // No server.py behind this host: use the listed files from now on
+                    this.negotiateFormats = false;
+                    this.loadSingleImage(index, tier).then(resolve, reject);
+                    return;
+                }
                 console.warn(`Failed to load ${tier} image ${index}:`, err);
                 reject(err);
             };
-            img.src = src;
+            img.src = url;
+        });
+    }
+    
+    async loadDeltaFrame(index, delta) {
+        // Changed blocks of the frame drawn over its keyframe; the rest of the delta is transparent
+        const key = this.lightImageElements[delta.key] || await this.loadSingleImage(delta.key, 'light');
+        const patch = await new Promise((resolve, reject) => {
+            const img = new Image();
+            img.onload = () => resolve(img);
+            img.onerror = reject;
+            img.src = `${delta.url}?v=${delta.hash}`;
         });
+        const canvas = document.createElement('canvas');
+        canvas.width = key.width;
+        canvas.height = key.height;
+        const ctx = canvas.getContext('2d');
+        ctx.drawImage(key, 0, 0);
+        ctx.drawImage(patch, 0, 0);
+        this.lightImageElements[index] = canvas;
+        return canvas;
     }
     
     async progressivePreload() {
@@ -651,6 +1020,13 @@ class ProductViewer {
             
             this.updateLoadingProgress('Loading nearby images (light mode)...', 0, end - start);
             
+            // All nearby frames in one response where server.py serves them
+            try {
+                await this.loadFrameStream(this.currentImageIndex, nearbyRange * 2 + 1);
+            } catch (error) {
+                console.warn('Frame stream unavailable, loading frames one by one:', error);
+            }
+            
             let loadedCount = 0;
             for (let i = start; i < end; i++) {
                 if (!this.lightImageElements[i]) {
@@ -678,6 +1054,26 @@ class ProductViewer {
         }
         
         // Normal mode: Full preloading
+        // Priority 0: All light frames in one streamed response, if packed
+        if (this.lightPack) {
+            if (!this.lightPackPromise) {
+                this.updateLoadingProgress('Loading light images...', 0, this.totalImages || 1);
+                this.lightPackPromise = this.loadLightPack().catch(error => {
+                    // Fall back to one request per frame below
+                    console.warn('Failed to load light frame pack:', error);
+                });
+            }
+            await this.lightPackPromise;
+        } else if (!this.frameStreamPromise) {
+            // Priority 0 without a pack: every light frame in spiral order in one response
+            this.updateLoadingProgress('Loading light images...', 0, this.totalImages || 1);
+            this.frameStreamPromise = this.loadFrameStream(this.currentImageIndex).catch(error => {
+                // Fall back to one request per frame below
+                console.warn('Frame stream unavailable, loading frames one by one:', error);
+            });
+            await this.frameStreamPromise;
+        }
+        
         // Priority 1: Load nearby images first (spiral out from current)
         const priorityIndices = this.getSpiralOrder(this.currentImageIndex, 10);
         
@@ -712,6 +1108,7 @@ class ProductViewer {
         }
         
         this.updateLoadingProgress('All light images loaded! Loading HD...', this.totalImages, this.totalImages);
+        window.viewerBeacon.record('lightFramesLoaded');
         
         // Priority 3: Load full-res images (starting with nearby)
         const fullResPriority = this.getSpiralOrder(this.currentImageIndex, this.totalImages);
@@ -730,6 +1127,7 @@ class ProductViewer {
         }
         
         this.updateLoadingProgress('All images loaded!', this.totalImages, this.totalImages);
+        window.viewerBeacon.record('fullFramesLoaded');
         
         // Hide progress after 2 seconds
         setTimeout(() => {
@@ -1377,6 +1775,10 @@ class ProductViewer {
         
         // If image not loaded, load it first (especially important for scrubbing)
         if (!imageArray[index]) {
+            // Placeholder from the manifest until the light frame arrives
+            if (useTier === 'light') {
+                this.drawPlaceholder(index);
+            }
             try {
                 await this.loadSingleImage(index, useTier);
             } catch (error) {
@@ -148,6 +148,13 @@ class Viewer3D {
         this.mouse = new THREE.Vector2();
         this.isHoveringObject = false;
         
+        // Object-ID hit maps (create-hit-maps.py, served by server.py); raycasting is the fallback
+        this.gltfParser = null;
+        this.hitMapIndex = null;
+        this.hitObjects = null; // object ID -> mesh, index 0 = no object
+        this.hitMaps = new Map(); // frame name -> { width, height, ids }, or null while loading / if missing
+        this.maxCachedHitMaps = 16;
+        
         // Effect systems
         this.currentEffect = CONFIG_3D.EFFECT_TYPE;
         this.composer = null;
@@ -783,6 +790,9 @@ class Viewer3D {
         // Setup mouse move for hover detection
         this.setupInteraction();
         
+        // Pixel-lookup picking when the model has hit maps
+        this.loadHitMapIndex();
+        
         // Initialize cursor to 360 icon (default state - not hovering 3D objects)
         this.canvas.style.cursor = `url("${REPO_BASE_PATH}img/360icon.svg") 15 15, grab`;
         
@@ -814,6 +824,7 @@ class Viewer3D {
                 modelPath,
                 (gltf) => {
                     this.scene = gltf.scene;
+                    this.gltfParser = gltf.parser;
                     
                     // Extract cameras from the GLB file
                     this.cameras = [];
@@ -886,8 +897,17 @@ class Viewer3D {
                     });
                     
                     
+                    // World bounds never change: cache them per mesh (precomputed by optimize-glb.py when available)
+                    this.scene.updateMatrixWorld(true);
+                    this.meshes.forEach(mesh => {
+                        mesh.userData.worldBounds = this.getPrecomputedBounds(mesh) || new THREE.Box3().setFromObject(mesh);
+                    });
+                    
                     // Calculate bounding box to understand scene scale
-                    const box = new THREE.Box3().setFromObject(this.scene);
+                    const sceneBounds = this.scene.userData.bounds;
+                    const box = sceneBounds
+                        ? new THREE.Box3(new THREE.Vector3().fromArray(sceneBounds.min), new THREE.Vector3().fromArray(sceneBounds.max))
+                        : this.meshes.reduce((union, mesh) => union.union(mesh.userData.worldBounds), new THREE.Box3());
                     const size = box.getSize(new THREE.Vector3());
                     const center = box.getCenter(new THREE.Vector3());
                     
@@ -935,6 +955,7 @@ class Viewer3D {
                         }
                     }
                     
+                    window.viewerBeacon?.record('glbReady');
                     resolve();
                 },
                 (progress) => {
@@ -948,6 +969,118 @@ class Viewer3D {
         });
     }
     
+    getPrecomputedBounds(mesh) {
+        // optimize-glb.py stores [minX, minY, minZ, maxX, maxY, maxZ] per primitive in the node's extras;
+        // multi-primitive nodes load as a group with one child mesh per primitive
+        const owner = mesh.userData.primitiveBounds ? mesh : mesh.parent;
+        const list = owner && owner.userData.primitiveBounds;
+        if (!list) return null;
+        const bounds = list[owner === mesh ? 0 : owner.children.indexOf(mesh)];
+        if (!bounds) return null;
+        return new THREE.Box3(new THREE.Vector3().fromArray(bounds, 0), new THREE.Vector3().fromArray(bounds, 3));
+    }
+    
+    getHitMapUrl(suffix = '') {
+        const clientID = getClientID();
+        const basePath = clientID ? `${clientID}/` : '';
+        return `${getRepoBasePath()}${basePath}hitmaps${suffix}`.replace(/\/+/g, '/');
+    }
+    
+    async loadHitMapIndex() {
+        // index.json lists each object ID as [node index, primitive index, node name]
+        if (!this.gltfParser) return;
+        let index;
+        try {
+            const response = await fetch(this.getHitMapUrl());
+            if (!response.ok) return;
+            index = await response.json();
+        } catch (error) {
+            return;
+        }
+        
+        const nodes = new Map();
+        this.gltfParser.associations.forEach((reference, object) => {
+            if (reference && reference.type === 'nodes') nodes.set(reference.index, object);
+        });
+        
+        const objects = [null];
+        for (const [nodeIndex, primitiveIndex, name] of index.objects) {
+            const node = nodes.get(nodeIndex);
+            // A single-primitive node loads as the mesh itself, otherwise as a group of primitive meshes
+            const primitives = !node ? [] : node.isMesh ? [node] : node.children.filter(child => child.isMesh);
+            const mesh = primitives[primitiveIndex];
+            if (!mesh || (node.userData.name || '') !== (name || '')) {
+                // Maps rendered from another version of the model would pick the wrong objects
+                console.warn('Hit maps do not match the 3D model, picking with raycasts');
+                return;
+            }
+            objects.push(mesh);
+        }
+        
+        this.hitObjects = objects;
+        this.hitMapIndex = index;
+        if (this.viewer2D) this.getHitMap(this.viewer2D.currentImageIndex);
+    }
+    
+    getHitMap(imageIndex) {
+        // Returns the frame's decoded hit map, or null while loading / if it has none
+        if (!this.hitMapIndex || !this.viewer2D) return null;
+        const frame = this.viewer2D.getFrameName(imageIndex);
+        if (!frame || !this.hitMapIndex.frames.includes(frame)) return null;
+        if (this.hitMaps.has(frame)) {
+            return this.hitMaps.get(frame);
+        }
+        this.hitMaps.set(frame, null);
+        while (this.hitMaps.size > this.maxCachedHitMaps) {
+            this.hitMaps.delete(this.hitMaps.keys().next().value);
+        }
+        
+        const url = this.getHitMapUrl(`/${encodeURIComponent(frame)}?v=${this.hitMapIndex.version}`);
+        fetch(url)
+            .then(response => response.ok ? response.blob() : Promise.reject(response.status))
+            // IDs are raw channel values: no color management, no premultiplication
+            .then(blob => createImageBitmap(blob, { colorSpaceConversion: 'none', premultiplyAlpha: 'none' }))
+            .then(bitmap => {
+                const canvas = document.createElement('canvas');
+                canvas.width = bitmap.width;
+                canvas.height = bitmap.height;
+                const ctx = canvas.getContext('2d');
+                ctx.drawImage(bitmap, 0, 0);
+                const pixels = ctx.getImageData(0, 0, bitmap.width, bitmap.height).data;
+                const ids = new Uint16Array(bitmap.width * bitmap.height);
+                for (let i = 0; i < ids.length; i++) {
+                    ids[i] = pixels[i * 4] | (pixels[i * 4 + 1] << 8);
+                }
+                if (this.hitMaps.has(frame)) {
+                    this.hitMaps.set(frame, { width: bitmap.width, height: bitmap.height, ids });
+                }
+            })
+            .catch(() => {});
+        return null;
+    }
+    
+    pickFromHitMap(clientX, clientY) {
+        // Mesh under the cursor, null over no object, undefined when the frame has no hit map
+        const viewer2D = this.viewer2D;
+        if (!this.hitObjects || !viewer2D || !viewer2D.baseImageBounds) return undefined;
+        const map = this.getHitMap(viewer2D.currentImageIndex);
+        if (!map) return undefined;
+        
+        // Undo the 2D viewer's zoom (around the image center) and pan to reach frame coordinates
+        const rect = viewer2D.canvas.getBoundingClientRect();
+        const bounds = viewer2D.baseImageBounds;
+        const centerX = bounds.x + bounds.width / 2;
+        const centerY = bounds.y + bounds.height / 2;
+        const x = (clientX - rect.left - centerX - viewer2D.panX) / viewer2D.zoom + centerX;
+        const y = (clientY - rect.top - centerY - viewer2D.panY) / viewer2D.zoom + centerY;
+        const u = (x - bounds.x) / bounds.width;
+        const v = (y - bounds.y) / bounds.height;
+        if (u < 0 || u >= 1 || v < 0 || v >= 1) return null;
+        
+        const id = map.ids[Math.floor(v * map.height) * map.width + Math.floor(u * map.width)];
+        return this.hitObjects[id] || null;
+    }
+    
     setupInteraction() {
         // Mouse move for hover detection
         this.canvas.addEventListener('mousemove', (e) => {
@@ -966,19 +1099,23 @@ class Viewer3D {
                 return;
             }
             
-            // Calculate mouse position in normalized device coordinates (-1 to +1)
-            const rect = this.canvas.getBoundingClientRect();
-            this.mouse.x = ((e.clientX - rect.left) / rect.width) * 2 - 1;
-            this.mouse.y = -((e.clientY - rect.top) / rect.height) * 2 + 1;
-            
-            // Update raycaster
-            this.raycaster.setFromCamera(this.mouse, this.currentCamera);
-            
-            // Check for intersections
-            const intersects = this.raycaster.intersectObjects(this.meshes, false);
+            // O(1) lookup in the current frame's hit map; raycast only when it is not available
+            let newHovered = this.pickFromHitMap(e.clientX, e.clientY);
+            if (newHovered === undefined) {
+                // Calculate mouse position in normalized device coordinates (-1 to +1)
+                const rect = this.canvas.getBoundingClientRect();
+                this.mouse.x = ((e.clientX - rect.left) / rect.width) * 2 - 1;
+                this.mouse.y = -((e.clientY - rect.top) / rect.height) * 2 + 1;
+                
+                // Update raycaster
+                this.raycaster.setFromCamera(this.mouse, this.currentCamera);
+                
+                // Check for intersections
+                const intersects = this.raycaster.intersectObjects(this.meshes, false);
+                newHovered = intersects.length > 0 ? intersects[0].object : null;
+            }
             
-            if (intersects.length > 0) {
-                const newHovered = intersects[0].object;
+            if (newHovered) {
                 this.isHoveringObject = true;
                 
                 if (this.hoveredObject !== newHovered) {
@@ -1658,6 +1795,8 @@ class Viewer3D {
         bbox.getSize(size);
         const center = new THREE.Vector3();
         bbox.getCenter(center);
+        // Quantized models (optimize-glb.py) scale geometry in the node; keep speeds and sizes in world units
+        const worldScale = object.getWorldScale(new THREE.Vector3()).x || 1;
         
         // Create particles
         const particleCount = CONFIG_3D.PARTICLE_COUNT;
@@ -1671,9 +1810,9 @@ class Viewer3D {
             positions[i * 3 + 2] = (Math.random() - 0.5) * size.z;
             
             // Upward velocity with slight random horizontal movement
-            velocities[i * 3] = (Math.random() - 0.5) * 0.05; // Slight X drift
-            velocities[i * 3 + 1] = 0.5 + Math.random() * 0.3; // Upward movement
-            velocities[i * 3 + 2] = (Math.random() - 0.5) * 0.05; // Slight Z drift
+            velocities[i * 3] = (Math.random() - 0.5) * 0.05 / worldScale; // Slight X drift
+            velocities[i * 3 + 1] = (0.5 + Math.random() * 0.3) / worldScale; // Upward movement
+            velocities[i * 3 + 2] = (Math.random() - 0.5) * 0.05 / worldScale; // Slight Z drift
         }
         
         const geometry = new THREE.BufferGeometry();
@@ -1684,7 +1823,7 @@ class Viewer3D {
         
         const material = new THREE.PointsMaterial({
             color: CONFIG_3D.PARTICLE_COLOR,
-            size: Math.max(size.x, size.y, size.z) * CONFIG_3D.PARTICLE_SIZE,
+            size: Math.max(size.x, size.y, size.z) * worldScale * CONFIG_3D.PARTICLE_SIZE,
             transparent: true,
             opacity: CONFIG_3D.PARTICLE_OPACITY,
             sizeAttenuation: true,
@@ -1710,8 +1849,7 @@ class Viewer3D {
         // Calculate scene bounding box
         const sceneBounds = new THREE.Box3();
         this.meshes.forEach(mesh => {
-            const meshBounds = new THREE.Box3().setFromObject(mesh);
-            sceneBounds.union(meshBounds);
+            sceneBounds.union(mesh.userData.worldBounds);
         });
         
         const sceneSize = new THREE.Vector3();
@@ -1778,7 +1916,7 @@ class Viewer3D {
         
         // Check intersection with each object
         this.meshes.forEach(mesh => {
-            const meshBounds = new THREE.Box3().setFromObject(mesh);
+            const meshBounds = mesh.userData.worldBounds;
             const planeY = this.introAnimation.planeY;
             
             // Check if plane is touching this object
@@ -2412,6 +2550,9 @@ class Viewer3D {
                 this.switchCamera(cameraIndex);
             }
         }
+        
+        // Fetch the frame's hit map before the pointer moves over it
+        this.getHitMap(imageIndex);
     }
     
     // Sync zoom and pan from 2D viewer